@@ -1,5 +1,7 @@
 import streamlit as st
 
+from core import telemetry
+
 # ======================
 # PAGE CONFIG
 # ======================
@@ -9,12 +11,20 @@ st.set_page_config(
     layout="wide"
 )
 
-# ======================
-# HERO SECTION
-# ======================
-st.title("🚚 Food Delivery Intelligence & Predictive Operations System")
+# Hidden diagnostics view (not in the sidebar): /?view=diagnostics
+if st.query_params.get("view") == "diagnostics":
+    from diagnostics import render
+
+    render()
+    st.stop()
 
-st.markdown("""
+with telemetry.run("home"):
+    # ======================
+    # HERO SECTION
+    # ======================
+    st.title("🚚 Food Delivery Intelligence & Predictive Operations System")
+
+    st.markdown("""
 An **end-to-end operational analytics & predictive intelligence system**
 built to forecast delivery time, uncover delay drivers,
 and enable data-driven logistics optimization.
@@ -23,17 +33,17 @@ This platform transforms operational data into
 **strategic decision intelligence for last-mile delivery performance**.
 """)
 
-st.divider()
+    st.divider()
 
-# ======================
-# INDUSTRY + BUSINESS PROBLEM (SIDE BY SIDE)
-# ======================
-col1, col2 = st.columns(2)
+    # ======================
+    # INDUSTRY + BUSINESS PROBLEM (SIDE BY SIDE)
+    # ======================
+    col1, col2 = st.columns(2)
 
-with col1:
-    with st.container(border=True):
-        st.header("🌍 Industry Context")
-        st.markdown("""
+    with col1:
+        with st.container(border=True):
+            st.header("🌍 Industry Context")
+            st.markdown("""
 The food delivery industry is one of the most competitive and
 operationally complex ecosystems today.
 
@@ -57,10 +67,10 @@ not just for monitoring performance,
 but for preventing delays before they occur.
 """)
 
-with col2:
-    with st.container(border=True):
-        st.header("📌 Business Problem")
-        st.markdown("""
+    with col2:
+        with st.container(border=True):
+            st.header("📌 Business Problem")
+            st.markdown("""
 Traditional operational dashboards are reactive.
 
 They show what already happened —  
@@ -78,17 +88,17 @@ This system addresses these gaps
 through predictive modeling and operational analytics.
 """)
 
-st.divider()
+    st.divider()
 
-# ======================
-# OBJECTIVES + MODELING (SIDE BY SIDE)
-# ======================
-col3, col4 = st.columns(2)
+    # ======================
+    # OBJECTIVES + MODELING (SIDE BY SIDE)
+    # ======================
+    col3, col4 = st.columns(2)
 
-with col3:
-    with st.container(border=True):
-        st.header("🎯 Project Objectives")
-        st.markdown("""
+    with col3:
+        with st.container(border=True):
+            st.header("🎯 Project Objectives")
+            st.markdown("""
 The project aims to:
 
 - Predict food delivery time using supervised machine learning  
@@ -102,10 +112,10 @@ The objective is not only prediction accuracy,
 but **decision-grade operational insight**.
 """)
 
-with col4:
-    with st.container(border=True):
-        st.header("🤖 Modeling Strategy")
-        st.markdown("""
+    with col4:
+        with st.container(border=True):
+            st.header("🤖 Modeling Strategy")
+            st.markdown("""
 Several regression algorithms were evaluated:
 
 - Linear Regression  
@@ -128,7 +138,7 @@ Model performance was evaluated using:
 - Cross-validation stability  
 """)
 
-st.success("""
+    st.success("""
 ✅ Final Production Model: XGBoost Regressor
 
 - Highest predictive performance  
@@ -140,17 +150,17 @@ The model is suitable for real-time ETA estimation
 and operational decision support.
 """)
 
-st.divider()
+    st.divider()
 
-# ======================
-# CAPABILITIES + IMPACT (SIDE BY SIDE)
-# ======================
-col5, col6 = st.columns(2)
+    # ======================
+    # CAPABILITIES + IMPACT (SIDE BY SIDE)
+    # ======================
+    col5, col6 = st.columns(2)
 
-with col5:
-    with st.container(border=True):
-        st.header("⚙️ System Capabilities")
-        st.markdown("""
+    with col5:
+        with st.container(border=True):
+            st.header("⚙️ System Capabilities")
+            st.markdown("""
 This system enables stakeholders to:
 
 - 📊 Monitor operational KPIs  
@@ -165,10 +175,10 @@ predictive modeling,
 and strategic operations management.
 """)
 
-with col6:
-    with st.container(border=True):
-        st.header("💰 Strategic & Financial Impact")
-        st.markdown("""
+    with col6:
+        with st.container(border=True):
+            st.header("💰 Strategic & Financial Impact")
+            st.markdown("""
 With predictive delivery intelligence,
 companies can:
 
@@ -185,13 +195,13 @@ can significantly enhance brand perception
 and operational efficiency.
 """)
 
-st.divider()
+    st.divider()
 
-# ======================
-# NAVIGATION
-# ======================
-with st.container(border=True):
-    st.markdown("""
+    # ======================
+    # NAVIGATION
+    # ======================
+    with st.container(border=True):
+        st.markdown("""
 👉 Use the sidebar to explore:
 
 - 📊 Executive Dashboard  
@@ -203,4 +213,4 @@ with st.container(border=True):
 - 👤 About the Analyst  
 """)
 
-st.success("✅ System ready for operational and strategic exploration.")
+    st.success("✅ System ready for operational and strategic exploration.")
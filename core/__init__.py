@@ -0,0 +1 @@
+"""Shared data, analytics and model services used by the Streamlit pages."""
@@ -0,0 +1,470 @@
+"""Cold-start friendly model artifact.
+
+``export`` writes the deployed pipeline as two files, in a directory of its
+own per model (``artifact_dir``: ``data/model/<fingerprint>``):
+
+    booster.ubj       the native XGBoost booster (UBJSON)
+    preprocess.json   encoder vocabularies, scaler parameters, the feature
+                      layout and the booster's SHA-256
+
+``load`` rebuilds the compiled inference path (``core.fastpath``) from them
+with NumPy only: the booster is memory-mapped, checksummed and decoded by a
+small UBJSON reader whose typed arrays are zero-copy views of the mapping,
+and its trees are evaluated in NumPy (float32 comparisons and sequential
+float32 leaf sums, as XGBoost does), so predictions are identical to the
+joblib pipeline. Neither sklearn, scipy, pandas nor xgboost is imported;
+``engine="xgboost"`` loads the booster with XGBoost instead, and the default
+``"auto"`` defers that import until a batch is large enough to need it.
+Either way XGBoost reads a copy of the bytes that were checksummed at load
+time, never the file again, so both engines always score the same model.
+Keying the directory by model means an export never overwrites the
+artifact of a model that is still being served.
+
+``python -m core.artifact bench`` times both cold-start paths in fresh
+interpreters.
+
+Usage:
+    python -m core.artifact export
+    python -m core.artifact bench --runs 5
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from core.fastpath import CompiledPipeline
+from core.schema import DATA_DIR
+
+MODEL_PATH = os.path.join(DATA_DIR, "best_xgb_model.joblib")
+ARTIFACT_DIR = os.path.join(DATA_DIR, "model")
+BOOSTER_FILE = "booster.ubj"
+SPEC_FILE = "preprocess.json"
+FORMAT_VERSION = 1
+
+_BLOCK_ROWS = 2048
+
+# Batches this large are faster through XGBoost than its import costs
+AUTO_XGBOOST_ROWS = 4096
+
+
+# ======================================================
+# UBJSON
+# ======================================================
+
+# UBJSON is big-endian
+_SCALARS = {
+    b"i": ">i1", b"U": ">u1", b"I": ">i2", b"l": ">i4",
+    b"L": ">i8", b"d": ">f4", b"D": ">f8",
+}
+
+
+class _UBJReader:
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.pos = 0
+
+    def _marker(self):
+        marker = self.buffer[self.pos:self.pos + 1]
+        self.pos += 1
+        return marker
+
+    def _scalar(self, marker):
+        dtype = np.dtype(_SCALARS[marker])
+        value = np.frombuffer(self.buffer, dtype, 1, self.pos)[0]
+        self.pos += dtype.itemsize
+        return value.item()
+
+    def _string(self):
+        length = self._scalar(self._marker())
+        value = bytes(self.buffer[self.pos:self.pos + length]).decode()
+        self.pos += length
+        return value
+
+    def value(self, marker=None):
+        marker = marker or self._marker()
+        if marker in _SCALARS:
+            return self._scalar(marker)
+        if marker == b"S":
+            return self._string()
+        if marker in (b"T", b"F"):
+            return marker == b"T"
+        if marker == b"Z":
+            return None
+        if marker == b"[":
+            return self._array()
+        if marker == b"{":
+            return self._object()
+        raise ValueError(f"unsupported UBJSON marker {marker!r} at byte {self.pos - 1}")
+
+    def _array(self):
+        element, count = None, None
+        if self.buffer[self.pos:self.pos + 1] == b"$":
+            self.pos += 1
+            element = self._marker()
+        if self.buffer[self.pos:self.pos + 1] == b"#":
+            self.pos += 1
+            count = self._scalar(self._marker())
+
+        if element is not None:
+            # Typed array: a view on the buffer, no per-element decoding
+            dtype = np.dtype(_SCALARS[element])
+            items = np.frombuffer(self.buffer, dtype, count, self.pos)
+            self.pos += dtype.itemsize * count
+            return items
+        if count is not None:
+            return [self.value() for _ in range(count)]
+
+        items = []
+        while (marker := self._marker()) != b"]":
+            items.append(self.value(marker))
+        return items
+
+    def _object(self):
+        count = None
+        if self.buffer[self.pos:self.pos + 1] == b"#":
+            self.pos += 1
+            count = self._scalar(self._marker())
+
+        result = {}
+        while count is None or len(result) < count:
+            if count is None and self.buffer[self.pos:self.pos + 1] == b"}":
+                self.pos += 1
+                break
+            key = self._string()
+            result[key] = self.value()
+        return result
+
+
+def read_ubjson(buffer):
+    return _UBJReader(buffer).value()
+
+
+# ======================================================
+# TREE ENSEMBLE
+# ======================================================
+
+class TreeEnsemble:
+    """XGBoost regression trees flattened into arrays, evaluated in NumPy."""
+
+    def __init__(self, base_score, feature, threshold, left, right, default_left, depth):
+        self.base_score = np.float32(base_score)
+        # (trees, nodes) arrays; leaves have left == -1 and store their
+        # value in ``threshold``.
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.default_left = default_left
+        self.depth = depth
+
+    @classmethod
+    def from_model(cls, model):
+        learner = model["learner"]
+        objective = learner["objective"]["name"]
+        if objective != "reg:squarederror":
+            raise ValueError(f"unsupported objective {objective!r}")
+        booster = learner["gradient_booster"]
+        if booster["name"] != "gbtree":
+            raise ValueError(f"unsupported booster {booster['name']!r}")
+
+        trees = booster["model"]["trees"]
+        width = max(len(t["left_children"]) for t in trees)
+
+        def stack(key, dtype, fill):
+            out = np.full((len(trees), width), fill, dtype=dtype)
+            for i, tree in enumerate(trees):
+                values = np.asarray(tree[key])
+                out[i, :len(values)] = values
+            return out
+
+        left = stack("left_children", np.int32, -1)
+        right = stack("right_children", np.int32, -1)
+        depth = cls._depth(left, right)
+        base_score = float(learner["learner_model_param"]["base_score"].strip("[]"))
+        return cls(
+            base_score,
+            stack("split_indices", np.int32, 0),
+            stack("split_conditions", np.float32, 0),
+            left, right,
+            stack("default_left", bool, False),
+            depth,
+        )
+
+    @staticmethod
+    def _depth(left, right):
+        # Children always have higher ids than their parent, so one pass in
+        # node order assigns every depth.
+        depth = np.zeros(left.shape, dtype=np.int32)
+        for j in range(left.shape[1]):
+            rows = np.nonzero(left[:, j] >= 0)[0]
+            depth[rows, left[rows, j]] = depth[rows, j] + 1
+            depth[rows, right[rows, j]] = depth[rows, j] + 1
+        return int(depth.max())
+
+    def predict(self, features):
+        x = np.asarray(features, dtype=np.float32)
+        out = np.empty(len(x), dtype=np.float32)
+        # Row blocks keep the (rows, trees) working arrays cache-sized
+        for start in range(0, len(x), _BLOCK_ROWS):
+            out[start:start + _BLOCK_ROWS] = self._predict_block(x[start:start + _BLOCK_ROWS])
+        return out
+
+    def _predict_block(self, x):
+        trees, width = self.feature.shape
+        base = np.arange(trees, dtype=np.int64) * width
+        flat = np.broadcast_to(base, (len(x), trees)).copy()
+        for _ in range(self.depth):
+            left = self.left.ravel().take(flat)
+            value = np.take_along_axis(x, self.feature.ravel().take(flat), axis=1)
+            go_left = value < self.threshold.ravel().take(flat)
+            missing = np.isnan(value)
+            if missing.any():
+                go_left = np.where(missing, self.default_left.ravel().take(flat), go_left)
+            child = np.where(go_left, left, self.right.ravel().take(flat))
+            flat = np.where(left < 0, flat, base + child)
+
+        leaves = np.empty((len(x), trees + 1), dtype=np.float32)
+        leaves[:, 0] = self.base_score
+        leaves[:, 1:] = self.threshold.ravel().take(flat)
+        # cumsum adds strictly left to right: the same float32 rounding as
+        # XGBoost's per-row accumulation over trees
+        return np.cumsum(leaves, axis=1, dtype=np.float32)[:, -1]
+
+
+class _NativeRegressor:
+    """The same ``predict`` interface over an ``xgboost.Booster``."""
+
+    def __init__(self, raw):
+        import xgboost
+
+        # ``raw`` is the verified booster, not a path that may since hold another
+        self.booster = xgboost.Booster(model_file=raw)
+
+    def predict(self, features):
+        return self.booster.inplace_predict(features)
+
+
+class _AutoRegressor:
+    """NumPy trees for small batches; XGBoost, imported on first use, for large ones.
+
+    Both give identical predictions, so the switch is invisible to callers.
+    """
+
+    def __init__(self, ensemble, raw):
+        self.ensemble = ensemble
+        self.raw = raw
+        self.native = None
+
+    def predict(self, features):
+        if len(features) < AUTO_XGBOOST_ROWS:
+            return self.ensemble.predict(features)
+        if self.native is None:
+            self.native = _NativeRegressor(self.raw)
+        return self.native.predict(features)
+
+
+# ======================================================
+# EXPORT / LOAD
+# ======================================================
+
+def _sha256(buffer):
+    return hashlib.sha256(buffer).hexdigest()
+
+
+def model_fingerprint(path=MODEL_PATH):
+    """SHA-256 of the model artifact; changes whenever a new model is published."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def artifact_dir(fingerprint):
+    """Export directory of the model whose joblib file has SHA-256 ``fingerprint``."""
+    return os.path.join(ARTIFACT_DIR, fingerprint[:16])
+
+
+def export(pipeline, directory, source_fingerprint=None):
+    """Write ``booster.ubj`` and ``preprocess.json`` for a fitted pipeline."""
+    compiled = CompiledPipeline.from_pipeline(pipeline)
+    booster = bytes(pipeline.named_steps["model"].get_booster().save_raw("ubj"))
+    spec = {
+        "format_version": FORMAT_VERSION,
+        "source_sha256": source_fingerprint,
+        "booster": {"file": BOOSTER_FILE, "sha256": _sha256(booster), "bytes": len(booster)},
+        **compiled.to_spec(),
+    }
+
+    os.makedirs(directory, exist_ok=True)
+    # Booster first, spec last: a reader never sees a spec whose checksum
+    # refers to a booster that is not fully written.
+    for name, payload in ((BOOSTER_FILE, booster), (SPEC_FILE, json.dumps(spec, indent=2).encode())):
+        tmp = os.path.join(directory, name + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(payload)
+        os.replace(tmp, os.path.join(directory, name))
+    return spec
+
+
+def read_spec(directory):
+    with open(os.path.join(directory, SPEC_FILE)) as f:
+        return json.load(f)
+
+
+def load(directory=None, engine="auto", verify=True):
+    """Compiled pipeline from an exported artifact.
+
+    ``engine`` is ``"numpy"``, ``"xgboost"`` or ``"auto"`` (NumPy below
+    ``AUTO_XGBOOST_ROWS`` rows per call). Raises ``ValueError`` if the
+    booster does not match the spec's checksum. ``directory`` defaults to
+    the export of the model at ``MODEL_PATH``.
+    """
+    if directory is None:
+        directory = artifact_dir(model_fingerprint())
+    spec = read_spec(directory)
+    if spec.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"unsupported artifact format {spec.get('format_version')!r}")
+
+    path = os.path.join(directory, spec["booster"]["file"])
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if verify and _sha256(mapped) != spec["booster"]["sha256"]:
+        raise ValueError(f"{path} does not match the checksum in {SPEC_FILE}")
+
+    if engine == "xgboost":
+        regressor = _NativeRegressor(bytearray(mapped))
+    elif engine == "numpy":
+        regressor = TreeEnsemble.from_model(read_ubjson(mapped))
+    elif engine == "auto":
+        regressor = _AutoRegressor(
+            TreeEnsemble.from_model(read_ubjson(mapped)), bytearray(mapped)
+        )
+    else:
+        raise ValueError(f"unknown engine {engine!r}")
+    return CompiledPipeline.from_spec(spec, regressor)
+
+
+def load_compiled(model_path, fingerprint, directory=None):
+    """Compiled pipeline for the joblib model at ``model_path``.
+
+    Uses the exported artifact when it was exported from this exact model
+    (``fingerprint`` is the joblib file's SHA-256); otherwise compiles the
+    joblib pipeline and exports it so the next cold start is fast.
+    """
+    if directory is None:
+        directory = artifact_dir(fingerprint)
+    try:
+        if read_spec(directory).get("source_sha256") == fingerprint:
+            return load(directory)
+    except (OSError, ValueError):
+        pass
+
+    from core.model import load_model
+
+    pipeline = load_model(model_path)
+    try:
+        export(pipeline, directory, fingerprint)
+    except OSError:
+        pass
+    return CompiledPipeline.from_pipeline(pipeline)
+
+
+# ======================================================
+# STARTUP BENCHMARK
+# ======================================================
+
+_ORDER = {
+    "distance_km": 7.5, "weather": "Clear", "traffic_level": "Low",
+    "time_of_day": "Morning", "vehicle_type": "Bike",
+    "preparation_time_min": 15, "courier_experience_yrs": 5.0,
+}
+
+_COLD_STARTS = {
+    "joblib": (
+        "from core.fastpath import CompiledPipeline\n"
+        "from core.model import load_model\n"
+        "eta = CompiledPipeline.from_pipeline(load_model()).predict_one(ORDER)"
+    ),
+    "artifact (xgboost)": (
+        "from core.artifact import load\n"
+        "eta = load(engine='xgboost').predict_one(ORDER)"
+    ),
+    "artifact (numpy)": (
+        "from core.artifact import load\n"
+        "eta = load(engine='numpy').predict_one(ORDER)"
+    ),
+    # What the ETA service actually pays: its imports plus CachedPredictor
+    "service (core.serving)": (
+        "import core.serving\n"
+        "from core.predcache import CachedPredictor\n"
+        "eta = CachedPredictor().predict_one(ORDER)"
+    ),
+}
+
+_HARNESS = """
+import json, sys, time
+start = time.perf_counter()
+ORDER = {order!r}
+{body}
+elapsed = time.perf_counter() - start
+heavy = [m for m in ("sklearn", "scipy", "pandas", "pyarrow", "joblib", "xgboost") if m in sys.modules]
+print(json.dumps({{"seconds": elapsed, "eta": float(eta), "modules": heavy}}))
+"""
+
+
+def bench(runs=5):
+    """Median cold start (imports + load + first prediction) per path."""
+    results = {}
+    for name, body in _COLD_STARTS.items():
+        code = _HARNESS.format(order=_ORDER, body=body)
+        samples = []
+        for _ in range(runs):
+            out = subprocess.run(
+                [sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                cwd=os.getcwd(), env={**os.environ, "PYTHONPATH": os.getcwd()},
+            )
+            samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+        results[name] = {
+            "seconds": float(np.median([s["seconds"] for s in samples])),
+            "eta": samples[0]["eta"],
+            "modules": samples[0]["modules"],
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export or benchmark the model artifact")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export_cmd = sub.add_parser("export")
+    export_cmd.add_argument("--model", default=None)
+    export_cmd.add_argument("--output", default=None,
+                            help="default: the model's directory under data/model")
+    bench_cmd = sub.add_parser("bench")
+    bench_cmd.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        from core.model import load_model
+
+        model_path = args.model or MODEL_PATH
+        fingerprint = model_fingerprint(model_path)
+        output = args.output or artifact_dir(fingerprint)
+        spec = export(load_model(model_path), output, fingerprint)
+        print(f"Exported {spec['booster']['bytes']:,} byte booster + {SPEC_FILE} to {output}")
+    else:
+        for name, result in bench(args.runs).items():
+            modules = ", ".join(result["modules"]) or "none"
+            print(f"{name:22s} {result['seconds'] * 1000:8.0f} ms  "
+                  f"eta={result['eta']:.4f}  heavy imports: {modules}")
+
+
+if __name__ == "__main__":
+    main()
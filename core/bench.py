@@ -0,0 +1,421 @@
+"""Benchmark suite for the analytics and inference hot paths.
+
+Each benchmark mirrors what a page (or the ETA service) does per rerun or
+per request, on an order table of a given scale:
+
+    load                 read the order table from its Arrow file
+    executive_scope      page 1: scope filter + KPIs + three group-bys
+    environment_scope    page 2: scope filter + quantile + aggregates + matrix
+    courier_scope        page 3: shared-table filter + category group-by
+    courier_slider       page 3 slider: grid totals, per-year rows, histogram, sketch
+    ols_trendline        page 3 trendline from the grid's sufficient statistics
+    predict_single       sklearn pipeline, one order
+    predict_compiled     compiled inference path, one order
+    predict_batch        sklearn pipeline, one batch of orders
+    distance_scenarios   page 5 distance sensitivity sweep
+
+Tables larger than the real one are the real orders resampled with a
+little noise on the numeric columns; they are written once per scale as
+Arrow files. Every (benchmark, scale) case runs in a fresh process, so its
+peak RSS is its own and earlier cases cannot warm its caches. Setup
+(building cubes, grids, models, as the pages' ``st.cache_resource`` would)
+is excluded from the timings.
+
+Results are JSON: p50/p99/mean latency, throughput (items per second at
+p50) and peak RSS per case. ``--baseline`` compares against an earlier
+run and exits non-zero if any case's p50 regressed by more than
+``--max-regression``.
+
+Usage:
+    python -m core.bench --scales 1k,100k,1m --output bench.json
+    python -m core.bench --scales 1k,100k --baseline bench.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pyarrow as pa
+
+from core.data import (
+    DELIVERY, DISTANCE, EXPERIENCE, EXPERIENCE_CATEGORY, PREP_TIME, TIME_OF_DAY,
+    TRAFFIC, VEHICLE, WEATHER, load_orders,
+)
+
+DEFAULT_SCALES = "1k,100k,1m"
+DEFAULT_REPEAT = 50
+DEFAULT_WARMUP = 3
+DEFAULT_MAX_REGRESSION = 0.25
+# Rows per predict_batch call, whatever the table size
+PREDICT_BATCH = 10_000
+
+_SUFFIXES = {"k": 1_000, "m": 1_000_000}
+
+_ORDER = {
+    DISTANCE: 7.5, WEATHER: "Clear", TRAFFIC: "Low", TIME_OF_DAY: "Morning",
+    VEHICLE: "Bike", PREP_TIME: 15, EXPERIENCE: 5.0,
+}
+
+
+def parse_scale(text):
+    text = text.strip().lower()
+    if text[-1] in _SUFFIXES:
+        return int(float(text[:-1]) * _SUFFIXES[text[-1]])
+    return int(text)
+
+
+def format_scale(n):
+    for suffix, size in sorted(_SUFFIXES.items(), key=lambda kv: -kv[1]):
+        if n >= size and n % size == 0:
+            return f"{n // size}{suffix}"
+    return str(n)
+
+
+def peak_rss():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+# ======================================================
+# DATA
+# ======================================================
+
+def scaled_orders(n, seed=0):
+    """``n`` orders resampled from the real table, numeric columns jittered."""
+    df = load_orders()
+    rng = np.random.default_rng(seed)
+    out = df.iloc[rng.integers(0, len(df), n)].reset_index(drop=True)
+    out[DISTANCE] = np.round(np.abs(out[DISTANCE] + rng.normal(0, 0.5, n)), 2)
+    out[DELIVERY] = np.maximum(out[DELIVERY] + rng.integers(-2, 3, n), 1)
+    return out
+
+
+def write_scale(n, directory):
+    path = os.path.join(directory, f"orders-{format_scale(n)}.arrow")
+    table = pa.Table.from_pandas(scaled_orders(n), preserve_index=False)
+    with pa.OSFile(path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    return path
+
+
+def _load(path, columns=None):
+    # The Arrow file is its own source: there is no CSV at these scales
+    return load_orders(columns, csv_path=path, arrow_path=path)
+
+
+# ======================================================
+# BENCHMARKS
+# ======================================================
+# Each setup returns (operation, items per call). Operations take a
+# numpy Generator so every call can pick a different scope.
+
+ANALYTICS_COLUMNS = [DELIVERY, DISTANCE, TRAFFIC, WEATHER, TIME_OF_DAY, VEHICLE]
+COURIER_COLUMNS = [DELIVERY, EXPERIENCE, DISTANCE, PREP_TIME, EXPERIENCE_CATEGORY]
+
+
+def _random_scope(rng, cube):
+    return {
+        col: rng.choice(["All"] + cube.values(col))
+        for col in (TIME_OF_DAY, TRAFFIC, WEATHER)
+    }
+
+
+def setup_load(path):
+    with pa.memory_map(path) as source:
+        n = pa.ipc.open_file(source).read_all().num_rows
+    return (lambda rng: _load(path)), n
+
+
+def setup_executive_scope(path):
+    from core.cube import OrderCube
+
+    cube = OrderCube.from_frame(_load(path, ANALYTICS_COLUMNS), late_threshold=40)
+
+    def run(rng):
+        scope = cube.scope(**_random_scope(rng, cube))
+        if scope.count:
+            _ = scope.mean, scope.late_rate, scope.mean_distance
+            for col in (TIME_OF_DAY, TRAFFIC, WEATHER):
+                scope.mean_by(col)
+            scope.where(**{TRAFFIC: "High", WEATHER: ["Rainy", "Snowy", "Windy", "Foggy"]}).count
+    return run, 1
+
+
+def setup_environment_scope(path):
+    from core.cube import OrderCube
+
+    cube = OrderCube.from_frame(_load(path, ANALYTICS_COLUMNS))
+
+    def run(rng):
+        scope = cube.scope(**_random_scope(rng, cube))
+        if scope.count:
+            _ = scope.std
+            sketch = scope.sketch()
+            sketch.count_at_least(sketch.quantile(0.75))
+            scope.aggregate(TRAFFIC, ["mean", "median", "std", "count"])
+            scope.aggregate(WEATHER, ["mean", "median", "std", "count"])
+            scope.mean_by([TRAFFIC, WEATHER])
+    return run, 1
+
+
+def setup_courier_scope(path):
+    from core.shared import SharedOrders
+
+    with pa.memory_map(path) as source:
+        orders = SharedOrders(pa.ipc.open_file(source).read_all().select(COURIER_COLUMNS),
+                              mapped=True)
+    experience, distance = orders[EXPERIENCE], orders[DISTANCE]
+
+    def run(rng):
+        view = orders.select(
+            (experience >= rng.integers(0, 10)) & (distance <= rng.integers(1, 21))
+        )
+        if len(view):
+            view.frame([EXPERIENCE_CATEGORY, DELIVERY]).groupby(
+                EXPERIENCE_CATEGORY, observed=True
+            )[DELIVERY].mean()
+    return run, 1
+
+
+def _courier_structures(path):
+    import pandas as pd
+
+    from core.grid import PrefixGrid
+    from core.sketch import SegmentSketches
+
+    df = _load(path, COURIER_COLUMNS)
+    delivery = df[DELIVERY].to_numpy(dtype=float)
+    distance = df[DISTANCE].to_numpy(dtype=float)
+    grid = PrefixGrid.from_arrays(
+        df[EXPERIENCE], np.ceil(distance),
+        {
+            "total": delivery, "total_sq": delivery ** 2, "ratio": distance / delivery,
+            "distance": distance, "distance_sq": distance ** 2,
+            "distance_delivery": distance * delivery,
+        },
+        histograms={"delivery": (delivery, np.arange(0, delivery.max() + 5, 5))},
+    )
+    sketches = SegmentSketches.from_frame(
+        pd.DataFrame({
+            "experience_floor": np.floor(df[EXPERIENCE]),
+            "distance_ceil": np.ceil(distance),
+            DELIVERY: delivery,
+        }),
+        DELIVERY, ["experience_floor", "distance_ceil"],
+    )
+    return grid, sketches
+
+
+def setup_courier_slider(path):
+    grid, sketches = _courier_structures(path)
+
+    def run(rng):
+        min_exp, max_dist = int(rng.integers(0, 10)), int(rng.integers(1, 21))
+        if grid.totals(min_exp, max_dist)["count"]:
+            grid.by_row(min_exp, max_dist, name=EXPERIENCE)
+            grid.histogram("delivery", min_exp, max_dist)
+            sketch = sketches.select(lambda exp, dist: exp >= min_exp and dist <= max_dist)
+            sketch.count_at_least(sketch.quantile(0.75))
+    return run, 1
+
+
+def setup_ols_trendline(path):
+    grid, _ = _courier_structures(path)
+
+    def run(rng):
+        totals = grid.totals(int(rng.integers(0, 10)), int(rng.integers(1, 21)))
+        n = totals["count"]
+        if n:
+            denominator = n * totals["distance_sq"] - totals["distance"] ** 2
+            slope = (n * totals["distance_delivery"] - totals["distance"] * totals["total"]) / (
+                denominator or 1.0
+            )
+            (totals["total"] - slope * totals["distance"]) / n
+    return run, 1
+
+
+def _pipeline():
+    from core.model import load_model
+
+    return load_model()
+
+
+def setup_predict_single(path):
+    import pandas as pd
+
+    from core.model import prepare_features
+
+    model = _pipeline()
+    row = prepare_features(pd.DataFrame([_ORDER]), model.feature_names_in_)
+    return (lambda rng: model.predict(row)), 1
+
+
+def setup_predict_compiled(path):
+    from core.fastpath import CompiledPipeline
+
+    model = CompiledPipeline.from_pipeline(_pipeline())
+    return (lambda rng: model.predict_one(_ORDER)), 1
+
+
+def setup_predict_batch(path):
+    from core.model import prepare_features
+
+    model = _pipeline()
+    batch = prepare_features(scaled_orders(PREDICT_BATCH), model.feature_names_in_)
+    return (lambda rng: model.predict(batch)), len(batch)
+
+
+def setup_distance_scenarios(path):
+    from core.fastpath import CompiledPipeline
+    from core.scenarios import sweep
+
+    model = CompiledPipeline.from_pipeline(_pipeline())
+    shifts = np.array([-2, 0, 2])
+
+    def run(rng):
+        sweep(model, _ORDER, {DISTANCE: np.maximum(0.1, _ORDER[DISTANCE] + shifts)})
+    return run, len(shifts)
+
+
+# name -> (setup, depends on table scale)
+BENCHMARKS = {
+    "load": (setup_load, True),
+    "executive_scope": (setup_executive_scope, True),
+    "environment_scope": (setup_environment_scope, True),
+    "courier_scope": (setup_courier_scope, True),
+    "courier_slider": (setup_courier_slider, True),
+    "ols_trendline": (setup_ols_trendline, True),
+    "predict_single": (setup_predict_single, False),
+    "predict_compiled": (setup_predict_compiled, False),
+    "predict_batch": (setup_predict_batch, False),
+    "distance_scenarios": (setup_distance_scenarios, False),
+}
+
+
+# ======================================================
+# RUNNER
+# ======================================================
+
+def run_case(name, path, repeat=DEFAULT_REPEAT, warmup=DEFAULT_WARMUP, seed=0):
+    """Set up and time one benchmark; meant to run in its own process."""
+    start = time.perf_counter()
+    operation, items = BENCHMARKS[name][0](path)
+    setup_s = time.perf_counter() - start
+
+    rng = np.random.default_rng(seed)
+    for _ in range(warmup):
+        operation(rng)
+    samples = np.empty(repeat)
+    for i in range(repeat):
+        start = time.perf_counter()
+        operation(rng)
+        samples[i] = time.perf_counter() - start
+
+    p50 = float(np.percentile(samples, 50))
+    return {
+        "benchmark": name,
+        "repeat": repeat,
+        "items": items,
+        "setup_s": setup_s,
+        "p50_ms": p50 * 1000,
+        "p99_ms": float(np.percentile(samples, 99)) * 1000,
+        "mean_ms": float(samples.mean()) * 1000,
+        "throughput_per_s": items / p50 if p50 else float("inf"),
+        "peak_rss_bytes": peak_rss(),
+    }
+
+
+def run(scales, names=None, repeat=DEFAULT_REPEAT, warmup=DEFAULT_WARMUP, directory=None):
+    names = names or list(BENCHMARKS)
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        for i, n in enumerate(scales):
+            path = write_scale(n, tmp)
+            for name in names:
+                if not BENCHMARKS[name][1] and i > 0:
+                    continue  # independent of the table size: measured once
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                    result = pool.submit(run_case, name, path, repeat, warmup).result()
+                result["scale"] = format_scale(n) if BENCHMARKS[name][1] else None
+                yield result
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pyarrow": pa.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "created": time.time(),
+    }
+
+
+def compare(results, baseline, max_regression=DEFAULT_MAX_REGRESSION):
+    """Cases whose p50 grew by more than ``max_regression`` vs ``baseline``."""
+    previous = {(r["benchmark"], r["scale"]): r for r in baseline["results"]}
+    regressions = []
+    for result in results:
+        before = previous.get((result["benchmark"], result["scale"]))
+        if before and result["p50_ms"] > before["p50_ms"] * (1 + max_regression):
+            regressions.append((result, before))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the analytics and inference hot paths")
+    parser.add_argument("--scales", default=DEFAULT_SCALES,
+                        help="comma-separated table sizes, e.g. 1k,100k,1m,10m")
+    parser.add_argument("--only", default=None,
+                        help=f"comma-separated subset of: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP)
+    parser.add_argument("--output", default=None, help="write results as JSON")
+    parser.add_argument("--baseline", default=None, help="earlier results JSON to compare against")
+    parser.add_argument("--max-regression", type=float, default=DEFAULT_MAX_REGRESSION)
+    parser.add_argument("--tmp-dir", default=None, help="where scaled tables are written")
+    args = parser.parse_args()
+
+    scales = [parse_scale(s) for s in args.scales.split(",")]
+    names = args.only.split(",") if args.only else None
+    unknown = set(names or []) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    print(f"{'benchmark':20s} {'scale':>6s} {'p50 ms':>10s} {'p99 ms':>10s} "
+          f"{'items/s':>12s} {'peak RSS MiB':>13s}")
+    results = []
+    for result in run(scales, names, args.repeat, args.warmup, args.tmp_dir):
+        results.append(result)
+        print(f"{result['benchmark']:20s} {result['scale'] or '-':>6s} "
+              f"{result['p50_ms']:10.3f} {result['p99_ms']:10.3f} "
+              f"{result['throughput_per_s']:12,.0f} {result['peak_rss_bytes'] / 1024 ** 2:13.1f}")
+
+    if args.output:
+        tmp = args.output + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"environment": environment(), "results": results}, f, indent=2)
+        os.replace(tmp, args.output)
+        print(f"-> {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.max_regression)
+        for result, before in regressions:
+            print(f"REGRESSION {result['benchmark']} @ {result['scale'] or '-'}: "
+                  f"p50 {before['p50_ms']:.3f} -> {result['p50_ms']:.3f} ms")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
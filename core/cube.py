@@ -0,0 +1,308 @@
+"""Pre-aggregated delivery cube for the scope-filtered analytics pages.
+
+Every cell of ``time_of_day x traffic_level x weather x vehicle_type`` holds
+the additive measures (count, late count, distance sum), the delivery-time
+moments (mean and M2, the sum of squared deviations from the mean) and a
+KLL sketch of delivery times. A scope is a set of cells, and every
+figure on the Executive Dashboard and Traffic & Weather pages is a roll-up
+of those cells, so a rerun never touches the order rows.
+
+The same holds for the categorical slices a row bitmap index would
+serve: a scope over these four columns (a level, a list of levels, or
+"All") is an AND of per-dimension cell masks, and the cube's size
+depends on the number of levels, not on the number of orders.
+
+Moments are combined with Chan et al.'s pairwise update rather than from
+a sum of squares, which cancels catastrophically once the mean is large
+relative to the spread (or after many merged batches).
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from core.data import DELIVERY, DISTANCE, TIME_OF_DAY, TRAFFIC, VEHICLE, WEATHER
+from core.sketch import DEFAULT_K, KLLSketch
+
+ALL = "All"
+DIMENSIONS = (TIME_OF_DAY, TRAFFIC, WEATHER, VEHICLE)
+LATE_THRESHOLD = 40
+# Summed across cells; "mean" and "m2" are combined by _merge / _rollup
+ADDITIVE = ("count", "late", "distance")
+
+
+def _std(n, m2):
+    if n < 2:
+        return math.nan
+    return math.sqrt(max(m2 / (n - 1), 0.0))
+
+
+def _merge(n_a, mean_a, m2_a, n_b, mean_b, m2_b):
+    """Chan's pairwise merge of per-cell ``(count, mean, M2)``, elementwise."""
+    n = n_a + n_b
+    weight = np.divide(n_b, n, out=np.zeros(np.shape(n)), where=n > 0)
+    delta = mean_b - mean_a
+    return n, mean_a + delta * weight, m2_a + m2_b + delta ** 2 * n_a * weight
+
+
+def _rollup(n, mean, m2, axis=None):
+    """``(count, mean, M2)`` of the cells along ``axis``, merged at once.
+
+    The k-way form of ``_merge``: M2 adds each cell's squared offset from
+    the merged mean, so no term grows with the magnitude of the values.
+    """
+    total = n.sum(axis=axis, keepdims=True)
+    merged = np.divide((n * mean).sum(axis=axis, keepdims=True), total,
+                       out=np.zeros(np.shape(total)), where=total > 0)
+    spread = m2 + n * (mean - merged) ** 2
+    return total.squeeze(axis), merged.squeeze(axis), spread.sum(axis=axis)
+
+
+def _codes(series):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        cat = series.cat
+    else:
+        cat = series.astype("category").cat
+    return [str(level) for level in cat.categories], cat.codes.to_numpy()
+
+
+class OrderCube:
+
+    def __init__(self, levels, measures, sketches,
+                 late_threshold=LATE_THRESHOLD, k=DEFAULT_K):
+        self.levels = levels
+        self.measures = measures
+        self.sketches = sketches
+        self.late_threshold = late_threshold
+        self.k = k
+        self.shape = tuple(len(levels[dim]) for dim in DIMENSIONS)
+
+    @classmethod
+    def from_frame(cls, df, value_col=DELIVERY, distance_col=DISTANCE,
+                   late_threshold=LATE_THRESHOLD, k=DEFAULT_K):
+        levels, codes = {}, []
+        for dim in DIMENSIONS:
+            levels[dim], dim_codes = _codes(df[dim])
+            codes.append(dim_codes)
+
+        shape = tuple(len(levels[dim]) for dim in DIMENSIONS)
+        valid = np.all([c >= 0 for c in codes], axis=0)
+        values = df[value_col].to_numpy(dtype=float)
+
+        valid &= ~np.isnan(values)
+        flat = np.ravel_multi_index([c[valid] for c in codes], shape)
+        values = values[valid]
+        distance = df[distance_col].to_numpy(dtype=float)[valid]
+
+        size = int(np.prod(shape))
+
+        def cells(weights=None):
+            return np.bincount(flat, weights=weights, minlength=size).reshape(shape)
+
+        count = cells().astype(np.int64)
+        mean = np.divide(cells(values), count, out=np.zeros(shape), where=count > 0)
+        measures = {
+            "count": count,
+            "mean": mean,
+            "m2": cells((values - mean.ravel()[flat]) ** 2),
+            "late": cells((values > late_threshold).astype(float)).astype(np.int64),
+            "distance": cells(distance),
+        }
+
+        sketches = np.empty(size, dtype=object)
+        order = np.argsort(flat, kind="stable")
+        cell_ids, starts = np.unique(flat[order], return_index=True)
+        for cell, chunk in zip(cell_ids, np.split(values[order], starts[1:])):
+            sketches[cell] = KLLSketch(k, int(cell)).update(chunk)
+
+        return cls(levels, measures, sketches.reshape(shape), late_threshold, k)
+
+    # ======================
+    # INCREMENTAL UPDATES
+    # ======================
+
+    def _extend_levels(self, levels):
+        """Append unseen levels, padding every measure with empty cells."""
+        for axis, dim in enumerate(DIMENSIONS):
+            extra = [level for level in levels[dim] if level not in self.levels[dim]]
+            if not extra:
+                continue
+            self.levels[dim] = self.levels[dim] + extra
+            pad = [(0, 0)] * len(DIMENSIONS)
+            pad[axis] = (0, len(extra))
+            for name, cells in self.measures.items():
+                self.measures[name] = np.pad(cells, pad)
+            self.sketches = np.pad(self.sketches, pad, constant_values=None)
+        self.shape = tuple(len(self.levels[dim]) for dim in DIMENSIONS)
+
+    def merge(self, other):
+        """Add the cells of ``other`` into this cube in place."""
+        if other.late_threshold != self.late_threshold:
+            raise ValueError("Cannot merge cubes with different late thresholds")
+        self._extend_levels(other.levels)
+
+        positions = [
+            np.array([self.levels[dim].index(level) for level in other.levels[dim]],
+                     dtype=np.intp)
+            for dim in DIMENSIONS
+        ]
+        index = np.ix_(*positions)
+        mine, theirs = self.measures, other.measures
+        _, mine["mean"][index], mine["m2"][index] = _merge(
+            mine["count"][index], mine["mean"][index], mine["m2"][index],
+            theirs["count"], theirs["mean"], theirs["m2"],
+        )
+        for name in ADDITIVE:
+            mine[name][index] += theirs[name]
+
+        target = self.sketches[index]
+        for pos in zip(*np.nonzero(other.measures["count"])):
+            incoming = other.sketches[pos]
+            if target[pos] is None:
+                target[pos] = KLLSketch(self.k, [int(i) for i in pos]).merge(incoming)
+            else:
+                target[pos].merge(incoming)
+        self.sketches[index] = target
+        return self
+
+    def add(self, df, value_col=DELIVERY, distance_col=DISTANCE):
+        """Fold new orders into the cube in O(len(df))."""
+        if len(df) == 0:
+            return self
+        return self.merge(OrderCube.from_frame(
+            df, value_col, distance_col, self.late_threshold, self.k
+        ))
+
+    def values(self, dim):
+        """Sorted levels of ``dim`` that have at least one order."""
+        axis = DIMENSIONS.index(dim)
+        other = tuple(i for i in range(len(DIMENSIONS)) if i != axis)
+        present = self.measures["count"].sum(axis=other) > 0
+        return sorted(
+            level for level, seen in zip(self.levels[dim], present) if seen
+        )
+
+    def scope(self, **filters):
+        return CubeScope(self).where(**filters)
+
+
+class CubeScope:
+    """A set of cube cells selected by per-dimension filters."""
+
+    def __init__(self, cube, selection=None):
+        self.cube = cube
+        if selection is None:
+            selection = {
+                dim: np.ones(len(cube.levels[dim]), dtype=bool)
+                for dim in DIMENSIONS
+            }
+        self.selection = selection
+
+    # ======================
+    # NARROWING
+    # ======================
+
+    def where(self, **filters):
+        """Narrow the scope. Values may be a level, a list of levels, or "All"."""
+        selection = dict(self.selection)
+        for dim, value in filters.items():
+            if value is None or value == ALL:
+                continue
+            allowed = [value] if isinstance(value, str) else list(value)
+            keep = np.isin(self.cube.levels[dim], allowed)
+            selection[dim] = selection[dim] & keep
+        return CubeScope(self.cube, selection)
+
+    def _cells(self, name):
+        index = np.ix_(*[self.selection[dim] for dim in DIMENSIONS])
+        if name == "sketch":
+            return self.cube.sketches[index]
+        return self.cube.measures[name][index]
+
+    def _sketch(self, cells):
+        return KLLSketch.merged(
+            (s for s in np.ravel(cells) if s is not None), self.cube.k
+        )
+
+    # ======================
+    # SCALAR ROLL-UPS
+    # ======================
+
+    @property
+    def count(self):
+        return int(self._cells("count").sum())
+
+    @property
+    def mean(self):
+        n, mean, _ = self.moments()
+        return mean if n else math.nan
+
+    @property
+    def std(self):
+        n, _, m2 = self.moments()
+        return _std(n, m2)
+
+    @property
+    def late_rate(self):
+        n = self.count
+        return self._cells("late").sum() / n if n else math.nan
+
+    @property
+    def mean_distance(self):
+        n = self.count
+        return self._cells("distance").sum() / n if n else math.nan
+
+    def moments(self):
+        """``(count, mean, M2)`` of delivery times over the scope."""
+        n, mean, m2 = _rollup(self._cells("count"), self._cells("mean"), self._cells("m2"))
+        return int(n), float(mean), float(m2)
+
+    def sketch(self):
+        return self._sketch(self._cells("sketch"))
+
+    def quantile(self, q):
+        return self.sketch().quantile(q)
+
+    # ======================
+    # GROUPED ROLL-UPS
+    # ======================
+
+    def aggregate(self, by, stats=("mean", "median", "std", "count")):
+        """Per-group statistics for the non-empty groups of ``by``."""
+        by = [by] if isinstance(by, str) else list(by)
+        axes = [DIMENSIONS.index(dim) for dim in by]
+        front = list(range(len(axes)))
+        rest = tuple(range(len(axes), len(DIMENSIONS)))
+
+        def cells(name):
+            return np.moveaxis(self._cells(name), axes, front)
+
+        count, mean, m2 = _rollup(cells("count"), cells("mean"), cells("m2"), axis=rest)
+        sketches = np.moveaxis(self._cells("sketch"), axes, front)
+
+        group_levels = [
+            np.asarray(self.cube.levels[dim], dtype=object)[self.selection[dim]]
+            for dim in by
+        ]
+        rows, keys = [], []
+        for pos in zip(*np.nonzero(count)):
+            n = int(count[pos])
+            row = {"count": n, "mean": mean[pos]}
+            if "std" in stats:
+                row["std"] = _std(n, m2[pos])
+            if "median" in stats:
+                row["median"] = self._sketch(sketches[pos]).quantile(0.5)
+            rows.append([row[s] for s in stats])
+            keys.append(tuple(levels[i] for levels, i in zip(group_levels, pos)))
+
+        if len(by) == 1:
+            index = pd.Index([k[0] for k in keys], name=by[0])
+        else:
+            index = pd.MultiIndex.from_arrays(
+                [[k[i] for k in keys] for i in range(len(by))], names=by
+            )
+        return pd.DataFrame(rows, index=index, columns=list(stats))
+
+    def mean_by(self, by, name=DELIVERY):
+        return self.aggregate(by, stats=("mean",))["mean"].rename(name)
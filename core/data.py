@@ -0,0 +1,96 @@
+"""Columnar access to the order table.
+
+The final CSV is converted once into an Arrow IPC file that is memory-mapped
+on every read, so pages only materialize the columns they ask for and the
+categorical columns arrive as ``category`` dtype instead of object strings.
+"""
+
+import os
+
+import pandas as pd
+import pyarrow as pa
+
+from core.schema import (  # re-exported: modules import the schema from here
+    CATEGORICAL_COLUMNS, CATEGORY_LEVELS, DATA_DIR, DELIVERY, DISTANCE,
+    DISTANCE_PER_EXPERIENCE, EXPERIENCE, EXPERIENCE_CATEGORY, ORDER_ID,
+    PREP_TIME, TIME_OF_DAY, TRAFFIC, VEHICLE, WEATHER,
+)
+
+# ======================================================
+# PATHS
+# ======================================================
+
+FINAL_CSV = os.path.join(DATA_DIR, "Food_Delivery_Times_final.csv")
+FINAL_ARROW = os.path.join(DATA_DIR, "Food_Delivery_Times_final.arrow")
+
+
+# ======================================================
+# CONVERSION
+# ======================================================
+
+def to_categorical(df):
+    """Cast the categorical columns of ``df`` in place to their shared dtypes."""
+    for col, levels in CATEGORY_LEVELS.items():
+        if col not in df.columns:
+            continue
+        values = df[col].astype("object")
+        extra = sorted(set(values.dropna().unique()) - set(levels))
+        df[col] = pd.Categorical(values, categories=levels + extra)
+    return df
+
+
+def _is_stale(target, source):
+    if not os.path.exists(target):
+        return True
+    return os.path.getmtime(target) < os.path.getmtime(source)
+
+
+def _read_csv(csv_path):
+    df = pd.read_csv(csv_path)
+    df.columns = df.columns.str.strip()
+    return pa.Table.from_pandas(to_categorical(df), preserve_index=False)
+
+
+def build_arrow(csv_path=FINAL_CSV, arrow_path=FINAL_ARROW):
+    """Parse ``csv_path`` once and write it as an uncompressed Arrow IPC file."""
+    table = _read_csv(csv_path)
+
+    tmp_path = arrow_path + ".tmp"
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, arrow_path)
+    return arrow_path
+
+
+# ======================================================
+# READERS
+# ======================================================
+
+def load_order_table(columns=None, csv_path=FINAL_CSV, arrow_path=FINAL_ARROW):
+    """Return the order table as a memory-mapped ``pyarrow.Table``.
+
+    The Arrow file is rebuilt whenever the CSV is newer. If the data
+    directory is read-only the CSV is parsed directly instead.
+    """
+    if _is_stale(arrow_path, csv_path):
+        try:
+            build_arrow(csv_path, arrow_path)
+        except OSError:
+            table = _read_csv(csv_path)
+            return table.select(columns) if columns else table
+
+    with pa.memory_map(arrow_path) as source:
+        table = pa.ipc.open_file(source).read_all()
+    return table.select(columns) if columns else table
+
+
+def is_mapped(csv_path=FINAL_CSV, arrow_path=FINAL_ARROW):
+    """Whether ``load_order_table`` maps the Arrow file rather than parsing the CSV."""
+    return not _is_stale(arrow_path, csv_path)
+
+
+def load_orders(columns=None, csv_path=FINAL_CSV, arrow_path=FINAL_ARROW):
+    """Return the requested columns of the order table as a DataFrame."""
+    table = load_order_table(columns, csv_path, arrow_path)
+    return table.to_pandas()
@@ -0,0 +1,437 @@
+"""Feature drift monitoring for live model inputs.
+
+``DriftReference.fit`` summarizes the training order table once: fixed-bin
+histograms for the numeric inputs and level counts for the categorical
+ones. Numeric bins are the reference deciles, deduplicated for
+integer-valued columns, with open outer bins so every value lands
+somewhere. Categorical counts keep one extra slot for levels the reference
+never saw.
+
+A reference belongs to one model: it records the fingerprint of the model
+whose training data it summarizes. ``load_reference`` refits from the order
+table when the saved one was made for a different model, and
+``core.retrain`` writes the reference of every model it publishes (the
+parent's counts plus the new training orders, over the same bins).
+
+``DriftMonitor`` keeps the same counters for live orders. ``observe`` takes
+one order: a bisect or dict lookup and an increment per input.
+``observe_columns`` takes a batch: one ``searchsorted`` + ``bincount`` per
+input. No raw values are kept, so memory is constant, and the statistics
+are computed from the counters on demand:
+
+* PSI for every input
+* KS for numeric inputs: the largest CDF gap over the bin edges, which is
+  exact for integer columns and a lower bound otherwise, with its
+  asymptotic p-value
+* chi-square goodness of fit of the live level counts against the
+  reference frequencies for categorical inputs
+
+The ETA service (``core.serving``) feeds every scored batch to a monitor,
+serves the live report on ``GET /drift`` and publishes it to
+``DRIFT_REPORT_PATH``, which the Model Intelligence page shows.
+
+Usage:
+    python -m core.drift reference
+    python -m core.drift report new_orders.parquet
+    python -m core.drift report --order-log
+    python -m core.drift bench
+"""
+
+import argparse
+import bisect
+import json
+import math
+import os
+import threading
+import time
+
+import numpy as np
+
+from core.artifact import MODEL_PATH, model_fingerprint
+from core.features import distance_per_experience, experience_category
+from core.schema import (
+    DATA_DIR, DISTANCE, DISTANCE_PER_EXPERIENCE, EXPERIENCE, EXPERIENCE_CATEGORY,
+    PREP_TIME, TIME_OF_DAY, TRAFFIC, VEHICLE, WEATHER,
+)
+
+REFERENCE_PATH = os.path.join(DATA_DIR, "drift_reference.json")
+DRIFT_REPORT_PATH = os.path.join(DATA_DIR, "drift_report.json")
+
+NUMERIC_INPUTS = [DISTANCE, PREP_TIME, EXPERIENCE, DISTANCE_PER_EXPERIENCE]
+CATEGORICAL_INPUTS = [WEATHER, TRAFFIC, TIME_OF_DAY, VEHICLE, EXPERIENCE_CATEGORY]
+
+DEFAULT_BINS = 10
+
+# Conventional PSI bands
+PSI_MODERATE = 0.1
+PSI_SIGNIFICANT = 0.25
+# Below this many live orders the statistics are reported but not judged
+MIN_LIVE_ORDERS = 100
+# Floor for empty bins, so PSI stays finite
+_EPS = 1e-4
+
+
+def _with_derived(columns, n):
+    if EXPERIENCE_CATEGORY not in columns:
+        columns[EXPERIENCE_CATEGORY] = np.broadcast_to(
+            experience_category(np.asarray(columns[EXPERIENCE], dtype=float)), (n,)
+        )
+    if DISTANCE_PER_EXPERIENCE not in columns:
+        columns[DISTANCE_PER_EXPERIENCE] = distance_per_experience(
+            np.asarray(columns[DISTANCE], dtype=float),
+            np.asarray(columns[EXPERIENCE], dtype=float),
+        )
+    return columns
+
+
+def _frequencies(counts):
+    counts = np.asarray(counts, dtype=float)
+    p = np.maximum(counts / max(counts.sum(), 1.0), _EPS)
+    return p / p.sum()
+
+
+def psi(reference, live):
+    """Population stability index between two count vectors over the same bins."""
+    p, q = _frequencies(reference), _frequencies(live)
+    return float(((q - p) * np.log(q / p)).sum())
+
+
+def binned_ks(reference, live):
+    """``(statistic, p-value)`` of the two-sample KS test on binned counts."""
+    from scipy import stats
+
+    reference = np.asarray(reference, dtype=float)
+    live = np.asarray(live, dtype=float)
+    n, m = reference.sum(), live.sum()
+    if not n or not m:
+        return 0.0, 1.0
+    d = float(np.abs(np.cumsum(reference) / n - np.cumsum(live) / m).max())
+    return d, float(stats.kstwobign.sf(d * math.sqrt(n * m / (n + m))))
+
+
+def chi_square(reference, live):
+    """``(statistic, p-value, dof)`` of live level counts vs reference frequencies."""
+    from scipy import stats
+
+    reference = np.asarray(reference, dtype=float)
+    live = np.asarray(live, dtype=float)
+    seen = (reference > 0) | (live > 0)
+    if seen.sum() < 2 or not live.sum():
+        return 0.0, 1.0, 0
+    expected = _frequencies(reference[seen]) * live.sum()
+    statistic, p_value = stats.chisquare(live[seen], expected)
+    return float(statistic), float(p_value), int(seen.sum() - 1)
+
+
+class DriftReference:
+
+    def __init__(self, edges, levels, counts, n, fingerprint=None):
+        # Numeric input -> inner bin edges; bin i holds edges[i-1] <= x < edges[i]
+        self.edges = {col: [float(e) for e in edges[col]] for col in edges}
+        # Categorical input -> known levels; counts carry one more "other" slot
+        self.levels = {col: list(levels[col]) for col in levels}
+        self.counts = {col: np.asarray(c, dtype=np.int64) for col, c in counts.items()}
+        self.n = n
+        # SHA-256 of the model file whose training data this summarizes
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def fit(cls, df, bins=DEFAULT_BINS, fingerprint=None):
+        columns = _with_derived({c: df[c].to_numpy() for c in df.columns}, len(df))
+        edges, levels, counts = {}, {}, {}
+        for col in NUMERIC_INPUTS:
+            values = np.asarray(columns[col], dtype=float)
+            edges[col] = np.unique(np.quantile(values, np.linspace(0, 1, bins + 1)[1:-1]))
+        for col in CATEGORICAL_INPUTS:
+            levels[col] = sorted(set(map(str, columns[col])))
+        reference = cls(edges, levels, {}, 0, fingerprint)
+        reference.counts = count_columns(reference, columns, len(df))
+        reference.n = len(df)
+        return reference
+
+    def extended(self, df, fingerprint):
+        """Reference for a model further trained on ``df``: same bins, counts added."""
+        columns = _with_derived({c: df[c].to_numpy() for c in df.columns}, len(df))
+        batch = count_columns(self, columns, len(df))
+        counts = {col: self.counts[col] + batch[col] for col in self.counts}
+        return DriftReference(self.edges, self.levels, counts, self.n + len(df), fingerprint)
+
+    def to_dict(self):
+        return {
+            "fingerprint": self.fingerprint,
+            "n": self.n,
+            "edges": self.edges,
+            "levels": self.levels,
+            "counts": {col: c.tolist() for col, c in self.counts.items()},
+        }
+
+    def save(self, path=REFERENCE_PATH):
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path=REFERENCE_PATH):
+        with open(path) as f:
+            return cls(**json.load(f))
+
+
+def load_reference(model_path=MODEL_PATH, path=REFERENCE_PATH):
+    """Saved reference for the current model, refitted if missing or made for another."""
+    fingerprint = model_fingerprint(model_path)
+    if os.path.exists(path):
+        reference = DriftReference.load(path)
+        if reference.fingerprint == fingerprint:
+            return reference
+
+    from core.data import load_orders
+
+    reference = DriftReference.fit(load_orders(), fingerprint=fingerprint)
+    reference.save(path)
+    return reference
+
+
+def count_columns(reference, columns, n):
+    """Counters over ``reference``'s bins for a batch of column arrays."""
+    counts = {}
+    for col, edges in reference.edges.items():
+        values = np.broadcast_to(np.asarray(columns[col], dtype=float), (n,))
+        bins = np.searchsorted(edges, values, side="right")
+        counts[col] = np.bincount(bins, minlength=len(edges) + 1)
+    for col, levels in reference.levels.items():
+        values, freq = np.unique(np.broadcast_to(np.asarray(columns[col], dtype=str), (n,)),
+                                 return_counts=True)
+        index = {level: i for i, level in enumerate(levels)}
+        counts[col] = np.zeros(len(levels) + 1, dtype=np.int64)
+        for value, count in zip(values, freq):
+            counts[col][index.get(value, len(levels))] += count
+    return counts
+
+
+class DriftMonitor:
+    """Live counters over a reference's bins, updated per order or per batch."""
+
+    def __init__(self, reference):
+        self.reference = reference
+        self._index = {
+            col: {level: i for i, level in enumerate(levels)}
+            for col, levels in reference.levels.items()
+        }
+        self._lock = threading.Lock()
+        self.reset()
+
+    def use(self, reference):
+        """Switch to another model's reference; live counts start over."""
+        with self._lock:
+            self.reference = reference
+            self._index = {
+                col: {level: i for i, level in enumerate(levels)}
+                for col, levels in reference.levels.items()
+            }
+            self.counts = {col: [0] * len(c) for col, c in reference.counts.items()}
+            self.n = 0
+
+    def reset(self):
+        with self._lock:
+            # Plain lists: a scalar increment is much cheaper than on an ndarray
+            self.counts = {col: [0] * len(c) for col, c in self.reference.counts.items()}
+            self.n = 0
+
+    def observe(self, order):
+        """Count one order (a mapping of raw inputs, plus any engineered ones it supplies)."""
+        category = order.get(EXPERIENCE_CATEGORY)
+        if category is None:
+            category = str(experience_category(order[EXPERIENCE]))
+        ratio = order.get(DISTANCE_PER_EXPERIENCE)
+        if ratio is None:
+            ratio = float(distance_per_experience(float(order[DISTANCE]), order[EXPERIENCE]))
+
+        with self._lock:
+            for col, edges in self.reference.edges.items():
+                value = ratio if col == DISTANCE_PER_EXPERIENCE else order[col]
+                self.counts[col][bisect.bisect_right(edges, value)] += 1
+            for col, index in self._index.items():
+                value = category if col == EXPERIENCE_CATEGORY else order[col]
+                self.counts[col][index.get(value, len(index))] += 1
+            self.n += 1
+
+    def observe_columns(self, columns, n):
+        """Count a batch given as column arrays (scalars broadcast to ``n`` rows)."""
+        reference = self.reference
+        counts = count_columns(reference, _with_derived(dict(columns), n), n)
+        with self._lock:
+            if self.reference is not reference:
+                return  # counted against a reference that was swapped out meanwhile
+            for col, batch in counts.items():
+                live = self.counts[col]
+                for i, count in enumerate(batch.tolist()):
+                    live[i] += count
+            self.n += n
+
+    def observe_orders(self, orders):
+        """Count a scored batch; engineered inputs an order supplies are what
+        the model scored, so they are counted instead of derived again."""
+        n = len(orders)
+        columns = {
+            col: [order[col] for order in orders]
+            for col in (DISTANCE, PREP_TIME, EXPERIENCE, WEATHER, TRAFFIC, TIME_OF_DAY, VEHICLE)
+        }
+        engineered = (EXPERIENCE_CATEGORY, DISTANCE_PER_EXPERIENCE)
+        if any(col in order for order in orders for col in engineered):
+            derived = _with_derived(dict(columns), n)
+            for col in engineered:
+                columns[col] = [
+                    order.get(col, value) for order, value in zip(orders, derived[col].tolist())
+                ]
+        self.observe_columns(columns, n)
+
+    # ======================
+    # REPORT
+    # ======================
+
+    def report(self):
+        with self._lock:
+            counts = {col: np.array(c) for col, c in self.counts.items()}
+            n = self.n
+
+        inputs = {}
+        for col, live in counts.items():
+            reference = self.reference.counts[col]
+            entry = {"psi": psi(reference, live)}
+            if col in self.reference.edges:
+                entry["test"] = "ks"
+                entry["statistic"], entry["p_value"] = binned_ks(reference, live)
+            else:
+                entry["test"] = "chi2"
+                entry["statistic"], entry["p_value"], entry["dof"] = chi_square(reference, live)
+                entry["unseen_share"] = float(live[-1] / n) if n else 0.0
+            entry["status"] = _status(entry["psi"], n)
+            inputs[col] = entry
+
+        return {
+            "generated": time.time(),
+            "live_orders": n,
+            "reference_orders": self.reference.n,
+            "model": (self.reference.fingerprint or "")[:12],
+            "max_psi": max(entry["psi"] for entry in inputs.values()),
+            "drifted": [col for col, entry in inputs.items() if entry["status"] == "significant"],
+            "inputs": inputs,
+        }
+
+
+def _status(value, n):
+    if n < MIN_LIVE_ORDERS:
+        return "insufficient data"
+    if value >= PSI_SIGNIFICANT:
+        return "significant"
+    if value >= PSI_MODERATE:
+        return "moderate"
+    return "stable"
+
+
+def write_report(report, path=DRIFT_REPORT_PATH):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp, path)
+
+
+def read_report(path=DRIFT_REPORT_PATH):
+    with open(path) as f:
+        return json.load(f)
+
+
+# ======================================================
+# CLI
+# ======================================================
+
+def bench(orders=20_000, batch=256):
+    """Per-order cost of the monitor next to a cached single-order prediction."""
+    from core.data import load_orders
+    from core.predcache import CachedPredictor
+
+    reference = load_reference()
+    sample = load_orders().sample(orders, replace=True, random_state=0)
+    rows = sample[[DISTANCE, PREP_TIME, EXPERIENCE, WEATHER, TRAFFIC, TIME_OF_DAY, VEHICLE]]
+    rows = rows.astype({c: object for c in (WEATHER, TRAFFIC, TIME_OF_DAY, VEHICLE)})
+    rows = rows.to_dict("records")
+
+    monitor = DriftMonitor(reference)
+    start = time.perf_counter()
+    for order in rows:
+        monitor.observe(order)
+    single = (time.perf_counter() - start) / orders
+
+    monitor.reset()
+    start = time.perf_counter()
+    for i in range(0, orders, batch):
+        monitor.observe_orders(rows[i:i + batch])
+    batched = (time.perf_counter() - start) / orders
+
+    predictor = CachedPredictor()
+    predictor.predict_one(rows[0])
+    start = time.perf_counter()
+    for order in rows[:2000]:
+        predictor.model.predict_one(order)
+    predict = (time.perf_counter() - start) / 2000
+    return {"observe_us": single * 1e6, "observe_batched_us": batched * 1e6,
+            "predict_one_us": predict * 1e6}
+
+
+def _print_report(report):
+    print(f"{report['live_orders']:,} live orders vs {report['reference_orders']:,} reference")
+    for col, entry in report["inputs"].items():
+        print(f"  {col:28s} PSI {entry['psi']:6.3f}  {entry['test']:4s} "
+              f"{entry['statistic']:9.3f}  p={entry['p_value']:.3g}  {entry['status']}")
+
+
+def main():
+    from core.data import load_orders
+
+    parser = argparse.ArgumentParser(description="Feature drift reference, reports and overhead")
+    sub = parser.add_subparsers(dest="command", required=True)
+    ref_cmd = sub.add_parser("reference", help="fit the reference from the order table")
+    ref_cmd.add_argument("--model", default=MODEL_PATH)
+    ref_cmd.add_argument("--bins", type=int, default=DEFAULT_BINS)
+    ref_cmd.add_argument("--output", default=REFERENCE_PATH)
+    report_cmd = sub.add_parser("report", help="drift of an order batch vs the reference")
+    report_cmd.add_argument("inputs", nargs="*", help="CSV/Parquet files of orders")
+    report_cmd.add_argument("--order-log", nargs="?", const="", default=None, metavar="DIR")
+    report_cmd.add_argument("--output", default=DRIFT_REPORT_PATH)
+    bench_cmd = sub.add_parser("bench", help="per-order monitoring overhead")
+    bench_cmd.add_argument("--orders", type=int, default=20_000)
+    args = parser.parse_args()
+
+    if args.command == "reference":
+        reference = DriftReference.fit(load_orders(), args.bins,
+                                       fingerprint=model_fingerprint(args.model))
+        reference.save(args.output)
+        print(f"Reference for model {reference.fingerprint[:12]} from {reference.n:,} orders "
+              f"-> {args.output}")
+    elif args.command == "report":
+        if args.order_log is not None:
+            from core.orderlog import ORDER_LOG_DIR, OrderLog
+
+            df = OrderLog(args.order_log or ORDER_LOG_DIR).read().to_pandas()
+        elif args.inputs:
+            from core.retrain import orders_from_files
+
+            df = orders_from_files(args.inputs)
+        else:
+            report_cmd.error("give input files or --order-log")
+        monitor = DriftMonitor(load_reference())
+        monitor.observe_columns({c: df[c].to_numpy() for c in df.columns}, len(df))
+        report = monitor.report()
+        write_report(report, args.output)
+        _print_report(report)
+        print(f"-> {args.output}")
+    else:
+        result = bench(args.orders)
+        print(f"observe (single)   {result['observe_us']:7.2f} us/order")
+        print(f"observe (batched)  {result['observe_batched_us']:7.2f} us/order")
+        print(f"predict_one        {result['predict_one_us']:7.2f} us/order")
+
+
+if __name__ == "__main__":
+    main()
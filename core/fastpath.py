@@ -0,0 +1,188 @@
+"""Compiled inference path for the ETA pipeline, without pandas or sklearn.
+
+``CompiledPipeline.from_pipeline`` reads the fitted ColumnTransformer once:
+ordinal vocabularies, one-hot vocabularies (minus the dropped level) and
+the scaler's mean/scale. Orders are then written straight into a NumPy
+matrix laid out exactly like the transformer's output and handed to the
+XGBoost regressor, so predictions are identical to ``pipeline.predict``
+while skipping the per-call DataFrame construction, column reordering and
+transformer dispatch that dominate the cost of predicting a single order.
+
+Only the transformer types the model uses are supported; ``from_pipeline``
+raises ``TypeError`` for anything else so callers can fall back to the
+full pipeline.
+"""
+
+import threading
+
+import numpy as np
+
+from core.features import distance_per_experience, experience_category
+from core.schema import DISTANCE, DISTANCE_PER_EXPERIENCE, EXPERIENCE, EXPERIENCE_CATEGORY
+
+
+class CompiledPipeline:
+
+    def __init__(self, width, ordinal, onehot, scaled, regressor):
+        self.width = width
+        # (column, {level: code}, unknown code, output index)
+        self.ordinal = ordinal
+        # (column, {level: output index}); dropped levels are absent
+        self.onehot = onehot
+        # (column, mean, scale, output index)
+        self.scaled = scaled
+        self.regressor = regressor
+        self.inputs = [c for c, *_ in ordinal] + [c for c, _ in onehot] + [c for c, *_ in scaled]
+        self._local = threading.local()
+
+    @classmethod
+    def from_pipeline(cls, pipeline):
+        # Only needed to compile a fitted pipeline, not to run a compiled one
+        from sklearn.preprocessing import OneHotEncoder, OrdinalEncoder, StandardScaler
+
+        preprocessor = pipeline.named_steps["preprocessor"]
+        ordinal, onehot, scaled = [], [], []
+        offset = 0
+        for name, transformer, columns in preprocessor.transformers_:
+            if isinstance(transformer, str) and transformer == "drop":
+                continue
+            if isinstance(transformer, OrdinalEncoder):
+                unknown = (
+                    transformer.unknown_value
+                    if transformer.handle_unknown == "use_encoded_value" else np.nan
+                )
+                for column, levels in zip(columns, transformer.categories_):
+                    codes = {level: float(code) for code, level in enumerate(levels)}
+                    ordinal.append((column, codes, float(unknown), offset))
+                    offset += 1
+            elif isinstance(transformer, OneHotEncoder):
+                drop = transformer.drop_idx_
+                for i, (column, levels) in enumerate(zip(columns, transformer.categories_)):
+                    kept = [
+                        level for j, level in enumerate(levels)
+                        if drop is None or drop[i] is None or j != drop[i]
+                    ]
+                    onehot.append((column, {level: offset + j for j, level in enumerate(kept)}))
+                    offset += len(kept)
+            elif isinstance(transformer, StandardScaler):
+                mean = transformer.mean_ if transformer.with_mean else np.zeros(len(columns))
+                scale = transformer.scale_ if transformer.with_std else np.ones(len(columns))
+                for column, m, s in zip(columns, mean, scale):
+                    scaled.append((column, float(m), float(s), offset))
+                    offset += 1
+            else:
+                raise TypeError(f"unsupported transformer {name!r}: {type(transformer).__name__}")
+
+        if offset != len(preprocessor.get_feature_names_out()):
+            raise TypeError("compiled layout does not match the transformer output")
+        return cls(offset, ordinal, onehot, scaled, pipeline.named_steps["model"])
+
+    def to_spec(self):
+        """JSON-serializable preprocessing spec (see ``core.artifact``)."""
+        return {
+            "width": self.width,
+            "ordinal": [
+                {"column": c, "levels": list(codes), "unknown": u, "index": i}
+                for c, codes, u, i in self.ordinal
+            ],
+            "onehot": [
+                {"column": c, "levels": list(index), "indices": list(index.values())}
+                for c, index in self.onehot
+            ],
+            "scaled": [
+                {"column": c, "mean": m, "scale": s, "index": i}
+                for c, m, s, i in self.scaled
+            ],
+        }
+
+    @classmethod
+    def from_spec(cls, spec, regressor):
+        return cls(
+            spec["width"],
+            [
+                (o["column"], {level: float(code) for code, level in enumerate(o["levels"])},
+                 float(o["unknown"]), o["index"])
+                for o in spec["ordinal"]
+            ],
+            [(o["column"], dict(zip(o["levels"], o["indices"]))) for o in spec["onehot"]],
+            [(o["column"], o["mean"], o["scale"], o["index"]) for o in spec["scaled"]],
+            regressor,
+        )
+
+    # ======================
+    # FEATURES
+    # ======================
+
+    def _with_derived(self, order):
+        if EXPERIENCE_CATEGORY not in order:
+            order = {**order, EXPERIENCE_CATEGORY: str(experience_category(order[EXPERIENCE]))}
+        if DISTANCE_PER_EXPERIENCE not in order:
+            ratio = distance_per_experience(np.float64(order[DISTANCE]), order[EXPERIENCE])
+            order = {**order, DISTANCE_PER_EXPERIENCE: float(ratio)}
+        return order
+
+    def fill(self, row, order):
+        """Write one order (a mapping of raw inputs) into feature row ``row``."""
+        order = self._with_derived(order)
+        row[:] = 0.0
+        for column, codes, unknown, i in self.ordinal:
+            row[i] = codes.get(order[column], unknown)
+        for column, index in self.onehot:
+            i = index.get(order[column])
+            if i is not None:
+                row[i] = 1.0
+        for column, mean, scale, i in self.scaled:
+            row[i] = (order[column] - mean) / scale
+        return row
+
+    def transform(self, orders, out=None):
+        """Feature matrix for a sequence of order mappings."""
+        out = np.empty((len(orders), self.width)) if out is None else out
+        for row, order in zip(out, orders):
+            self.fill(row, order)
+        return out
+
+    def transform_columns(self, columns, n=None):
+        """Feature matrix from column arrays; scalars broadcast to ``n`` rows."""
+        if n is None:
+            n = max(np.size(v) for v in columns.values())
+        columns = {k: np.broadcast_to(np.asarray(v), (n,)) for k, v in columns.items()}
+        if EXPERIENCE_CATEGORY not in columns:
+            columns[EXPERIENCE_CATEGORY] = experience_category(columns[EXPERIENCE])
+        if DISTANCE_PER_EXPERIENCE not in columns:
+            columns[DISTANCE_PER_EXPERIENCE] = distance_per_experience(
+                columns[DISTANCE].astype(float), columns[EXPERIENCE]
+            )
+
+        out = np.zeros((n, self.width))
+        for column, codes, unknown, i in self.ordinal:
+            values = columns[column]
+            out[:, i] = unknown
+            for level, code in codes.items():
+                out[values == level, i] = code
+        for column, index in self.onehot:
+            values = columns[column]
+            for level, i in index.items():
+                out[:, i] = values == level
+        for column, mean, scale, i in self.scaled:
+            out[:, i] = (columns[column].astype(float) - mean) / scale
+        return out
+
+    # ======================
+    # PREDICTION
+    # ======================
+
+    def predict(self, features):
+        return self.regressor.predict(features)
+
+    def predict_one(self, order):
+        # One preallocated row per thread: Streamlit sessions share the
+        # cached model across script threads.
+        row = getattr(self._local, "row", None)
+        if row is None:
+            row = self._local.row = np.empty((1, self.width))
+        self.fill(row[0], order)
+        return float(self.predict(row)[0])
+
+    def predict_orders(self, orders):
+        return self.predict(self.transform(orders))
@@ -0,0 +1,21 @@
+"""Engineered model inputs, on plain NumPy arrays or scalars.
+
+The training definitions shared by the offline pipeline (which wraps them
+for pandas Series) and the compiled inference path.
+"""
+
+import numpy as np
+
+
+def experience_category(years):
+    return np.select(
+        [np.less(years, 1), np.less(years, 4)],
+        ["Newbie", "Intermediate"],
+        default="Expert",
+    )
+
+
+def distance_per_experience(distance, years):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.divide(distance, years, dtype=float)
+    return np.where(np.isfinite(ratio), ratio, 0.0)
@@ -0,0 +1,102 @@
+"""Summed-area table for "row key >= a and column key <= b" range queries.
+
+Orders are binned into a 2D grid of additive measures. Prefix sums are taken
+along the columns and suffix sums along the rows, so both the totals of any
+``rows >= a, cols <= b`` rectangle and its per-row breakdown are single
+array lookups, whatever the number of orders.
+
+Histogram measures add a third axis of value bins; their row suffix sums
+give the per-column histogram of any rectangle (e.g. a density plot) with
+a payload bounded by the number of bins, not by the number of orders.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class PrefixGrid:
+
+    def __init__(self, row_keys, col_keys, row_prefix, rect, histograms=None):
+        self.row_keys = row_keys
+        self.col_keys = col_keys
+        self.row_prefix = row_prefix
+        self.rect = rect
+        self.histograms = histograms or {}
+
+    @classmethod
+    def from_arrays(cls, rows, cols, measures, histograms=None):
+        """Bin ``measures`` (name -> array aligned with ``rows``) by (row, col) key.
+
+        ``histograms`` maps a name to ``(values, bin_edges)``.
+        """
+        rows = np.asarray(rows, dtype=float)
+        cols = np.asarray(cols, dtype=float)
+        row_keys, r = np.unique(rows, return_inverse=True)
+        col_keys, c = np.unique(cols, return_inverse=True)
+        shape = (len(row_keys), len(col_keys))
+        flat = np.ravel_multi_index((r, c), shape)
+
+        measures = {"count": np.ones(len(rows)), **measures}
+        row_prefix, rect = {}, {}
+        for name, values in measures.items():
+            cells = np.bincount(
+                flat, weights=np.asarray(values, dtype=float),
+                minlength=shape[0] * shape[1],
+            ).reshape(shape)
+
+            # row_prefix[i, j]: row i, columns < j
+            prefix = np.zeros((shape[0], shape[1] + 1))
+            prefix[:, 1:] = np.cumsum(cells, axis=1)
+            row_prefix[name] = prefix
+
+            # rect[i, j]: rows >= i, columns < j
+            suffix = np.zeros((shape[0] + 1, shape[1] + 1))
+            suffix[:-1] = np.cumsum(prefix[::-1], axis=0)[::-1]
+            rect[name] = suffix
+
+        hist_rect = {}
+        for name, (values, edges) in (histograms or {}).items():
+            bins = np.clip(np.searchsorted(edges, values, side="right") - 1,
+                           0, len(edges) - 2)
+            cells = np.bincount(
+                np.ravel_multi_index((r, c, bins), shape + (len(edges) - 1,)),
+                minlength=shape[0] * shape[1] * (len(edges) - 1),
+            ).reshape(shape + (len(edges) - 1,))
+
+            # suffix[i, col, bin]: rows >= i
+            suffix = np.zeros((shape[0] + 1,) + cells.shape[1:], dtype=np.int64)
+            suffix[:-1] = np.cumsum(cells[::-1], axis=0)[::-1]
+            hist_rect[name] = (suffix, np.asarray(edges, dtype=float))
+
+        return cls(row_keys, col_keys, row_prefix, rect, hist_rect)
+
+    def _bounds(self, row_min, col_max):
+        i = 0 if row_min is None else np.searchsorted(self.row_keys, row_min, side="left")
+        j = len(self.col_keys) if col_max is None else np.searchsorted(
+            self.col_keys, col_max, side="right"
+        )
+        return int(i), int(j)
+
+    def totals(self, row_min=None, col_max=None):
+        """Measure sums over rows >= ``row_min`` and columns <= ``col_max``."""
+        i, j = self._bounds(row_min, col_max)
+        return {name: float(table[i, j]) for name, table in self.rect.items()}
+
+    def by_row(self, row_min=None, col_max=None, name="row"):
+        """Per-row measure sums of the same rectangle, non-empty rows only."""
+        i, j = self._bounds(row_min, col_max)
+        frame = pd.DataFrame(
+            {m: table[i:, j] for m, table in self.row_prefix.items()},
+            index=pd.Index(self.row_keys[i:], name=name),
+        )
+        return frame[frame["count"] > 0]
+
+    def histogram(self, name, row_min=None, col_max=None):
+        """Per-column value histogram of the rectangle.
+
+        Returns ``(col_keys, bin_edges, counts)`` with ``counts`` shaped
+        ``(columns, bins)``.
+        """
+        i, j = self._bounds(row_min, col_max)
+        suffix, edges = self.histograms[name]
+        return self.col_keys[:j], edges, suffix[i, :j]
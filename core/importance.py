@@ -0,0 +1,161 @@
+"""Feature importance of the deployed ETA model, per input column.
+
+Three views of the fitted booster:
+
+* gain  - total loss reduction of the splits on a feature
+* cover - total training weight routed through those splits
+* SHAP  - mean absolute TreeSHAP contribution over the order table, from
+  XGBoost's native ``pred_contribs`` (exact for trees, no extra package)
+
+The booster sees the ColumnTransformer's output, where each one-hot column
+is split into one feature per kept level. Output features are mapped back
+to the input column they came from through the compiled layout
+(``core.fastpath``). Gain and cover are summed over splits. SHAP values are
+additive per row, so a column's contribution to one ETA is the sum over its
+levels; the mean of its absolute value is reported.
+
+Contributions are computed in batches of ``batch_size`` orders, so memory is
+bounded by the batch, not the table. Results are cached as JSON under
+``IMPORTANCE_DIR`` keyed by the model fingerprint and computed once per
+model file.
+
+Usage:
+    python -m core.importance
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+from core.data import DATA_DIR, load_orders
+from core.fastpath import CompiledPipeline
+from core.model import MODEL_PATH, load_model, model_fingerprint, prepare_features
+
+IMPORTANCE_DIR = os.path.join(DATA_DIR, "importance")
+
+DEFAULT_BATCH = 4096
+
+METRICS = ["gain", "cover", "shap"]
+
+
+def source_columns(compiled):
+    """Input column of every transformer output feature, in output order."""
+    sources = [None] * compiled.width
+    for column, _, _, i in compiled.ordinal:
+        sources[i] = column
+    for column, index in compiled.onehot:
+        for i in index.values():
+            sources[i] = column
+    for column, _, _, i in compiled.scaled:
+        sources[i] = column
+    return sources
+
+
+def compute(pipeline, df, batch_size=DEFAULT_BATCH):
+    """Importance per input column of ``pipeline`` over the orders in ``df``.
+
+    Returns a DataFrame indexed by the pipeline's input columns with raw
+    ``gain``, ``cover`` and ``shap`` (mean |contribution|, minutes), sorted
+    by SHAP.
+    """
+    columns = list(pipeline.feature_names_in_)
+    sources = source_columns(CompiledPipeline.from_pipeline(pipeline))
+    booster = pipeline.named_steps["model"].get_booster()
+    names = booster.feature_names or [f"f{i}" for i in range(len(sources))]
+
+    # (output feature x input column) membership, for summing levels
+    group = np.zeros((len(sources), len(columns)))
+    for i, column in enumerate(sources):
+        group[i, columns.index(column)] = 1.0
+
+    frame = pd.DataFrame(0.0, index=columns, columns=METRICS)
+    for metric, kind in (("gain", "total_gain"), ("cover", "total_cover")):
+        score = booster.get_score(importance_type=kind)
+        frame[metric] = np.array([score.get(name, 0.0) for name in names]) @ group
+
+    features = prepare_features(df, columns)
+    preprocessor = pipeline.named_steps["preprocessor"]
+    total = np.zeros(len(columns))
+    for start in range(0, len(features), batch_size):
+        X = preprocessor.transform(features.iloc[start:start + batch_size])
+        contribs = booster.predict(xgb.DMatrix(X, feature_names=booster.feature_names),
+                                   pred_contribs=True)
+        # Last column is the bias term
+        total += np.abs(contribs[:, :-1] @ group).sum(axis=0)
+    frame["shap"] = total / max(len(features), 1)
+
+    return frame.sort_values("shap", ascending=False)
+
+
+def shares(frame):
+    """Each metric as a fraction of its column total."""
+    return frame[METRICS] / frame[METRICS].sum().replace(0.0, 1.0)
+
+
+# ======================
+# PERSISTENCE
+# ======================
+
+def importance_path(fingerprint, directory=IMPORTANCE_DIR):
+    return os.path.join(directory, f"{fingerprint}.json")
+
+
+def save_importance(frame, fingerprint, n, directory=IMPORTANCE_DIR):
+    os.makedirs(directory, exist_ok=True)
+    path = importance_path(fingerprint, directory)
+    payload = {
+        "fingerprint": fingerprint,
+        "n": n,
+        "columns": frame.index.tolist(),
+        **{metric: frame[metric].tolist() for metric in METRICS},
+    }
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(payload, f, indent=2)
+    os.replace(tmp, path)
+    return path
+
+
+def read_importance(path):
+    with open(path) as f:
+        payload = json.load(f)
+    return pd.DataFrame({metric: payload[metric] for metric in METRICS},
+                        index=pd.Index(payload["columns"], name="feature"))
+
+
+def load_importance(model_path=MODEL_PATH, directory=IMPORTANCE_DIR, fingerprint=None):
+    """Cached importance for the current model, computing it on first use."""
+    fingerprint = fingerprint or model_fingerprint(model_path)
+    path = importance_path(fingerprint, directory)
+    if not os.path.exists(path):
+        df = load_orders()
+        save_importance(compute(load_model(model_path), df), fingerprint, len(df), directory)
+    return read_importance(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute feature importance for the ETA model")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--output-dir", default=IMPORTANCE_DIR)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH)
+    args = parser.parse_args()
+
+    df = load_orders()
+    start = time.perf_counter()
+    frame = compute(load_model(args.model), df, args.batch_size)
+    elapsed = time.perf_counter() - start
+    path = save_importance(frame, model_fingerprint(args.model), len(df), args.output_dir)
+
+    print(f"Importance over {len(df):,} orders in {elapsed:.2f}s -> {path}")
+    table = frame.join(shares(frame), rsuffix="_share")
+    print(table.round({"gain": 0, "cover": 0, "shap": 3,
+                       "gain_share": 3, "cover_share": 3, "shap_share": 3}).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Conformal prediction intervals for the ETA model.
+
+Calibration is cross-conformal: the deployed pipeline's configuration is
+refit on K folds of the order data and each fold's held-out absolute
+residuals become the nonconformity scores. Those scores come from models
+that never saw the rows they score, so they are slightly pessimistic for
+the deployed model and the coverage is, if anything, conservative.
+
+Scores are grouped by predicted ETA (Mondrian bins on the out-of-fold
+predictions), because slow deliveries are also the least predictable. At
+request time an interval is ``eta +/- width[bin(eta)]``: one vectorized
+lookup on the point estimates of a batch, no further model calls.
+
+Usage:
+    python -m core.intervals --coverage 0.9
+"""
+
+import argparse
+import json
+import math
+import os
+
+import numpy as np
+
+from core.model import MODEL_PATH, load_model, model_fingerprint, prepare_features
+from core.schema import DATA_DIR, DELIVERY
+
+INTERVALS_PATH = os.path.join(DATA_DIR, "eta_intervals.json")
+
+DEFAULT_COVERAGE = 0.9
+DEFAULT_FOLDS = 5
+DEFAULT_BINS = 4
+
+
+def conformal_quantile(scores, coverage):
+    """Finite-sample conformal quantile: the ceil((n + 1) * coverage)-th smallest score."""
+    scores = np.sort(np.asarray(scores, dtype=float))
+    rank = math.ceil((len(scores) + 1) * coverage)
+    return float(scores[min(rank, len(scores)) - 1])
+
+
+class ConformalIntervals:
+
+    def __init__(self, edges, widths, coverage, fingerprint=None, n=0):
+        # edges[i] <= eta < edges[i + 1] uses widths[i]; outer bins are open
+        self.edges = np.asarray(edges, dtype=float)
+        self.widths = np.asarray(widths, dtype=float)
+        self.coverage = coverage
+        self.fingerprint = fingerprint
+        self.n = n
+
+    @classmethod
+    def calibrate(cls, pipeline, df, coverage=DEFAULT_COVERAGE, folds=DEFAULT_FOLDS,
+                  bins=DEFAULT_BINS, seed=42, fingerprint=None):
+        """Cross-conformal calibration of ``pipeline`` on the orders in ``df``."""
+        from sklearn.base import clone
+        from sklearn.model_selection import KFold
+
+        features = prepare_features(df, pipeline.feature_names_in_)
+        target = df[DELIVERY].to_numpy(dtype=float)
+
+        oof = np.empty(len(df))
+        for train, held_out in KFold(folds, shuffle=True, random_state=seed).split(features):
+            model = clone(pipeline).fit(features.iloc[train], target[train])
+            oof[held_out] = model.predict(features.iloc[held_out])
+        scores = np.abs(target - oof)
+
+        edges = np.quantile(oof, np.linspace(0, 1, bins + 1)[1:-1])
+        groups = np.searchsorted(edges, oof, side="right")
+        widths = [conformal_quantile(scores[groups == b], coverage) for b in range(bins)]
+        return cls(edges, widths, coverage, fingerprint, len(df))
+
+    def interval(self, eta):
+        """``(low, high)`` arrays for an array of point estimates."""
+        eta = np.asarray(eta, dtype=float)
+        width = self.widths[np.searchsorted(self.edges, eta, side="right")]
+        return eta - width, eta + width
+
+    # ======================
+    # PERSISTENCE
+    # ======================
+
+    def to_dict(self):
+        return {
+            "coverage": self.coverage,
+            "edges": self.edges.tolist(),
+            "widths": self.widths.tolist(),
+            "fingerprint": self.fingerprint,
+            "n": self.n,
+        }
+
+    def save(self, path=INTERVALS_PATH):
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path=INTERVALS_PATH):
+        with open(path) as f:
+            return cls(**json.load(f))
+
+
+def load_intervals(model_path=MODEL_PATH, path=INTERVALS_PATH, coverage=DEFAULT_COVERAGE):
+    """Saved calibration for the current model, recalibrating if missing or stale."""
+    fingerprint = model_fingerprint(model_path)
+    if os.path.exists(path):
+        intervals = ConformalIntervals.load(path)
+        if intervals.fingerprint == fingerprint and intervals.coverage == coverage:
+            return intervals
+
+    from core.data import load_orders
+
+    intervals = ConformalIntervals.calibrate(
+        load_model(model_path), load_orders(), coverage, fingerprint=fingerprint
+    )
+    intervals.save(path)
+    return intervals
+
+
+def main():
+    from core.data import load_orders
+
+    parser = argparse.ArgumentParser(description="Calibrate conformal ETA intervals")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--output", default=INTERVALS_PATH)
+    parser.add_argument("--coverage", type=float, default=DEFAULT_COVERAGE)
+    parser.add_argument("--folds", type=int, default=DEFAULT_FOLDS)
+    parser.add_argument("--bins", type=int, default=DEFAULT_BINS)
+    args = parser.parse_args()
+
+    intervals = ConformalIntervals.calibrate(
+        load_model(args.model), load_orders(), args.coverage, args.folds, args.bins,
+        fingerprint=model_fingerprint(args.model),
+    )
+    intervals.save(args.output)
+
+    print(f"{args.coverage:.0%} intervals from {intervals.n:,} orders -> {args.output}")
+    bounds = [-math.inf, *intervals.edges, math.inf]
+    for lo, hi, width in zip(bounds, bounds[1:], intervals.widths):
+        print(f"  ETA {lo:6.1f} .. {hi:6.1f} min: +/- {width:.1f} min")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Loading the ETA model and shaping order data into its inputs.
+
+Imports NumPy only; joblib (and with it sklearn and xgboost) is loaded
+when a model is, so the serving path can import risk classes and the
+model path without them.
+"""
+
+import numpy as np
+
+from core.artifact import MODEL_PATH, model_fingerprint  # re-exported
+from core.features import distance_per_experience, experience_category
+from core.schema import DISTANCE, DISTANCE_PER_EXPERIENCE, EXPERIENCE, EXPERIENCE_CATEGORY
+
+# Same cut-offs as the Delivery Prediction page's risk classifier
+HIGH_RISK_MIN = 45
+MODERATE_RISK_MIN = 30
+
+
+def load_model(path=MODEL_PATH):
+    import joblib
+
+    return joblib.load(path)
+
+
+def prepare_features(df, feature_names):
+    """Return ``df``'s model inputs in order, deriving the engineered ones if absent."""
+    if EXPERIENCE_CATEGORY not in df.columns:
+        df = df.assign(**{EXPERIENCE_CATEGORY: experience_category(df[EXPERIENCE])})
+    if DISTANCE_PER_EXPERIENCE not in df.columns:
+        df = df.assign(**{
+            DISTANCE_PER_EXPERIENCE: distance_per_experience(df[DISTANCE], df[EXPERIENCE])
+        })
+    return df[list(feature_names)]
+
+
+def risk_class(eta):
+    eta = np.asarray(eta, dtype=float)
+    return np.select(
+        [eta > HIGH_RISK_MIN, eta > MODERATE_RISK_MIN],
+        ["High Risk", "Moderate Risk"],
+        default="Low Risk",
+    )
@@ -0,0 +1,223 @@
+"""Append-only order log with an incrementally maintained order cube.
+
+New deliveries are written as immutable Arrow segments and folded into the
+log's ``OrderCube`` as they arrive, so refreshing the dashboard KPIs costs
+O(new rows): nothing already in the log is read again.
+
+Sessions share one log and read ``log.cube`` without a lock. Folding
+never touches the published cube: new segments go into a copy, and the
+copy replaces ``log.cube`` in a single assignment, so a reader sees
+either the old cube or the new one, never a half-merged mix.
+
+Layout of a log directory::
+
+    segment-000001.arrow   # one file per appended batch, never rewritten
+    segment-000002.arrow
+    state.pkl              # cube covering the first N segments
+    seed.json              # last segment written by ``open``'s seed, if any
+
+``state.pkl`` may lag behind the segments (another process appended, or a
+writer stopped between the two writes); opening the log replays only the
+segments the state has not seen yet.
+
+The seed is the historical batch an empty log starts from (the training
+CSV on the dashboard), not orders that arrived through the log, so
+``seed_segment`` lets consumers such as retraining skip it.
+"""
+
+import copy
+import glob
+import json
+import os
+import pickle
+import re
+import threading
+
+import pyarrow as pa
+
+from core.cube import LATE_THRESHOLD, OrderCube
+from core.data import DATA_DIR, to_categorical
+
+ORDER_LOG_DIR = os.path.join(DATA_DIR, "order_log")
+
+SEGMENT_PATTERN = re.compile(r"segment-(\d{6})\.arrow$")
+# Bumped whenever the pickled state layout changes; older states are replayed
+STATE_VERSION = 3
+
+
+# ======================================================
+# LOG
+# ======================================================
+
+def _segment_number(path):
+    match = SEGMENT_PATTERN.search(path)
+    return int(match.group(1)) if match else None
+
+
+class OrderLog:
+
+    def __init__(self, directory=ORDER_LOG_DIR, late_threshold=LATE_THRESHOLD):
+        self.directory = directory
+        self.late_threshold = late_threshold
+        self.segments = 0
+        self.cube = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open(cls, directory=ORDER_LOG_DIR, late_threshold=LATE_THRESHOLD, seed=None):
+        """Open (or create) a log; ``seed()`` supplies the first batch of an empty log."""
+        os.makedirs(directory, exist_ok=True)
+        log = cls(directory, late_threshold)
+        log._load_state()
+        log.refresh()
+        if log.segments == 0 and seed is not None:
+            number = log.append(seed())
+            if number:
+                log._mark_seed(number)
+        return log
+
+    # ======================
+    # PATHS & PERSISTENCE
+    # ======================
+
+    @property
+    def state_path(self):
+        return os.path.join(self.directory, "state.pkl")
+
+    @property
+    def seed_path(self):
+        return os.path.join(self.directory, "seed.json")
+
+    @property
+    def seed_segment(self):
+        """Last segment holding the seed batch (0 when the log was not seeded)."""
+        try:
+            with open(self.seed_path) as f:
+                return json.load(f)["segment"]
+        except FileNotFoundError:
+            return 0
+
+    def _mark_seed(self, number):
+        tmp_path = f"{self.seed_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"segment": number}, f)
+        os.replace(tmp_path, self.seed_path)
+
+    def _segment_path(self, number):
+        return os.path.join(self.directory, f"segment-{number:06d}.arrow")
+
+    def _segment_numbers(self):
+        paths = glob.glob(os.path.join(self.directory, "segment-*.arrow"))
+        return sorted(n for n in map(_segment_number, paths) if n is not None)
+
+    def _load_state(self):
+        if not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, "rb") as f:
+                state = pickle.load(f)
+        except (pickle.UnpicklingError, AttributeError, EOFError, ImportError):
+            # Written by an older layout: rebuild from the segments
+            return
+        if (state.get("version") == STATE_VERSION
+                and state["late_threshold"] == self.late_threshold):
+            self.segments = state["segments"]
+            self.cube = state["cube"]
+
+    def _save_state(self):
+        tmp_path = f"{self.state_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump({
+                "version": STATE_VERSION,
+                "late_threshold": self.late_threshold,
+                "segments": self.segments,
+                "cube": self.cube,
+            }, f)
+        os.replace(tmp_path, self.state_path)
+
+    # ======================
+    # WRITES
+    # ======================
+
+    def _fold(self, frames):
+        """Publish a new cube covering ``frames``; the current one is never mutated."""
+        batch = None
+        for df in frames:
+            if len(df) == 0:
+                continue
+            cube = OrderCube.from_frame(df, late_threshold=self.late_threshold)
+            batch = cube if batch is None else batch.merge(cube)
+        if batch is None:
+            return
+        self.cube = batch if self.cube is None else copy.deepcopy(self.cube).merge(batch)
+
+    def _write_segment(self, table):
+        tmp_path = os.path.join(self.directory, f".segment.{os.getpid()}.tmp")
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+        # os.link fails if the name is taken, so concurrent writers never
+        # overwrite each other's segment; the loser takes the next number.
+        number = max(self._segment_numbers(), default=0) + 1
+        while True:
+            try:
+                os.link(tmp_path, self._segment_path(number))
+                break
+            except FileExistsError:
+                number += 1
+        os.remove(tmp_path)
+        return number
+
+    def append(self, df):
+        """Write ``df`` as a new segment and fold it into the aggregates."""
+        if len(df) == 0:
+            return self.segments
+        df = to_categorical(df.reset_index(drop=True))
+        table = pa.Table.from_pandas(df, preserve_index=False)
+
+        with self._lock:
+            self._refresh_locked()
+            number = self._write_segment(table)
+            # Another writer may have slipped in below our number
+            self._refresh_locked(upto=number - 1)
+            self._fold([df])
+            self.segments = number
+            self._save_state()
+        return number
+
+    # ======================
+    # READS
+    # ======================
+
+    def _read_segment(self, number):
+        with pa.memory_map(self._segment_path(number)) as source:
+            return pa.ipc.open_file(source).read_all()
+
+    def _refresh_locked(self, upto=None):
+        new = [
+            n for n in self._segment_numbers()
+            if n > self.segments and (upto is None or n <= upto)
+        ]
+        if new:
+            self._fold(self._read_segment(number).to_pandas() for number in new)
+            self.segments = new[-1]
+        return len(new)
+
+    def refresh(self):
+        """Fold in segments appended by other processes; returns how many."""
+        with self._lock:
+            return self._refresh_locked()
+
+    def read(self, columns=None):
+        """Full table of the log (for rebuilds; the cube path never calls this)."""
+        tables = [self._read_segment(n) for n in self._segment_numbers()]
+        table = pa.concat_tables(tables) if tables else pa.table({})
+        return table.select(columns) if columns else table
+
+    def read_since(self, after, columns=None):
+        """``(table, last segment)`` of the segments numbered above ``after``."""
+        numbers = [n for n in self._segment_numbers() if n > after]
+        tables = [self._read_segment(n) for n in numbers]
+        table = pa.concat_tables(tables) if tables else pa.table({})
+        return (table.select(columns) if columns and tables else table), max(numbers, default=after)
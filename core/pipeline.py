@@ -0,0 +1,253 @@
+"""Streaming feature-engineering stage: raw export -> final order table.
+
+Reproduces the offline step that turned ``Food_Delivery_Times.csv`` into
+``Food_Delivery_Times_final.csv``:
+
+- snake_case column names
+- blank weather / traffic / time of day filled with the column mode
+- blank courier experience filled with the median
+- ``courier_experience_category`` binned from experience years
+- distance, preparation and delivery time capped at their 1.5 x IQR fences
+- ``distance_per_experience`` = distance / years (0 for new couriers),
+  capped the same way
+
+The mode, median and IQR fences are global statistics. They are computed
+in two bounded-memory profiling passes that only keep value counts, and a
+third pass transforms each chunk in a process pool. Each worker writes its
+own Parquet partition, so memory is bounded by chunk size times the number
+of in-flight chunks, not by file size.
+
+Usage:
+    python -m core.pipeline data/Food_Delivery_Times.csv data/orders \\
+        --csv data/Food_Delivery_Times_final.csv
+"""
+
+import argparse
+import glob
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from core import features
+from core.data import (
+    DELIVERY, DISTANCE, DISTANCE_PER_EXPERIENCE, EXPERIENCE,
+    EXPERIENCE_CATEGORY, ORDER_ID, PREP_TIME, TIME_OF_DAY, TRAFFIC,
+    VEHICLE, WEATHER, to_categorical,
+)
+
+RAW_CSV = os.path.join("data", "Food_Delivery_Times.csv")
+DEFAULT_CHUNKSIZE = 250_000
+
+MODE_FILLED = [WEATHER, TRAFFIC, TIME_OF_DAY]
+CAPPED = [DISTANCE, PREP_TIME, DELIVERY]
+
+OUTPUT_COLUMNS = [
+    ORDER_ID, DISTANCE, WEATHER, TRAFFIC, TIME_OF_DAY, VEHICLE, PREP_TIME,
+    EXPERIENCE, DELIVERY, EXPERIENCE_CATEGORY, DISTANCE_PER_EXPERIENCE,
+]
+
+
+# ======================================================
+# CHUNK FUNCTIONS (run in worker processes)
+# ======================================================
+
+def normalize_columns(chunk):
+    chunk.columns = chunk.columns.str.strip().str.lower()
+    return chunk
+
+
+def profile_chunk(chunk):
+    """Value counts needed for the fills and the IQR fences."""
+    chunk = normalize_columns(chunk)
+    return {
+        col: chunk[col].value_counts()
+        for col in MODE_FILLED + CAPPED + [EXPERIENCE]
+    }
+
+
+def distance_per_experience(distance, years):
+    return pd.Series(
+        features.distance_per_experience(distance.to_numpy(), years.to_numpy()),
+        index=distance.index,
+    )
+
+
+def ratio_chunk(chunk, stats):
+    """Value counts of the uncapped distance/experience ratio."""
+    chunk = fill_chunk(normalize_columns(chunk), stats)
+    return distance_per_experience(chunk[DISTANCE], chunk[EXPERIENCE]).value_counts()
+
+
+def fill_chunk(chunk, stats):
+    for col in MODE_FILLED:
+        chunk[col] = chunk[col].fillna(stats["mode"][col])
+    chunk[EXPERIENCE] = chunk[EXPERIENCE].fillna(stats["median_experience"])
+    return chunk
+
+
+def experience_category(years):
+    return pd.Series(features.experience_category(years.to_numpy()), index=years.index)
+
+
+def cap(series, fences):
+    return series.clip(*fences).astype(series.dtype)
+
+
+def transform_chunk(chunk, stats):
+    chunk = fill_chunk(normalize_columns(chunk), stats)
+    for col in CAPPED:
+        chunk[col] = cap(chunk[col], stats["fences"][col])
+    chunk[EXPERIENCE_CATEGORY] = experience_category(chunk[EXPERIENCE])
+    chunk[DISTANCE_PER_EXPERIENCE] = cap(
+        distance_per_experience(chunk[DISTANCE], chunk[EXPERIENCE]),
+        stats["fences"][DISTANCE_PER_EXPERIENCE],
+    )
+    return to_categorical(chunk[OUTPUT_COLUMNS])
+
+
+def write_partition(chunk, stats, path):
+    table = pa.Table.from_pandas(
+        transform_chunk(chunk, stats), preserve_index=False
+    )
+    pq.write_table(table, path)
+    return table.num_rows
+
+
+# ======================================================
+# REDUCERS
+# ======================================================
+
+def merge_counts(parts):
+    merged = None
+    for part in parts:
+        merged = part if merged is None else merged.add(part, fill_value=0)
+    return merged.sort_index()
+
+
+def counts_mode(counts):
+    # pandas.Series.mode breaks ties by the smallest value
+    top = counts[counts == counts.max()]
+    return sorted(top.index)[0]
+
+
+def counts_fences(counts):
+    q1, q3 = counts_quantile(counts, 0.25), counts_quantile(counts, 0.75)
+    iqr = q3 - q1
+    return q1 - 1.5 * iqr, q3 + 1.5 * iqr
+
+
+def counts_quantile(counts, q):
+    """Linear-interpolated quantile of the values summarized by ``counts``."""
+    values = counts.index.to_numpy(dtype=float)
+    cumulative = np.cumsum(counts.to_numpy())
+    position = (cumulative[-1] - 1) * q
+    lower = int(np.floor(position))
+    lo = values[np.searchsorted(cumulative, lower + 1)]
+    hi = values[np.searchsorted(cumulative, min(lower + 2, cumulative[-1]))]
+    return lo + (position - lower) * (hi - lo)
+
+
+# ======================================================
+# DRIVER
+# ======================================================
+
+def ordered_map(pool, fn, items, max_in_flight, *args):
+    """``pool.map`` with at most ``max_in_flight`` chunks held in memory."""
+    pending = deque()
+    for item in items:
+        pending.append(pool.submit(fn, *item, *args))
+        if len(pending) >= max_in_flight:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def _chunks(path, chunksize):
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        yield (chunk,)
+
+
+def fit_stats(path, pool, chunksize, max_in_flight):
+    counts = {}
+    for profile in ordered_map(
+        pool, profile_chunk, _chunks(path, chunksize), max_in_flight
+    ):
+        for col, part in profile.items():
+            counts[col] = merge_counts([counts[col], part]) if col in counts else part
+
+    stats = {
+        "mode": {col: counts_mode(counts[col]) for col in MODE_FILLED},
+        "median_experience": counts_quantile(
+            counts[EXPERIENCE].sort_index(), 0.5
+        ),
+        "fences": {
+            col: counts_fences(counts[col].sort_index()) for col in CAPPED
+        },
+    }
+
+    # The ratio depends on the filled experience, so it needs its own pass
+    ratios = merge_counts(ordered_map(
+        pool, ratio_chunk, _chunks(path, chunksize), max_in_flight, stats
+    ))
+    stats["fences"][DISTANCE_PER_EXPERIENCE] = counts_fences(ratios)
+    return stats
+
+
+def run(raw_path, output_dir, chunksize=DEFAULT_CHUNKSIZE, workers=None,
+        csv_path=None):
+    """Run the three passes and return the number of rows written."""
+    workers = workers or os.cpu_count()
+    max_in_flight = 2 * workers
+    os.makedirs(output_dir, exist_ok=True)
+    for stale in glob.glob(os.path.join(output_dir, "part-*.parquet")):
+        os.remove(stale)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        stats = fit_stats(raw_path, pool, chunksize, max_in_flight)
+
+        partitions = (
+            (chunk, stats, os.path.join(output_dir, f"part-{i:05d}.parquet"))
+            for i, (chunk,) in enumerate(_chunks(raw_path, chunksize))
+        )
+        rows = sum(ordered_map(
+            pool, write_partition, partitions, max_in_flight
+        ))
+
+    if csv_path:
+        export_csv(output_dir, csv_path)
+    return rows
+
+
+def export_csv(output_dir, csv_path):
+    """Concatenate the partitions into one CSV, one partition at a time."""
+    tmp_path = csv_path + ".tmp"
+    parts = sorted(glob.glob(os.path.join(output_dir, "part-*.parquet")))
+    with open(tmp_path, "w", newline="") as sink:
+        for i, part in enumerate(parts):
+            pq.read_table(part).to_pandas().to_csv(
+                sink, index=False, header=(i == 0)
+            )
+    os.replace(tmp_path, csv_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("raw", nargs="?", default=RAW_CSV)
+    parser.add_argument("output_dir", nargs="?", default=os.path.join("data", "orders"))
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--csv", dest="csv_path", default=None,
+                        help="also export a single CSV (e.g. the final dataset)")
+    args = parser.parse_args()
+
+    rows = run(args.raw, args.output_dir, args.chunksize, args.workers, args.csv_path)
+    print(f"Wrote {rows:,} rows to {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
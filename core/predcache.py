@@ -0,0 +1,166 @@
+"""Memoized ETA predictions keyed on quantized inputs.
+
+Orders are normalized to a fixed-order key tuple: categorical inputs as
+given, numeric inputs rounded to ``DECIMALS``. The prediction is computed on
+that rounded order, so a cache hit always returns exactly what the model
+would say for it. Misses in a batch are scored together in one call.
+
+``PredictionCache`` is a thread-safe LRU with a per-entry TTL, a memory cap
+(estimated bytes of keys + values) and hit/miss/eviction counters.
+``CachedPredictor`` pairs it with the compiled model (loaded from the
+exported artifact, ``core.artifact``, when it is current) and watches the
+model file: when it is replaced, the model is reloaded and the cache is
+dropped, keyed by the file's SHA-256 fingerprint.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from core.artifact import MODEL_PATH, load_compiled, model_fingerprint
+from core.schema import DISTANCE, DISTANCE_PER_EXPERIENCE, EXPERIENCE, PREP_TIME
+
+DEFAULT_MAX_BYTES = 32 * 1024 ** 2
+DEFAULT_TTL_S = 3600.0
+
+# Rounding applied to numeric inputs before keying and predicting
+DECIMALS = {
+    DISTANCE: 2,
+    PREP_TIME: 1,
+    EXPERIENCE: 1,
+    DISTANCE_PER_EXPERIENCE: 6,
+}
+
+# OrderedDict slot + the (value, expiry) tuple and its two floats
+_ENTRY_OVERHEAD = 100 + sys.getsizeof((0.0, 0.0)) + 2 * sys.getsizeof(0.0)
+
+
+class PredictionCache:
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, ttl=DEFAULT_TTL_S):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _size(key):
+        return sys.getsizeof(key) + sum(sys.getsizeof(part) for part in key) + _ENTRY_OVERHEAD
+
+    def get(self, key):
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[1] < time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        with self._lock:
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = (value, time.monotonic() + self.ttl)
+            self.nbytes += self._size(key)
+            while self.nbytes > self.max_bytes and self.entries:
+                self._remove(next(iter(self.entries)))
+                self.evictions += 1
+
+    def _remove(self, key):
+        del self.entries[key]
+        self.nbytes -= self._size(key)
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.nbytes = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "bytes": self.nbytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class CachedPredictor:
+    """Compiled model + prediction cache, reloaded when the artifact changes."""
+
+    def __init__(self, path=MODEL_PATH, cache=None):
+        self.path = path
+        self.cache = cache or PredictionCache()
+        self._current = (None, None)
+        self._stamp = None
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        """Current ``(model, fingerprint)``, reloading if the artifact was replaced."""
+        stat = os.stat(self.path)
+        stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if stamp != self._stamp:
+            with self._lock:
+                if stamp != self._stamp:
+                    fingerprint = model_fingerprint(self.path)
+                    if fingerprint != self._current[1]:
+                        model = load_compiled(self.path, fingerprint)
+                        self._current = (model, fingerprint)
+                        self.cache.clear()
+                    self._stamp = stamp
+        return self._current
+
+    @property
+    def model(self):
+        return self._refresh()[0]
+
+    @property
+    def fingerprint(self):
+        return self._refresh()[1]
+
+    @staticmethod
+    def _normalize(order):
+        return {
+            c: round(float(v), DECIMALS[c]) if c in DECIMALS else v
+            for c, v in order.items()
+        }
+
+    def predict_orders(self, orders):
+        model, fingerprint = self._refresh()
+        normalized = [self._normalize(order) for order in orders]
+        # Absent engineered inputs key as None: they are derived, not given
+        keys = [tuple(order.get(c) for c in model.inputs) + (fingerprint,) for order in normalized]
+        eta = np.empty(len(orders), dtype=np.float32)
+
+        missing = {}
+        for i, key in enumerate(keys):
+            value = self.cache.get(key)
+            if value is None:
+                missing.setdefault(key, []).append(i)
+            else:
+                eta[i] = value
+
+        if missing:
+            positions = list(missing.values())
+            computed = model.predict_orders([normalized[rows[0]] for rows in positions])
+            for (key, rows), value in zip(missing.items(), computed):
+                eta[rows] = value
+                self.cache.put(key, float(value))
+        return eta
+
+    def predict_one(self, order):
+        return float(self.predict_orders([order])[0])
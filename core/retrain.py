@@ -0,0 +1,293 @@
+"""Incremental warm-start retraining on new order batches.
+
+Instead of refitting on the whole history, ``retrain`` continues boosting
+the published model: ``rounds`` more trees are grown on the new labelled
+orders only, starting from the current booster (XGBoost's ``xgb_model``
+continuation, so the base score and existing trees are kept). The fitted
+ColumnTransformer is frozen (transform only, never refit), so the new trees
+see exactly the feature layout the old ones were grown on. The cost scales
+with the size of the new batch times ``rounds``, not with total history.
+
+Validation uses a rolling holdout: the newest ``holdout`` fraction of the
+batch, in arrival order, is not trained on. Current and candidate models
+both score it, and the candidate is published only if its MAE is at most
+``(1 + tolerance)`` times the current model's.
+
+Publishing is atomic. The candidate is written next to ``MODEL_PATH``,
+archived under ``VERSIONS_DIR`` and moved into place with ``os.replace``, so
+readers see either the old file or the new one, never a partial write.
+Everything downstream (prediction cache, exported artifact, intervals,
+importance) keys on the file's SHA-256 and picks the new version up. The
+drift reference (``core.drift``) is written at publish time: the parent
+model's reference plus the new training orders, keyed by the new
+fingerprint and archived with the version. ``versions.jsonl`` records the
+lineage; ``--rollback`` republishes an archived version and its reference.
+
+New orders come from files (CSV/Parquet) or from the order log
+(``core.orderlog``); for the log, only segments appended since the last
+published version are read.
+
+Usage:
+    python -m core.retrain --order-log
+    python -m core.retrain new_orders.parquet --rounds 50
+    python -m core.retrain --rollback 20260101T020000-92bc61779183
+"""
+
+import argparse
+import json
+import os
+import shutil
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.pipeline import Pipeline
+from xgboost import XGBRegressor
+
+from core.data import DATA_DIR, DELIVERY
+from core.drift import REFERENCE_PATH, DriftReference, load_reference
+from core.model import MODEL_PATH, load_model, model_fingerprint, prepare_features
+from core.orderlog import ORDER_LOG_DIR, OrderLog
+from core.scoring import read_chunks
+from core.training import XGB_PARAMS
+
+VERSIONS_DIR = os.path.join(DATA_DIR, "model_versions")
+MANIFEST_FILE = "versions.jsonl"
+
+DEFAULT_ROUNDS = 50
+DEFAULT_HOLDOUT = 0.2
+DEFAULT_TOLERANCE = 0.0
+MIN_TRAIN_ROWS = 50
+
+
+# ======================================================
+# VERSIONS
+# ======================================================
+
+def read_manifest(versions_dir=VERSIONS_DIR):
+    path = os.path.join(versions_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _append_manifest(entry, versions_dir):
+    with open(os.path.join(versions_dir, MANIFEST_FILE), "a") as f:
+        f.write(json.dumps(entry) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _reference_path(version, versions_dir):
+    return os.path.join(versions_dir, version + ".reference.json")
+
+
+def _archive(path, fingerprint, versions_dir):
+    version = f"{time.strftime('%Y%m%dT%H%M%S')}-{fingerprint[:12]}"
+    archived = os.path.join(versions_dir, version + ".joblib")
+    if not os.path.exists(archived):
+        shutil.copyfile(path, archived)
+    return version
+
+
+def _install(source, model_path):
+    """Atomically put a copy of ``source`` at ``model_path``."""
+    tmp = f"{model_path}.{os.getpid()}.tmp"
+    shutil.copyfile(source, tmp)
+    with open(tmp, "rb") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp, model_path)
+
+
+def publish(pipeline, model_path=MODEL_PATH, versions_dir=VERSIONS_DIR, **info):
+    """Archive ``pipeline`` as a new version and atomically make it current."""
+    os.makedirs(versions_dir, exist_ok=True)
+    manifest = read_manifest(versions_dir)
+    parent = model_fingerprint(model_path)
+    if not any(entry["fingerprint"] == parent for entry in manifest):
+        # First publish: keep the model being replaced so it can be rolled back to
+        version = _archive(model_path, parent, versions_dir)
+        _append_manifest({"version": version, "fingerprint": parent, "parent": None,
+                          "created": time.time()}, versions_dir)
+
+    tmp = f"{model_path}.{os.getpid()}.new"
+    joblib.dump(pipeline, tmp)
+    fingerprint = model_fingerprint(tmp)
+    version = _archive(tmp, fingerprint, versions_dir)
+    _install(tmp, model_path)
+    os.remove(tmp)
+
+    entry = {"version": version, "fingerprint": fingerprint, "parent": parent,
+             "created": time.time(), **info}
+    _append_manifest(entry, versions_dir)
+    return entry
+
+
+def rollback(version, model_path=MODEL_PATH, versions_dir=VERSIONS_DIR):
+    """Make an archived version current again."""
+    for entry in read_manifest(versions_dir):
+        if entry["version"] == version:
+            break
+    else:
+        raise ValueError(f"unknown model version {version!r}")
+    _install(os.path.join(versions_dir, version + ".joblib"), model_path)
+    archived = _reference_path(version, versions_dir)
+    if os.path.exists(archived):
+        # Otherwise load_reference refits from the order table on first use
+        DriftReference.load(archived).save(REFERENCE_PATH)
+    return entry
+
+
+# ======================================================
+# RETRAINING
+# ======================================================
+
+def continue_training(pipeline, features, target, rounds=DEFAULT_ROUNDS, learning_rate=None):
+    """New pipeline: frozen preprocessing + the booster boosted ``rounds`` more times."""
+    preprocessor = pipeline.named_steps["preprocessor"]
+    params = {**XGB_PARAMS, "n_estimators": rounds}
+    if learning_rate is not None:
+        params["learning_rate"] = learning_rate
+
+    regressor = XGBRegressor(**params, n_jobs=1)
+    regressor.fit(
+        preprocessor.transform(features), target,
+        xgb_model=pipeline.named_steps["model"].get_booster(),
+    )
+    return Pipeline([("preprocessor", preprocessor), ("model", regressor)])
+
+
+def _mae(pipeline, features, target):
+    return float(np.abs(pipeline.predict(features) - target).mean())
+
+
+def retrain(df, model_path=MODEL_PATH, rounds=DEFAULT_ROUNDS, holdout=DEFAULT_HOLDOUT,
+            tolerance=DEFAULT_TOLERANCE, learning_rate=None, versions_dir=VERSIONS_DIR,
+            dry_run=False, **info):
+    """Warm-start the model at ``model_path`` on ``df`` (new orders, oldest first).
+
+    Returns a report dict; ``published`` says whether the candidate replaced
+    the current model.
+    """
+    df = df[df[DELIVERY].notna()].reset_index(drop=True)
+    current = load_model(model_path)
+    features = prepare_features(df, current.feature_names_in_)
+    target = df[DELIVERY].to_numpy(dtype=float)
+
+    split = len(df) - int(round(len(df) * holdout))
+    if split < MIN_TRAIN_ROWS or split == len(df):
+        raise ValueError(
+            f"{len(df)} new orders leave {split} to train on and {len(df) - split} to "
+            f"validate on; need at least {MIN_TRAIN_ROWS} and 1"
+        )
+
+    start = time.perf_counter()
+    candidate = continue_training(
+        current, features.iloc[:split], target[:split], rounds, learning_rate
+    )
+    fit_s = time.perf_counter() - start
+
+    report = {
+        "train_rows": split,
+        "holdout_rows": len(df) - split,
+        "rounds": rounds,
+        "trees": candidate.named_steps["model"].get_booster().num_boosted_rounds(),
+        "fit_s": fit_s,
+        "holdout_mae_current": _mae(current, features.iloc[split:], target[split:]),
+        "holdout_mae_candidate": _mae(candidate, features.iloc[split:], target[split:]),
+    }
+    accepted = report["holdout_mae_candidate"] <= report["holdout_mae_current"] * (1 + tolerance)
+    report["published"] = accepted and not dry_run
+    if report["published"]:
+        reference = load_reference(model_path)
+        entry = publish(candidate, model_path, versions_dir, **report, **info)
+        report["version"] = entry["version"]
+        # The new trees saw the parent's data plus the training part of the batch
+        reference = reference.extended(df.iloc[:split], entry["fingerprint"])
+        reference.save(_reference_path(entry["version"], versions_dir))
+        reference.save(REFERENCE_PATH)
+        _export(candidate, entry["fingerprint"])
+    return report
+
+
+def _export(pipeline, fingerprint):
+    # Fast cold-start artifact, in the new model's own directory
+    from core.artifact import artifact_dir, export
+
+    try:
+        export(pipeline, artifact_dir(fingerprint), fingerprint)
+    except OSError:
+        pass
+
+
+# ======================================================
+# NEW ORDERS
+# ======================================================
+
+def orders_from_files(paths):
+    return pd.concat([chunk for path in paths for chunk in read_chunks(path)], ignore_index=True)
+
+
+def orders_from_log(directory=ORDER_LOG_DIR, versions_dir=VERSIONS_DIR):
+    """``(orders, last segment)`` appended to the log since the last published version.
+
+    The seed segments are the training CSV the log started from, so the
+    first run starts after them rather than retraining on the CSV twice.
+    """
+    log = OrderLog(directory)
+    after = max([log.seed_segment]
+                + [entry.get("log_segment", 0) for entry in read_manifest(versions_dir)])
+    table, last = log.read_since(after)
+    return table.to_pandas(), last
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm-start retraining on new orders")
+    parser.add_argument("inputs", nargs="*", help="CSV/Parquet files of new labelled orders")
+    parser.add_argument("--order-log", nargs="?", const=ORDER_LOG_DIR, default=None,
+                        metavar="DIR", help="train on log segments since the last version")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--versions-dir", default=VERSIONS_DIR)
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS)
+    parser.add_argument("--learning-rate", type=float, default=None)
+    parser.add_argument("--holdout", type=float, default=DEFAULT_HOLDOUT,
+                        help="newest fraction of the new orders held out for validation")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed relative holdout MAE increase")
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--rollback", metavar="VERSION", default=None)
+    args = parser.parse_args()
+
+    if args.rollback:
+        entry = rollback(args.rollback, args.model, args.versions_dir)
+        print(f"Rolled back to {entry['version']} -> {args.model}")
+        return
+
+    info = {}
+    if args.order_log:
+        df, info["log_segment"] = orders_from_log(args.order_log, args.versions_dir)
+    elif args.inputs:
+        df = orders_from_files(args.inputs)
+    else:
+        parser.error("give input files or --order-log")
+    if df.empty:
+        print("No new orders.")
+        return
+
+    report = retrain(df, args.model, args.rounds, args.holdout, args.tolerance,
+                     args.learning_rate, args.versions_dir, args.dry_run, **info)
+    print(f"+{report['rounds']} rounds ({report['trees']} trees) on {report['train_rows']:,} "
+          f"orders in {report['fit_s']:.2f}s")
+    print(f"Holdout MAE over {report['holdout_rows']:,} newest orders: "
+          f"current {report['holdout_mae_current']:.3f} -> "
+          f"candidate {report['holdout_mae_candidate']:.3f} min")
+    if report["published"]:
+        print(f"Published {report['version']} -> {args.model}")
+    else:
+        print("Not published" + (" (dry run)" if args.dry_run else ": holdout MAE got worse"))
+
+
+if __name__ == "__main__":
+    main()
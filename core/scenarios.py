@@ -0,0 +1,69 @@
+"""Batched what-if sweeps over the ETA model.
+
+``sweep`` expands the Cartesian grid of any number of input axes around a
+base order and scores every scenario with a single ``predict`` call on a
+matrix built by the compiled pipeline (``core.fastpath``), so thousands of
+scenarios cost about as much as a handful of single predictions.
+
+Engineered inputs (experience category, distance per experience) are
+derived per scenario. A caller that engineers its own orders passes the
+same ``derive`` function it used for them, so the sweep at the base point
+scores exactly the base order. Without one, the training definitions
+(``core.features``) apply: a value given in ``base`` is kept only while
+none of the inputs it is derived from is swept; otherwise every scenario
+would pair a new distance or experience with the base order's ratio and
+category.
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from core.data import DISTANCE, DISTANCE_PER_EXPERIENCE, EXPERIENCE, EXPERIENCE_CATEGORY
+from core.model import risk_class
+from core.scoring import ETA_COL, RISK_COL
+
+MAX_SCENARIOS = 250_000
+
+# Engineered input -> the raw inputs it is computed from
+DERIVED_FROM = {
+    EXPERIENCE_CATEGORY: (EXPERIENCE,),
+    DISTANCE_PER_EXPERIENCE: (DISTANCE, EXPERIENCE),
+}
+
+
+def sweep(model, base, axes, max_scenarios=MAX_SCENARIOS, derive=None):
+    """Score every combination of ``axes`` (name -> values) around ``base``.
+
+    ``model`` is a ``CompiledPipeline``. ``derive`` maps the scenario
+    columns to the engineered inputs that replace the base order's ones.
+    Returns one tidy row per scenario: the swept inputs, then the ETA and
+    its risk class.
+    """
+    names = list(axes)
+    values = [np.asarray(v) for v in axes.values()]
+    shape = tuple(len(v) for v in values)
+    n = math.prod(shape)
+    if n > max_scenarios:
+        raise ValueError(f"{n:,} scenarios exceeds the limit of {max_scenarios:,}")
+
+    grid = {
+        name: axis[index]
+        for name, axis, index in zip(names, values, np.indices(shape).reshape(len(shape), n))
+    }
+    if derive is None:
+        base = {
+            name: value for name, value in base.items()
+            if not any(source in axes for source in DERIVED_FROM.get(name, ()))
+        }
+    columns = {**base, **grid}
+    if derive is not None:
+        columns.update(derive(columns))
+    eta = model.predict(model.transform_columns(columns, n))
+    return pd.DataFrame(grid).assign(**{ETA_COL: eta, RISK_COL: risk_class(eta)})
+
+
+def partial_dependence(results, axis):
+    """Mean ETA per value of ``axis``, averaged over every other swept input."""
+    return results.groupby(axis, sort=False)[ETA_COL].mean()
@@ -0,0 +1,30 @@
+"""Column names and category levels of the order table.
+
+Kept free of pandas/pyarrow imports so that lightweight consumers (the
+compiled inference path) can share the schema without loading them.
+"""
+
+DATA_DIR = "data"
+
+ORDER_ID = "order_id"
+DISTANCE = "distance_km"
+WEATHER = "weather"
+TRAFFIC = "traffic_level"
+TIME_OF_DAY = "time_of_day"
+VEHICLE = "vehicle_type"
+PREP_TIME = "preparation_time_min"
+EXPERIENCE = "courier_experience_yrs"
+DELIVERY = "delivery_time_min"
+EXPERIENCE_CATEGORY = "courier_experience_category"
+DISTANCE_PER_EXPERIENCE = "distance_per_experience"
+
+# Known levels in their natural order; unseen values are appended sorted.
+CATEGORY_LEVELS = {
+    WEATHER: ["Clear", "Rainy", "Snowy", "Windy", "Foggy"],
+    TRAFFIC: ["Low", "Medium", "High"],
+    TIME_OF_DAY: ["Morning", "Afternoon", "Evening", "Night"],
+    VEHICLE: ["Bike", "Scooter", "Car", "Motorcycle"],
+    EXPERIENCE_CATEGORY: ["Newbie", "Intermediate", "Expert"],
+}
+
+CATEGORICAL_COLUMNS = list(CATEGORY_LEVELS)
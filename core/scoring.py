@@ -0,0 +1,124 @@
+"""Batch ETA scoring over order files.
+
+Reads a CSV or Parquet order file in chunks, runs the full sklearn pipeline
+(ColumnTransformer + XGBoost) in a process pool, and writes each chunk's
+predictions, conformal interval (``core.intervals``) and risk class to
+its own Parquet partition.
+
+Each worker loads the model once and is pinned to ``--threads`` BLAS/OpenMP
+threads (1 by default), so ``workers x threads`` matches the core count
+instead of every process oversubscribing every core.
+
+Usage:
+    python -m core.scoring orders.parquet scores/ --workers 8
+"""
+
+import argparse
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from threadpoolctl import threadpool_limits
+
+from core.intervals import ConformalIntervals, load_intervals
+from core.model import MODEL_PATH, load_model, prepare_features, risk_class
+from core.pipeline import ordered_map
+
+DEFAULT_CHUNKSIZE = 100_000
+
+ETA_COL = "eta_min"
+LOW_COL = "eta_low_min"
+HIGH_COL = "eta_high_min"
+RISK_COL = "risk_level"
+
+_model = None
+_intervals = None
+_thread_limits = None
+
+
+# ======================================================
+# WORKER
+# ======================================================
+
+def _init_worker(model_path, threads, intervals):
+    global _model, _intervals, _thread_limits
+    _thread_limits = threadpool_limits(limits=threads)
+    _model = load_model(model_path)
+    _model.set_params(model__n_jobs=threads)
+    _intervals = ConformalIntervals(**intervals)
+
+
+def score_frame(model, df, intervals=None):
+    """Predictions, intervals and risk class for ``df``, appended as new columns."""
+    features = prepare_features(df, model.feature_names_in_)
+    eta = model.predict(features)
+    columns = {ETA_COL: eta}
+    if intervals is not None:
+        columns[LOW_COL], columns[HIGH_COL] = intervals.interval(eta)
+    columns[RISK_COL] = risk_class(eta)
+    return df.assign(**columns)
+
+
+def score_partition(chunk, path):
+    table = pa.Table.from_pandas(score_frame(_model, chunk, _intervals), preserve_index=False)
+    pq.write_table(table, path)
+    return table.num_rows
+
+
+# ======================================================
+# DRIVER
+# ======================================================
+
+def read_chunks(path, chunksize=DEFAULT_CHUNKSIZE):
+    """Yield DataFrame chunks of a CSV file, a Parquet file or a Parquet directory."""
+    if os.path.isdir(path) or path.endswith(".parquet"):
+        files = sorted(glob.glob(os.path.join(path, "*.parquet"))) if os.path.isdir(path) else [path]
+        for file in files:
+            for batch in pq.ParquetFile(file).iter_batches(batch_size=chunksize):
+                yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize)
+
+
+def run(input_path, output_dir, chunksize=DEFAULT_CHUNKSIZE, workers=None,
+        threads=1, model_path=MODEL_PATH):
+    """Score ``input_path`` into ``output_dir``; returns the number of rows."""
+    workers = workers or max(1, (os.cpu_count() or 1) // threads)
+    intervals = load_intervals(model_path)
+    os.makedirs(output_dir, exist_ok=True)
+    for stale in glob.glob(os.path.join(output_dir, "part-*.parquet")):
+        os.remove(stale)
+
+    partitions = (
+        (chunk, os.path.join(output_dir, f"part-{i:05d}.parquet"))
+        for i, chunk in enumerate(read_chunks(input_path, chunksize))
+    )
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(model_path, threads, intervals.to_dict()),
+    ) as pool:
+        return sum(ordered_map(pool, score_partition, partitions, 2 * workers))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch ETA scoring")
+    parser.add_argument("input", help="CSV file, Parquet file or directory of Parquet parts")
+    parser.add_argument("output_dir")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--threads", type=int, default=1,
+                        help="BLAS/OpenMP threads per worker")
+    parser.add_argument("--model", default=MODEL_PATH)
+    args = parser.parse_args()
+
+    rows = run(args.input, args.output_dir, args.chunksize, args.workers,
+               args.threads, args.model)
+    print(f"Scored {rows:,} orders into {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
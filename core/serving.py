@@ -0,0 +1,389 @@
+"""Local ETA inference service with micro-batching.
+
+A small asyncio HTTP/1.1 server (keep-alive, no extra dependencies) around
+the same model the Delivery Prediction page loads. Concurrent single-order
+requests are queued and coalesced into one ``predict`` call per batch: a
+batch is dispatched as soon as it holds ``max_batch`` orders or its oldest
+order has waited ``max_wait_ms``, so per-call overhead is amortized across
+requests without adding more than ``max_wait_ms`` of queueing latency.
+Orders seen before are answered from the prediction cache
+(``core.predcache``) and only the misses reach the model. With
+``--surface`` the service answers from the precomputed lookup surface
+(``core.surface``) instead and only runs the trees for the orders the
+surface does not cover.
+
+Replacing the model file is picked up by ``ModelWatcher``, which reloads
+the model (or, with ``--surface``, reloads or rebuilds the surface),
+recalibrates its conformal intervals (``core.intervals``) and switches
+the drift monitor to the new model's reference on a background thread;
+calibration refits the pipeline and a surface rebuild takes tens of
+seconds, so neither runs inside a request batch.
+
+Every scored batch is also counted by the feature drift monitor
+(``core.drift``); its report is served live and published to
+``DRIFT_REPORT_PATH`` every ``--drift-publish-s`` seconds.
+
+Endpoints:
+    POST /predict   one order (JSON object) or several (JSON array)
+    GET  /health
+    GET  /drift
+
+Usage:
+    python -m core.serving --port 8502 --max-batch 256 --max-wait-ms 2
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from core.artifact import MODEL_PATH, model_fingerprint
+from core.drift import DRIFT_REPORT_PATH, DriftMonitor, load_reference, write_report
+from core.intervals import load_intervals
+from core.model import risk_class
+from core.predcache import CachedPredictor
+from core.schema import (
+    DISTANCE, DISTANCE_PER_EXPERIENCE, EXPERIENCE, EXPERIENCE_CATEGORY, PREP_TIME, TIME_OF_DAY,
+    TRAFFIC, VEHICLE, WEATHER,
+)
+from core.surface import SURFACE_PATH, load_surface
+
+DEFAULT_MAX_BATCH = 256
+DEFAULT_MAX_WAIT_MS = 2.0
+DEFAULT_DRIFT_PUBLISH_S = 60.0
+DEFAULT_MODEL_POLL_S = 1.0
+
+NUMERIC_FIELDS = [DISTANCE, PREP_TIME, EXPERIENCE]
+CATEGORICAL_FIELDS = [WEATHER, TRAFFIC, TIME_OF_DAY, VEHICLE]
+# Engineered inputs a client may send instead of having them derived
+OPTIONAL_NUMERIC_FIELDS = [DISTANCE_PER_EXPERIENCE]
+OPTIONAL_CATEGORICAL_FIELDS = [EXPERIENCE_CATEGORY]
+
+REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    500: "Internal Server Error",
+}
+
+
+# ======================================================
+# MICRO-BATCHER
+# ======================================================
+
+class MicroBatcher:
+
+    def __init__(self, predict_batch, max_batch=DEFAULT_MAX_BATCH,
+                 max_wait_ms=DEFAULT_MAX_WAIT_MS):
+        self.predict_batch = predict_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.queue = asyncio.Queue()
+        # One inference thread: batches run back to back while the event
+        # loop keeps accepting and queueing new requests.
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.batches = 0
+        self.orders = 0
+
+    async def submit(self, orders):
+        loop = asyncio.get_running_loop()
+        futures = []
+        for order in orders:
+            future = loop.create_future()
+            await self.queue.put((order, future))
+            futures.append(future)
+        return await asyncio.gather(*futures)
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            orders = [order for order, _ in batch]
+            try:
+                results = await loop.run_in_executor(
+                    self.executor, self.predict_batch, orders
+                )
+            except Exception:
+                # Rescore one by one so only the offending orders fail
+                await self._run_singly(loop, batch)
+                continue
+
+            self.batches += 1
+            self.orders += len(batch)
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    async def _run_singly(self, loop, batch):
+        for order, future in batch:
+            try:
+                result = await loop.run_in_executor(
+                    self.executor, self.predict_batch, [order]
+                )
+            except Exception as exc:
+                if not future.done():
+                    future.set_exception(exc)
+                continue
+            self.batches += 1
+            self.orders += 1
+            if not future.done():
+                future.set_result(result[0])
+
+
+def validate_order(order):
+    """Reject an order before it is queued, so it cannot fail a whole batch."""
+    if not isinstance(order, dict):
+        raise ValueError("expected an order object")
+    optional = [f for f in OPTIONAL_NUMERIC_FIELDS if f in order]
+    for field in NUMERIC_FIELDS + optional:
+        value = order.get(field)
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"{field} must be a number")
+        # json.loads accepts NaN and Infinity
+        if not math.isfinite(value):
+            raise ValueError(f"{field} must be finite")
+    optional = [f for f in OPTIONAL_CATEGORICAL_FIELDS if f in order]
+    for field in CATEGORICAL_FIELDS + optional:
+        if not isinstance(order.get(field), str):
+            raise ValueError(f"{field} must be a string")
+
+
+class ModelWatcher:
+    """Keeps the served model and its interval calibration current.
+
+    ``check`` reloads the model if its file was replaced and, when the
+    fingerprint changed, recalibrates and moves the drift monitor onto that
+    model's reference. ``run`` calls it periodically off the
+    inference thread, so batches never wait for a calibration; until a
+    new model's calibration is ready, intervals keep the previous widths.
+    (A batch that sees the new file first loads the model itself, which
+    takes milliseconds from the exported artifact.)
+
+    With a ``surface_path`` the served predictor is a surface, whose
+    fingerprint is fixed when it is built. The watcher then follows the
+    model file itself and swaps in the new model's surface once it is
+    loaded or rebuilt; batches keep the old one until then.
+    """
+
+    def __init__(self, predictor, model_path=MODEL_PATH, monitor=None, surface_path=None):
+        self.predictor = predictor
+        self.model_path = model_path
+        self.monitor = monitor
+        self.surface_path = surface_path
+        self.intervals = None
+        self.calibrated = None
+        self._stamp = None
+        self._fingerprint = None
+
+    def _model_fingerprint(self):
+        if self.surface_path is None:
+            return self.predictor.fingerprint  # CachedPredictor follows the file itself
+        stat = os.stat(self.model_path)
+        stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if stamp != self._stamp:
+            self._fingerprint = model_fingerprint(self.model_path)
+            self._stamp = stamp
+        return self._fingerprint
+
+    def check(self):
+        fingerprint = self._model_fingerprint()
+        if fingerprint != self.calibrated:
+            if self.surface_path is not None and self.predictor.fingerprint != fingerprint:
+                self.predictor = load_surface(self.model_path, self.surface_path)
+            self.intervals = load_intervals(self.model_path)
+            if self.monitor is not None and self.monitor.reference.fingerprint != fingerprint:
+                self.monitor.use(load_reference(self.model_path))
+            self.calibrated = fingerprint
+        return fingerprint
+
+    async def run(self, interval_s=DEFAULT_MODEL_POLL_S):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(interval_s)
+            try:
+                await loop.run_in_executor(None, self.check)
+            except Exception as exc:
+                print(f"Model reload failed, still serving {str(self.calibrated)[:12]}: {exc}")
+
+
+def make_predictor(watcher, monitor=None):
+
+    def predict_batch(orders):
+        eta = watcher.predictor.predict_orders(orders)
+        if monitor is not None:
+            monitor.observe_orders(orders)
+        low, high = watcher.intervals.interval(eta)
+        risk = risk_class(eta)
+        return [
+            {"eta_min": float(e), "eta_low_min": float(lo), "eta_high_min": float(hi),
+             "risk_level": str(r)}
+            for e, lo, hi, r in zip(eta, low, high, risk)
+        ]
+    return predict_batch
+
+
+# ======================================================
+# HTTP
+# ======================================================
+
+class ETAServer:
+
+    def __init__(self, batcher, watcher, monitor=None):
+        self.batcher = batcher
+        self.watcher = watcher
+        self.monitor = monitor
+        self.started = time.time()
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0))
+                body = await reader.readexactly(length) if length else b""
+
+                status, payload = await self.route(method, path, body)
+                data = json.dumps(payload).encode()
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+                    .encode() + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def route(self, method, path, body):
+        if path == "/health":
+            predictor = self.watcher.predictor
+            return 200, {
+                "status": "ok",
+                "uptime_s": round(time.time() - self.started, 1),
+                "batches": self.batcher.batches,
+                "orders": self.batcher.orders,
+                "model": predictor.fingerprint[:12],
+                "cache": predictor.cache.stats() if hasattr(predictor, "cache") else None,
+            }
+        if path == "/drift":
+            if self.monitor is None:
+                return 404, {"error": "drift monitoring is disabled"}
+            return 200, self.monitor.report()
+        if path != "/predict":
+            return 404, {"error": f"unknown path {path}"}
+        if method != "POST":
+            return 405, {"error": "use POST"}
+
+        try:
+            payload = json.loads(body)
+        except json.JSONDecodeError as exc:
+            return 400, {"error": f"invalid JSON: {exc}"}
+
+        single = isinstance(payload, dict)
+        orders = [payload] if single else payload
+        try:
+            if not isinstance(orders, list):
+                raise ValueError("expected an order object or a list of them")
+            for order in orders:
+                validate_order(order)
+        except ValueError as exc:
+            return 400, {"error": f"invalid order: {exc}"}
+
+        try:
+            results = await self.batcher.submit(orders)
+        except ValueError as exc:
+            return 400, {"error": f"invalid order: {exc}"}
+        except Exception as exc:
+            # The batch failed for a server-side reason; answer rather than drop
+            return 500, {"error": f"prediction failed: {type(exc).__name__}: {exc}"}
+        return 200, results[0] if single else results
+
+
+async def serve(host, port, model_path=MODEL_PATH, max_batch=DEFAULT_MAX_BATCH,
+                max_wait_ms=DEFAULT_MAX_WAIT_MS, surface_path=None,
+                drift_publish_s=DEFAULT_DRIFT_PUBLISH_S):
+    if surface_path:
+        # Rebuilt here if it was made from another model; the compiled
+        # model answers the orders the surface does not cover
+        predictor = load_surface(model_path, surface_path)
+    else:
+        predictor = CachedPredictor(model_path)
+    monitor = DriftMonitor(load_reference(model_path)) if drift_publish_s else None
+    watcher = ModelWatcher(predictor, model_path, monitor, surface_path)
+    watcher.check()  # load and calibrate before accepting requests
+    batcher = MicroBatcher(make_predictor(watcher, monitor), max_batch, max_wait_ms)
+    app = ETAServer(batcher, watcher, monitor)
+
+    server = await asyncio.start_server(app.handle, host, port)
+    batch_task = asyncio.create_task(batcher.run())
+    watch_task = asyncio.create_task(watcher.run())
+    drift_task = None
+    if monitor is not None:
+        drift_task = asyncio.create_task(publish_drift(monitor, drift_publish_s))
+    print(f"Serving ETA predictions on http://{host}:{port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        batch_task.cancel()
+        watch_task.cancel()
+        if drift_task is not None:
+            drift_task.cancel()
+
+
+async def publish_drift(monitor, interval_s, path=DRIFT_REPORT_PATH):
+    published = 0
+    while True:
+        await asyncio.sleep(interval_s)
+        if monitor.n != published:
+            published = monitor.n
+            write_report(monitor.report(), path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-batching ETA inference service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH)
+    parser.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT_MS)
+    parser.add_argument("--surface", nargs="?", const=SURFACE_PATH, default=None,
+                        help="answer from the precomputed lookup surface")
+    parser.add_argument("--drift-publish-s", type=float, default=DEFAULT_DRIFT_PUBLISH_S,
+                        help="drift report publish interval; 0 disables drift monitoring")
+    args = parser.parse_args()
+
+    asyncio.run(serve(args.host, args.port, args.model, args.max_batch, args.max_wait_ms,
+                      args.surface, args.drift_publish_s))
+
+
+if __name__ == "__main__":
+    main()
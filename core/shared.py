@@ -0,0 +1,276 @@
+"""One read-only order table per process, shared by every dashboard session.
+
+``st.cache_data`` pickles its return value and hands every rerun of every
+session a fresh copy, so memory grows with the number of viewers.
+``SharedOrders`` is meant for ``st.cache_resource`` instead: one instance
+per process. Numeric columns are NumPy views straight over the
+memory-mapped Arrow file, so the OS page cache backs them and they are
+shared even across worker processes. Categorical columns keep Arrow's
+dictionary codes (one byte per row). Every array is flagged read-only: a
+session that tries to modify shared data gets an error instead of
+corrupting everyone else's view.
+
+``select(mask)`` returns an ``OrderView``: the shared table plus an int32
+row index. A view never copies column buffers; ``view[col]`` gathers just
+the column a computation needs, and ``frame(columns)`` materializes a small
+DataFrame for consumers that need one (plotly, groupby). Both are
+transient.
+
+``MemoryLedger`` does the accounting. It splits the table into mapped
+(file-backed) and private (heap) bytes; a table parsed from the CSV
+because the Arrow file could not be written is all private. It also
+tracks what each live session holds: a view selected for a session's
+``SessionMemory`` records its index, and every frame it materializes.
+Sessions are registered weakly so closed ones drop out on their own.
+``report`` adds the process RSS, and ``estimate`` projects it to N
+concurrent sessions. ``ledgers()`` lists the ledgers of the process for
+the diagnostics view.
+
+``python -m core.shared --sessions 200`` simulates concurrent sessions
+with random filters and prints the measured and projected footprint next
+to the per-session-copy alternative.
+"""
+
+import argparse
+import itertools
+import os
+import pickle
+import resource
+import sys
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from core.data import FINAL_ARROW, FINAL_CSV, is_mapped, load_order_table
+
+_LEDGERS = weakref.WeakSet()
+
+
+def _read_only(array):
+    array.flags.writeable = False
+    return array
+
+
+def process_rss():
+    """Current resident set size in bytes (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class SharedOrders:
+
+    def __init__(self, table, mapped=False):
+        """``mapped`` says whether ``table`` was read from a memory-mapped file."""
+        self.table = table
+        self.columns = {}
+        # name -> (bytes, mapped?)
+        self.buffers = {}
+        for name in table.column_names:
+            self.columns[name] = self._column(name, table.column(name), mapped)
+        self.ledger = MemoryLedger(self)
+
+    @classmethod
+    def load(cls, columns=None, csv_path=FINAL_CSV, arrow_path=FINAL_ARROW):
+        table = load_order_table(columns, csv_path, arrow_path)
+        return cls(table, mapped=is_mapped(csv_path, arrow_path))
+
+    def _column(self, name, column, mapped):
+        chunk = column.combine_chunks() if column.num_chunks != 1 else column.chunk(0)
+        categories = None
+        if pa.types.is_dictionary(chunk.type):
+            categories = chunk.dictionary.to_pylist()
+            chunk = chunk.indices
+        try:
+            values = chunk.to_numpy(zero_copy_only=True)
+            mapped = mapped and column.num_chunks == 1
+        except pa.ArrowInvalid:
+            # Nulls or non-primitive types: one private copy, still shared
+            values = chunk.to_numpy(zero_copy_only=False)
+            mapped = False
+        self.buffers[name] = (values.nbytes, mapped)
+        return _read_only(values), categories
+
+    def __len__(self):
+        return self.table.num_rows
+
+    def __getitem__(self, name):
+        """Whole column: a read-only array, or a ``pd.Categorical`` over the shared codes."""
+        values, categories = self.columns[name]
+        if categories is None:
+            return values
+        return pd.Categorical.from_codes(values, categories, validate=False)
+
+    def select(self, mask, memory=None):
+        """Rows where ``mask`` holds, charged to ``memory`` (a ``SessionMemory``) if given."""
+        return OrderView(self, np.flatnonzero(mask).astype(np.int32), memory)
+
+    def all(self, memory=None):
+        return OrderView(self, np.arange(len(self), dtype=np.int32), memory)
+
+    @property
+    def mapped_bytes(self):
+        return sum(n for n, mapped in self.buffers.values() if mapped)
+
+    @property
+    def private_bytes(self):
+        return sum(n for n, mapped in self.buffers.values() if not mapped)
+
+
+class OrderView:
+    """Rows of a ``SharedOrders`` selected by index; columns gathered on demand."""
+
+    def __init__(self, orders, index, memory=None):
+        self.orders = orders
+        self.index = _read_only(index)
+        self.memory = memory
+        if memory is not None:
+            memory.record("view", self.nbytes)
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def nbytes(self):
+        return self.index.nbytes
+
+    def __getitem__(self, name):
+        values, categories = self.orders.columns[name]
+        taken = values[self.index]
+        if categories is None:
+            return taken
+        return pd.Categorical.from_codes(taken, categories, validate=False)
+
+    def frame(self, columns):
+        frame = pd.DataFrame({name: self[name] for name in columns})
+        if self.memory is not None:
+            self.memory.record("frame", frame.memory_usage(deep=True).sum())
+        return frame
+
+
+# ======================================================
+# MEMORY ACCOUNTING
+# ======================================================
+
+class SessionMemory:
+    """Bytes a single session holds on top of the shared table."""
+
+    def __init__(self, key):
+        self.key = key
+        self.allocations = {}
+
+    def record(self, name, nbytes):
+        self.allocations[name] = int(nbytes)
+
+    @property
+    def nbytes(self):
+        return sum(self.allocations.values())
+
+
+class MemoryLedger:
+
+    def __init__(self, orders):
+        self.orders = orders
+        # Held strongly by the session (e.g. in st.session_state) only
+        self._sessions = weakref.WeakValueDictionary()
+        self._keys = itertools.count(1)
+        self._lock = threading.Lock()
+        _LEDGERS.add(self)
+
+    def session(self):
+        """New accounting handle; the caller keeps it alive for the session's lifetime."""
+        with self._lock:
+            memory = SessionMemory(next(self._keys))
+            self._sessions[memory.key] = memory
+        return memory
+
+    def report(self):
+        with self._lock:
+            sessions = [s.nbytes for s in self._sessions.values()]
+        return {
+            "rows": len(self.orders),
+            "shared_mapped_bytes": self.orders.mapped_bytes,
+            "shared_private_bytes": self.orders.private_bytes,
+            "sessions": len(sessions),
+            "session_bytes": sum(sessions),
+            "session_bytes_max": max(sessions, default=0),
+            "process_rss_bytes": process_rss(),
+        }
+
+    def estimate(self, sessions, per_session=None):
+        """Projected process RSS for ``sessions`` concurrent viewers.
+
+        ``per_session`` defaults to the largest live session's footprint.
+        """
+        report = self.report()
+        per_session = report["session_bytes_max"] if per_session is None else per_session
+        baseline = report["process_rss_bytes"] - report["session_bytes"]
+        return baseline + sessions * per_session
+
+
+def ledgers():
+    """Ledgers of the shared tables alive in this process."""
+    return list(_LEDGERS)
+
+
+# ======================================================
+# SIMULATION
+# ======================================================
+
+def simulate(sessions=200, columns=None, seed=0):
+    """Footprint of ``sessions`` concurrent filtered views vs per-session copies."""
+    rng = np.random.default_rng(seed)
+    orders = SharedOrders.load(columns)
+    distance = orders["distance_km"]
+
+    start = process_rss()
+    handles, views = [], []
+    for _ in range(sessions):
+        memory = orders.ledger.session()
+        view = orders.select(distance <= rng.uniform(distance.min(), distance.max()), memory)
+        handles.append(memory)
+        views.append(view)
+    shared_growth = process_rss() - start
+
+    # What st.cache_data + a boolean-mask filter costs: a copy per session
+    frame = orders.all().frame(orders.table.column_names)
+    copy_bytes = len(pickle.dumps(frame, protocol=pickle.HIGHEST_PROTOCOL))
+    filtered_bytes = int(np.mean([
+        frame.iloc[view.index].memory_usage(deep=True).sum() for view in views[:20]
+    ]))
+
+    report = orders.ledger.report()
+    report["rss_growth_bytes"] = shared_growth
+    report["copy_per_session_bytes"] = copy_bytes + filtered_bytes
+    return orders, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared order table memory accounting")
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--project", type=int, default=500,
+                        help="concurrent sessions to project the footprint for")
+    args = parser.parse_args()
+
+    orders, report = simulate(args.sessions)
+    per_session = report["session_bytes"] / max(report["sessions"], 1)
+    mib = 1024 ** 2
+    print(f"{report['rows']:,} orders: {report['shared_mapped_bytes'] / mib:.2f} MiB mapped, "
+          f"{report['shared_private_bytes'] / mib:.2f} MiB private (shared by all sessions)")
+    print(f"{report['sessions']} sessions hold {report['session_bytes'] / 1024:.1f} KiB "
+          f"({per_session / 1024:.2f} KiB each); RSS grew {report['rss_growth_bytes'] / 1024:.0f} KiB")
+    print(f"Per-session copies would cost {report['copy_per_session_bytes'] / 1024:.1f} KiB each")
+    print(f"Projected RSS for {args.project} sessions: "
+          f"{orders.ledger.estimate(args.project, per_session) / mib:.1f} MiB shared vs "
+          f"{orders.ledger.estimate(args.project, report['copy_per_session_bytes']) / mib:.1f} MiB "
+          f"with per-session copies")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""Mergeable streaming quantile sketch (KLL).
+
+A sketch keeps a bounded number of weighted samples regardless of how many
+values it has seen, and two sketches can be merged into one that summarizes
+both inputs. While nothing has been compacted yet the sketch is exact and
+answers quantiles with the same linear interpolation as pandas.
+
+Error bound: once compacted, the rank of any returned quantile is within
+``rank_error(k)`` of the requested rank (about 1.3% for the default k=200)
+with 99% confidence, independent of how many values were summarized or how
+many sketches were merged. Space is O(k) (at most ~3k retained values).
+
+Each compaction keeps the odd or the even half of a sorted level; the
+choice, and which end keeps the leftover item of an odd-sized level, are
+drawn from the sketch's own seeded ``np.random.Generator``. A fixed
+choice would always round ranks the same way and the error would grow
+with every compaction instead of averaging out. Seeding keeps reruns over
+the same data reproducible.
+
+Sketches serialize with ``to_bytes`` / ``from_bytes`` so worker processes
+can build partial sketches and the parent merges them.
+"""
+
+import math
+import struct
+
+import numpy as np
+
+DEFAULT_K = 200
+
+_HEADER = struct.Struct("<IQddI")
+
+
+def rank_error(k=DEFAULT_K):
+    """Normalized rank error at 99% confidence (empirical KLL bound)."""
+    return 2.296 / k ** 0.9723
+
+
+class KLLSketch:
+
+    def __init__(self, k=DEFAULT_K, seed=0):
+        self.k = k
+        self.rng = np.random.default_rng(seed)
+        self.n = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.levels = [np.empty(0)]
+
+    # ======================
+    # BUILDING
+    # ======================
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) <= self._capacity(level):
+                level += 1
+                continue
+
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+
+            items = np.sort(items)
+            # An odd level keeps its smallest or largest item, at random
+            if len(items) % 2 and self.rng.integers(2):
+                kept, items = items[-1:], items[:-1]
+            else:
+                kept, items = items[:len(items) % 2], items[len(items) % 2:]
+            promoted = items[self.rng.integers(2)::2]
+
+            self.levels[level] = kept
+            self.levels[level + 1] = np.concatenate(
+                [self.levels[level + 1], promoted]
+            )
+            level = 0
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return self
+
+        self.n += values.size
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        if other.k != self.k:
+            raise ValueError("Cannot merge sketches with different k")
+        if other.n == 0:
+            return self
+
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    @classmethod
+    def merged(cls, sketches, k=DEFAULT_K, seed=0):
+        result = cls(k, seed)
+        for sketch in sketches:
+            result.merge(sketch)
+        return result
+
+    # ======================
+    # SERIALIZATION
+    # ======================
+
+    def to_bytes(self):
+        sizes = np.array([len(level) for level in self.levels], dtype=np.uint32)
+        header = _HEADER.pack(self.k, self.n, self.min, self.max, len(sizes))
+        items = np.concatenate(self.levels).astype("<f8")
+        return header + sizes.astype("<u4").tobytes() + items.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data, seed=0):
+        k, n, lo, hi, depth = _HEADER.unpack_from(data)
+        offset = _HEADER.size
+        sizes = np.frombuffer(data, dtype="<u4", count=depth, offset=offset)
+        items = np.frombuffer(data, dtype="<f8", offset=offset + 4 * depth)
+
+        sketch = cls(k, seed)
+        sketch.n, sketch.min, sketch.max = n, lo, hi
+        sketch.levels = [
+            part.copy() for part in np.split(items, np.cumsum(sizes)[:-1])
+        ]
+        return sketch
+
+    # ======================
+    # QUERIES
+    # ======================
+
+    @property
+    def is_exact(self):
+        return len(self.levels) == 1
+
+    @property
+    def rank_error(self):
+        return 0.0 if self.is_exact else rank_error(self.k)
+
+    def _weighted(self):
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([
+            np.full(len(level), 2 ** h, dtype=np.int64)
+            for h, level in enumerate(self.levels)
+        ])
+        order = np.argsort(items, kind="stable")
+        return items[order], weights[order]
+
+    def quantile(self, q):
+        return self.quantiles([q])[0]
+
+    def quantiles(self, qs):
+        """Several quantiles from a single pass over the retained items."""
+        if self.n == 0:
+            return [math.nan for _ in qs]
+        if self.is_exact:
+            return [float(v) for v in np.quantile(self.levels[0], qs)]
+
+        items, weights = self._weighted()
+        cumulative = np.cumsum(weights)
+        result = []
+        for q in qs:
+            if q <= 0:
+                result.append(self.min)
+            elif q >= 1:
+                result.append(self.max)
+            else:
+                index = np.searchsorted(cumulative, q * cumulative[-1], side="left")
+                result.append(float(items[min(index, len(items) - 1)]))
+        return result
+
+    def rank(self, value):
+        """Fraction of summarized values strictly below ``value``."""
+        if self.n == 0:
+            return math.nan
+        items, weights = self._weighted()
+        below = weights[: np.searchsorted(items, value, side="left")].sum()
+        return float(below / weights.sum())
+
+    def count_at_least(self, value):
+        if self.n == 0:
+            return 0
+        return int(round(self.n * (1 - self.rank(value))))
+
+
+class SegmentSketches:
+    """One sketch per segment key; any union of segments merges on demand."""
+
+    def __init__(self, by, sketches, k=DEFAULT_K):
+        self.by = list(by)
+        self.sketches = sketches
+        self.k = k
+
+    @classmethod
+    def from_frame(cls, df, value_col, by, k=DEFAULT_K):
+        sketches = {
+            key if isinstance(key, tuple) else (key,): KLLSketch(k, seed).update(values)
+            for seed, (key, values) in enumerate(
+                df.groupby(by, observed=True, sort=True)[value_col]
+            )
+        }
+        return cls(by, sketches, k)
+
+    def merge(self, other):
+        for key, sketch in other.sketches.items():
+            if key in self.sketches:
+                self.sketches[key].merge(sketch)
+            else:
+                self.sketches[key] = KLLSketch(self.k, len(self.sketches)).merge(sketch)
+        return self
+
+    def select(self, predicate):
+        """Merged sketch of the segments whose key satisfies ``predicate(*key)``."""
+        return KLLSketch.merged(
+            (s for key, s in self.sketches.items() if predicate(*key)), self.k
+        )
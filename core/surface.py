@@ -0,0 +1,333 @@
+"""Precomputed ETA lookup surface.
+
+An offline job evaluates the model over every traffic x weather x time of
+day x vehicle combination crossed with a regular grid of distance,
+preparation time and experience years, and stores the ETAs as one float32
+array. At request time an ETA is a table lookup plus trilinear
+interpolation over the three numeric axes: no feature matrix, no trees.
+
+Experience category and distance per experience are derived from the
+numeric inputs with the training definitions, so they are not separate
+axes. Orders outside the grid (e.g. a 35 km delivery) are scored by the
+compiled model passed as ``model``, never extrapolated from the edge;
+without one they raise ``ValueError``. So are orders with a fractional
+experience below ``MODEL_BELOW_EXPERIENCE`` years: distance per
+experience is distance / years there, which no grid step interpolates
+well (a 0.1-year step still leaves a 17.6 min worst case between 0 and
+0.1 years).
+
+The trees are step functions, so interpolation error concentrates at
+split thresholds. ``measure_error`` compares the surface with the live
+model on random orders whose numeric inputs are continuous, so most fall
+between grid points, and separately on whole-number prep times and
+experience as they occur in the data. The result is stored with the
+surface; ``python -m core.surface`` prints it.
+
+``load_surface`` returns the saved surface for the current model and
+rebuilds it when the model file's fingerprint differs, so the ETA
+service (``core.serving --surface``) follows a newly published model.
+
+Usage:
+    python -m core.surface --distance-step 0.25
+"""
+
+import argparse
+import bisect
+import itertools
+import json
+import os
+import time
+
+import numpy as np
+
+from core.artifact import load_compiled
+from core.fastpath import CompiledPipeline
+from core.model import MODEL_PATH, load_model, model_fingerprint
+from core.schema import (
+    CATEGORY_LEVELS, DATA_DIR, DISTANCE, EXPERIENCE, PREP_TIME, TIME_OF_DAY,
+    TRAFFIC, VEHICLE, WEATHER,
+)
+
+SURFACE_PATH = os.path.join(DATA_DIR, "eta_surface.npz")
+
+CATEGORICAL_AXES = [TRAFFIC, WEATHER, TIME_OF_DAY, VEHICLE]
+NUMERIC_AXES = [DISTANCE, PREP_TIME, EXPERIENCE]
+
+DISTANCE_RANGE = (0.0, 20.0)
+PREP_RANGE = (5, 30)
+EXPERIENCE_RANGE = (0, 10)
+DEFAULT_DISTANCE_STEP = 0.25
+DEFAULT_SAMPLES = 200_000
+# Fractional experience below this is scored by the model (see above)
+MODEL_BELOW_EXPERIENCE = 1.0
+
+
+class ETASurface:
+
+    def __init__(self, levels, axes, values, fingerprint=None, error=None, model=None):
+        self.levels = levels
+        self.axes = axes
+        # (categorical combination, distance, prep time, experience)
+        self.values = values
+        self.fingerprint = fingerprint
+        self.error = error or {}
+        # Scores orders outside the grid
+        self.model = model
+        self._codes = [{level: i for i, level in enumerate(l)} for l in levels.values()]
+        self._axis_lists = [axis.tolist() for axis in axes.values()]
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes + sum(a.nbytes for a in self.axes.values())
+
+    # ======================
+    # BUILD
+    # ======================
+
+    @classmethod
+    def build(cls, model, fingerprint=None, distance_step=DEFAULT_DISTANCE_STEP):
+        """Evaluate ``model`` (a ``CompiledPipeline``) over the whole grid."""
+        levels = {col: list(CATEGORY_LEVELS[col]) for col in CATEGORICAL_AXES}
+        axes = {
+            DISTANCE: np.arange(
+                DISTANCE_RANGE[0], DISTANCE_RANGE[1] + distance_step / 2, distance_step
+            ),
+            PREP_TIME: np.arange(PREP_RANGE[0], PREP_RANGE[1] + 1, dtype=float),
+            EXPERIENCE: np.arange(EXPERIENCE_RANGE[0], EXPERIENCE_RANGE[1] + 1, dtype=float),
+        }
+        shape = tuple(len(a) for a in axes.values())
+        mesh = {
+            col: grid.ravel()
+            for col, grid in zip(axes, np.meshgrid(*axes.values(), indexing="ij"))
+        }
+
+        combos = list(itertools.product(*levels.values()))
+        values = np.empty((len(combos),) + shape, dtype=np.float32)
+        # One batched predict per categorical combination bounds the
+        # feature matrix to a single numeric grid.
+        for i, combo in enumerate(combos):
+            columns = {**dict(zip(CATEGORICAL_AXES, combo)), **mesh}
+            features = model.transform_columns(columns, values[i].size)
+            values[i] = model.predict(features).reshape(shape)
+        return cls(levels, axes, values, fingerprint, model=model)
+
+    def measure_error(self, model, samples=DEFAULT_SAMPLES, seed=0):
+        """Absolute error vs ``model`` on random in-grid orders.
+
+        ``off_grid`` draws every numeric input uniformly over its range, so
+        almost no order sits on a grid point. ``whole_numbers`` keeps prep
+        time and experience integral, as in the order data.
+        """
+        rng = np.random.default_rng(seed)
+        columns = {col: rng.choice(levels, samples) for col, levels in self.levels.items()}
+        columns[DISTANCE] = rng.uniform(*DISTANCE_RANGE, samples)
+        columns[PREP_TIME] = rng.uniform(*PREP_RANGE, samples)
+        columns[EXPERIENCE] = rng.uniform(*EXPERIENCE_RANGE, samples)
+
+        self.error = {"samples": samples}
+        for name in ("off_grid", "whole_numbers"):
+            if name == "whole_numbers":
+                columns[PREP_TIME] = np.round(columns[PREP_TIME])
+                columns[EXPERIENCE] = np.round(columns[EXPERIENCE])
+            truth = model.predict(model.transform_columns(columns, samples))
+            # Rows the model answers are exact, as lookup serves them
+            scored = self._model_rows(columns, samples)
+            eta = self._interpolate(columns, samples)
+            eta[scored] = truth[scored]
+            error = np.abs(eta - truth)
+            self.error[name] = {
+                "max": float(error.max()),
+                "p99": float(np.percentile(error, 99)),
+                "mean": float(error.mean()),
+                "model_share": float(scored.mean()),
+            }
+        return self.error
+
+    # ======================
+    # PERSISTENCE
+    # ======================
+
+    def save(self, path=SURFACE_PATH):
+        meta = {"levels": self.levels, "fingerprint": self.fingerprint, "error": self.error}
+        tmp = path + ".tmp.npz"
+        np.savez(
+            tmp,
+            values=self.values,
+            meta=np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8),
+            **{f"axis_{i}": axis for i, axis in enumerate(self.axes.values())},
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path=SURFACE_PATH, model=None):
+        """Saved surface; ``model`` (a ``CompiledPipeline``) scores out-of-grid orders."""
+        with np.load(path) as data:
+            meta = json.loads(data["meta"].tobytes())
+            axes = {col: data[f"axis_{i}"] for i, col in enumerate(NUMERIC_AXES)}
+            values = data["values"]
+        return cls(meta["levels"], axes, values, meta["fingerprint"], meta["error"], model)
+
+    def is_current(self, model_path=MODEL_PATH):
+        return self.fingerprint == model_fingerprint(model_path)
+
+    # ======================
+    # LOOKUP
+    # ======================
+
+    def _model_rows(self, columns, n):
+        """Rows the model scores: outside the grid, or fractional experience below a year."""
+        rows = np.zeros(n, dtype=bool)
+        for col, axis in self.axes.items():
+            x = np.broadcast_to(np.asarray(columns[col], dtype=float), (n,))
+            rows |= (x < axis[0]) | (x > axis[-1])
+        years = np.broadcast_to(np.asarray(columns[EXPERIENCE], dtype=float), (n,))
+        return rows | ((years < MODEL_BELOW_EXPERIENCE) & (years != np.round(years)))
+
+    def _out_of_grid(self):
+        ranges = ", ".join(f"{col} {axis[0]:g}-{axis[-1]:g}" for col, axis in self.axes.items())
+        return ValueError(f"order outside the surface grid ({ranges}) and no fallback model")
+
+    def _fallback(self, columns, n, rows):
+        if self.model is None:
+            raise self._out_of_grid()
+        subset = {
+            col: np.broadcast_to(np.asarray(values), (n,))[rows]
+            for col, values in columns.items()
+        }
+        return self.model.predict(self.model.transform_columns(subset, int(rows.sum())))
+
+    def lookup(self, columns, n=None):
+        """ETAs for column arrays; scalars broadcast to ``n`` rows.
+
+        In-grid rows are interpolated, the rest are scored by ``model``.
+        """
+        if n is None:
+            n = max(np.size(v) for v in columns.values())
+        outside = self._model_rows(columns, n)
+        if not outside.any():
+            return self._interpolate(columns, n)
+        eta = np.empty(n)
+        eta[outside] = self._fallback(columns, n, outside)
+        inside = ~outside
+        if inside.any():
+            eta[inside] = self._interpolate(
+                {col: np.broadcast_to(np.asarray(values), (n,))[inside]
+                 for col, values in columns.items()},
+                int(inside.sum()),
+            )
+        return eta
+
+    def _interpolate(self, columns, n):
+        codes = []
+        for col, levels in self.levels.items():
+            values = np.broadcast_to(np.asarray(columns[col]), (n,))
+            code = np.full(n, -1)
+            for i, level in enumerate(levels):
+                code[values == level] = i
+            if (code < 0).any():
+                raise ValueError(f"{col} has levels outside the surface: {levels}")
+            codes.append(code)
+        combo = np.ravel_multi_index(codes, tuple(len(l) for l in self.levels.values()))
+
+        lower, frac = [], []
+        for col, axis in self.axes.items():
+            x = np.broadcast_to(np.asarray(columns[col], dtype=float), (n,))
+            x = np.clip(x, axis[0], axis[-1])
+            i = np.clip(np.searchsorted(axis, x, side="right") - 1, 0, len(axis) - 2)
+            lower.append(i)
+            frac.append((x - axis[i]) / (axis[i + 1] - axis[i]))
+
+        eta = np.zeros(n)
+        for corner in itertools.product((0, 1), repeat=len(lower)):
+            weight = np.ones(n)
+            for bit, t in zip(corner, frac):
+                weight *= t if bit else 1 - t
+            eta += weight * self.values[(combo,) + tuple(i + b for i, b in zip(lower, corner))]
+        return eta
+
+    def predict_orders(self, orders):
+        columns = {col: [order[col] for order in orders] for col in CATEGORICAL_AXES + NUMERIC_AXES}
+        return self.lookup(columns, len(orders))
+
+    def predict_one(self, order):
+        # Scalar path: a single order is cheaper in plain Python than
+        # through the vectorized lookup's array setup.
+        combo = 0
+        for col, codes in zip(self.levels, self._codes):
+            if order[col] not in codes:
+                raise ValueError(f"{col} has levels outside the surface: {list(codes)}")
+            combo = combo * len(codes) + codes[order[col]]
+
+        years = float(order[EXPERIENCE])
+        fractional = years < MODEL_BELOW_EXPERIENCE and years != round(years)
+        lower, frac = [], []
+        for col, axis in zip(self.axes, self._axis_lists):
+            x = float(order[col])
+            if fractional or not axis[0] <= x <= axis[-1]:
+                if self.model is None:
+                    raise self._out_of_grid()
+                return float(self.model.predict_one(order))
+            i = min(max(bisect.bisect_right(axis, x) - 1, 0), len(axis) - 2)
+            lower.append(i)
+            frac.append((x - axis[i]) / (axis[i + 1] - axis[i]))
+
+        cell = self.values[combo]
+        eta = 0.0
+        for corner in itertools.product((0, 1), repeat=len(lower)):
+            weight = 1.0
+            for bit, t in zip(corner, frac):
+                weight *= t if bit else 1 - t
+            if weight:
+                eta += weight * float(cell[tuple(i + b for i, b in zip(lower, corner))])
+        return eta
+
+
+def load_surface(model_path=MODEL_PATH, path=SURFACE_PATH, model=None):
+    """Saved surface for the current model, rebuilt if missing or made from another.
+
+    ``model`` is the compiled model at ``model_path`` if the caller has it;
+    it scores the orders the surface does not cover.
+    """
+    fingerprint = model_fingerprint(model_path)
+    if model is None:
+        model = load_compiled(model_path, fingerprint)
+    if os.path.exists(path):
+        surface = ETASurface.load(path, model)
+        if surface.fingerprint == fingerprint:
+            return surface
+
+    surface = ETASurface.build(model, fingerprint)
+    surface.measure_error(model)
+    surface.save(path)
+    return surface
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the precomputed ETA lookup surface")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--output", default=SURFACE_PATH)
+    parser.add_argument("--distance-step", type=float, default=DEFAULT_DISTANCE_STEP)
+    parser.add_argument("--samples", type=int, default=DEFAULT_SAMPLES,
+                        help="random orders used to measure interpolation error")
+    args = parser.parse_args()
+
+    model = CompiledPipeline.from_pipeline(load_model(args.model))
+    start = time.perf_counter()
+    surface = ETASurface.build(model, model_fingerprint(args.model), args.distance_step)
+    built = time.perf_counter() - start
+    error = surface.measure_error(model, args.samples)
+    surface.save(args.output)
+
+    print(f"Surface {surface.values.shape} ({surface.nbytes / 1024 ** 2:.1f} MiB) "
+          f"built in {built:.1f}s -> {args.output}")
+    print(f"Abs error vs model over {error['samples']:,} in-grid orders:")
+    for name, label in (("off_grid", "continuous inputs"), ("whole_numbers", "whole prep/experience")):
+        e = error[name]
+        print(f"  {label:22s} max {e['max']:.2f} min, p99 {e['p99']:.2f} min, "
+              f"mean {e['mean']:.3f} min ({e['model_share']:.1%} scored by the model)")
+    print(f"Orders outside the grid or with fractional experience under "
+          f"{MODEL_BELOW_EXPERIENCE:g} year are scored by the model.")
+
+
+if __name__ == "__main__":
+    main()
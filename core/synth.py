@@ -0,0 +1,516 @@
+"""Synthetic orders calibrated to the real order table, for load tests.
+
+``OrderGenerator.fit`` learns from the final CSV:
+
+- the joint distribution of weather x traffic x time of day x vehicle, as
+  cell frequencies over the observed levels with a small additive
+  smoothing (``alpha``), so rare combinations still occur;
+- for distance, preparation time and experience, the distribution
+  conditional on the categorical column that explains it best (one-way
+  ANOVA), or the marginal when no column is significant at
+  ``PARENT_P_VALUE``. Integer-valued columns keep a discrete pmf over
+  their observed values; distance gets a quantile table and stays on the
+  file's 0.01 km grid;
+- a residual noise model: the loaded model's residuals on the real
+  orders, grouped into ``RESIDUAL_BINS`` quantile bins of predicted ETA and
+  resampled per bin.
+
+Rows are labelled ``delivery = round(model ETA + residual)``. Evaluating
+the trees costs about 3 µs per row, so the ETA comes from an
+``ETATable`` instead. For a fixed categorical combination, prep time and
+experience, the model is a step function of distance whose steps sit at
+its split thresholds on distance and distance per experience. The table
+stores the model's prediction for every step, evaluated once per model
+and cached by fingerprint. A label is then a table lookup that is
+identical to ``model.predict`` on the generated row (``--check``
+verifies this).
+
+Generation is vectorized on integer codes; categoricals are written as
+Arrow dictionary arrays without building strings. Output is partitioned
+and deterministic: partition ``i`` draws from ``SeedSequence(seed,
+spawn_key=(i,))``, so the files depend only on the seed and partition
+size, not on the number of workers.
+
+Usage:
+    python -m core.synth data/synthetic --rows 10000000 --seed 7
+"""
+
+import argparse
+import glob
+import hashlib
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from scipy import stats
+
+from core.artifact import TreeEnsemble, read_ubjson
+from core.data import (
+    CATEGORY_LEVELS, DATA_DIR, DELIVERY, DISTANCE, DISTANCE_PER_EXPERIENCE,
+    EXPERIENCE, EXPERIENCE_CATEGORY, FINAL_CSV, ORDER_ID, PREP_TIME,
+    TIME_OF_DAY, TRAFFIC, VEHICLE, WEATHER,
+)
+from core.fastpath import CompiledPipeline
+from core.features import distance_per_experience, experience_category
+from core.model import MODEL_PATH, load_model, model_fingerprint, prepare_features
+from core.pipeline import ordered_map
+
+ETA_TABLE_PATH = os.path.join(DATA_DIR, "synth_eta_table.npz")
+
+JOINT_COLUMNS = [WEATHER, TRAFFIC, TIME_OF_DAY, VEHICLE]
+NUMERIC_COLUMNS = [DISTANCE, PREP_TIME, EXPERIENCE]
+OUTPUT_COLUMNS = [
+    ORDER_ID, DISTANCE, WEATHER, TRAFFIC, TIME_OF_DAY, VEHICLE, PREP_TIME,
+    EXPERIENCE, DELIVERY, EXPERIENCE_CATEGORY, DISTANCE_PER_EXPERIENCE,
+]
+
+CENTS = 100
+DEFAULT_ALPHA = 0.1
+PARENT_P_VALUE = 0.01
+QUANTILES = 101
+RESIDUAL_BINS = 4
+DEFAULT_PARTITION_ROWS = 1_000_000
+FORMATS = ("parquet", "arrow")
+
+
+# ======================================================
+# CONDITIONAL SAMPLERS
+# ======================================================
+
+def _inverse_cdf(cdf, u, parent):
+    """Index drawn from row ``parent`` of ``cdf`` for uniforms ``u``, vectorized.
+
+    Row ``p`` is shifted by ``p`` so one ``searchsorted`` over the flattened
+    table serves every parent level at once.
+    """
+    levels, width = cdf.shape
+    shifted = (cdf + np.arange(levels)[:, None]).ravel()
+    index = np.searchsorted(shifted, u + parent, side="right") - parent * width
+    return np.clip(index, 0, width - 1)
+
+
+class NumericSampler:
+    """One numeric column, conditional on the codes of ``parent`` (or not)."""
+
+    def __init__(self, column, parent, support, table):
+        self.column = column
+        self.parent = parent
+        # Integer-valued: observed values, table = per-level CDF over them.
+        # Continuous (support None): table = per-level quantiles.
+        self.support = support
+        self.table = table
+
+    @classmethod
+    def fit(cls, df, column, codes, levels):
+        values = df[column].to_numpy(dtype=float)
+        parent = cls._parent(values, codes)
+        groups = (
+            [values] if parent is None
+            else [values[codes[parent] == i] for i in range(len(levels[parent]))]
+        )
+        if np.array_equal(values, np.round(values)):
+            support = np.unique(values)
+            pmf = np.array([
+                np.bincount(np.searchsorted(support, g), minlength=len(support)) for g in groups
+            ], dtype=float)
+            cdf = np.cumsum(pmf / pmf.sum(axis=1, keepdims=True), axis=1)
+            cdf[:, -1] = 1.0
+            return cls(column, parent, support, cdf)
+        probs = np.linspace(0, 1, QUANTILES)
+        return cls(column, parent, None, np.array([np.quantile(g, probs) for g in groups]))
+
+    @staticmethod
+    def _parent(values, codes):
+        best, best_p = None, PARENT_P_VALUE
+        for column, code in codes.items():
+            groups = [values[code == i] for i in np.unique(code)]
+            if len(groups) < 2:
+                continue
+            p = stats.f_oneway(*groups).pvalue
+            if p < best_p:
+                best, best_p = column, p
+        return best
+
+    @property
+    def integer(self):
+        return self.support is not None
+
+    def sample(self, u, codes):
+        """Support indices (integer columns) or values (continuous) for uniforms ``u``."""
+        parent = 0 if self.parent is None else codes[self.parent].astype(np.intp)
+        if self.integer:
+            return _inverse_cdf(self.table, u, parent)
+        width = self.table.shape[1] - 1
+        position = u * width
+        lower = np.minimum(position.astype(np.intp), width - 1)
+        flat = self.table.ravel()
+        base = parent * self.table.shape[1] + lower
+        return flat[base] + (position - lower) * (flat[base + 1] - flat[base])
+
+
+# ======================================================
+# ETA TABLE
+# ======================================================
+
+def split_thresholds(regressor, feature):
+    """Sorted float32 split thresholds the booster uses on feature ``feature``."""
+    trees = TreeEnsemble.from_model(read_ubjson(bytes(regressor.get_booster().save_raw("ubj"))))
+    splits = (trees.left >= 0) & (trees.feature == feature)
+    return np.unique(trees.threshold[splits])
+
+
+class ETATable:
+    """Exact model ETA per (combination, prep time, experience, distance step)."""
+
+    def __init__(self, key, prep_values, exp_values, cents, segment, offsets, values,
+                 fingerprint=None):
+        self.key = key
+        self.prep_values = prep_values
+        self.exp_values = exp_values
+        # Distance grid in cents: cents[0] .. cents[1] inclusive
+        self.cents = cents
+        # (experience, grid point) -> step index within that experience's block
+        self.segment = segment
+        self.offsets = offsets
+        # (combination, prep time, all experience blocks' steps)
+        self.values = values
+        self.fingerprint = fingerprint
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes + self.segment.nbytes
+
+    @classmethod
+    def build(cls, model, key, levels, prep_values, exp_values, cents, dpe_cap,
+              fingerprint=None):
+        """Evaluate ``model`` (a ``CompiledPipeline``) once per distance step."""
+        grid = np.arange(cents[0], cents[1] + 1) / CENTS
+        scaled = {column: (mean, scale, i) for column, mean, scale, i in model.scaled}
+        distance_splits = cls._splits(model, scaled, DISTANCE)
+        ratio_splits = cls._splits(model, scaled, DISTANCE_PER_EXPERIENCE)
+
+        segment = np.empty((len(exp_values), len(grid)), dtype=np.int32)
+        offsets = np.zeros(len(exp_values), dtype=np.int64)
+        representatives = []
+        for i, years in enumerate(exp_values):
+            ratio = np.minimum(distance_per_experience(grid, years), dpe_cap)
+            # Which side of every split each grid point falls on: XGBoost
+            # compares float32 features with ``x < threshold``.
+            side = np.column_stack([
+                np.searchsorted(splits, np.float32((values - mean) / scale), side="right")
+                for (mean, scale, splits), values in (
+                    (distance_splits, grid), (ratio_splits, ratio),
+                )
+            ])
+            change = np.r_[True, (np.diff(side, axis=0) != 0).any(axis=1)]
+            segment[i] = np.cumsum(change) - 1
+            offsets[i] = sum(len(r) for r in representatives)
+            representatives.append(np.flatnonzero(change))
+
+        steps = np.concatenate(representatives)
+        step_years = np.repeat(exp_values, [len(r) for r in representatives])
+        mesh = {
+            PREP_TIME: np.repeat(prep_values, len(steps)),
+            EXPERIENCE: np.tile(step_years, len(prep_values)),
+            DISTANCE: np.tile(grid[steps], len(prep_values)),
+        }
+        mesh[DISTANCE_PER_EXPERIENCE] = np.minimum(
+            distance_per_experience(mesh[DISTANCE], mesh[EXPERIENCE]), dpe_cap
+        )
+
+        combos = list(itertools.product(*levels.values()))
+        values = np.empty((len(combos), len(prep_values), len(steps)), dtype=np.float32)
+        for i, combo in enumerate(combos):
+            columns = {**dict(zip(levels, combo)), **mesh}
+            features = model.transform_columns(columns, values[i].size)
+            values[i] = model.predict(features).reshape(values[i].shape)
+        segment = segment.astype(np.min_scalar_type(segment.max()))
+        return cls(key, prep_values, exp_values, np.asarray(cents), segment, offsets,
+                   values, fingerprint)
+
+    @staticmethod
+    def _splits(model, scaled, column):
+        if column not in scaled:
+            # Not a model input: one segment
+            return 0.0, 1.0, np.empty(0, dtype=np.float32)
+        mean, scale, index = scaled[column]
+        return mean, scale, split_thresholds(model.regressor, index)
+
+    def lookup(self, combo, prep_index, exp_index, cents):
+        steps = self.offsets[exp_index] + self.segment[exp_index, cents - self.cents[0]]
+        cell = combo * len(self.prep_values) + prep_index
+        return self.values.reshape(-1)[cell * self.values.shape[2] + steps]
+
+    def save(self, path=ETA_TABLE_PATH):
+        meta = {"key": self.key, "fingerprint": self.fingerprint}
+        tmp = path + ".tmp.npz"
+        np.savez(
+            tmp,
+            prep_values=self.prep_values, exp_values=self.exp_values, cents=self.cents,
+            segment=self.segment, offsets=self.offsets, values=self.values,
+            meta=np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8),
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path=ETA_TABLE_PATH):
+        with np.load(path) as data:
+            meta = json.loads(data["meta"].tobytes())
+            arrays = {name: data[name] for name in (
+                "prep_values", "exp_values", "cents", "segment", "offsets", "values",
+            )}
+        return cls(meta["key"], **arrays, fingerprint=meta["fingerprint"])
+
+
+# ======================================================
+# GENERATOR
+# ======================================================
+
+class OrderGenerator:
+
+    def __init__(self, levels, joint_cdf, numerics, dpe_cap, residual_edges, residuals,
+                 residual_starts, delivery_range, next_id, table):
+        # Observed levels of JOINT_COLUMNS, in CATEGORY_LEVELS order
+        self.levels = levels
+        self.joint_cdf = joint_cdf
+        self.numerics = numerics
+        # The final file caps distance per experience at its IQR fence
+        self.dpe_cap = dpe_cap
+        self.residual_edges = residual_edges
+        # Residuals grouped by predicted-ETA bin; bin b is
+        # residuals[residual_starts[b]:residual_starts[b + 1]]
+        self.residuals = residuals
+        self.residual_starts = residual_starts
+        self.delivery_range = delivery_range
+        self.next_id = next_id
+        self.table = table
+
+        self._shape = tuple(len(l) for l in levels.values())
+        category_levels = CATEGORY_LEVELS[EXPERIENCE_CATEGORY]
+        self._exp_category = np.array([
+            category_levels.index(str(c)) for c in experience_category(table.exp_values)
+        ], dtype=np.int8)
+
+    @classmethod
+    def fit(cls, df, pipeline, fingerprint=None, alpha=DEFAULT_ALPHA,
+            table_path=ETA_TABLE_PATH):
+        """Learn the generator from the order table ``df`` and label with ``pipeline``."""
+        levels = {}
+        codes = {}
+        for column in JOINT_COLUMNS:
+            observed = set(df[column].astype("object"))
+            levels[column] = [level for level in CATEGORY_LEVELS[column] if level in observed]
+            codes[column] = pd.Categorical(df[column].astype("object"),
+                                           categories=levels[column]).codes
+        shape = tuple(len(l) for l in levels.values())
+        counts = np.bincount(np.ravel_multi_index(list(codes.values()), shape),
+                             minlength=int(np.prod(shape)))
+        probabilities = (counts + alpha) / (counts.sum() + alpha * counts.size)
+        joint_cdf = np.cumsum(probabilities)
+        joint_cdf[-1] = 1.0
+
+        numerics = {column: NumericSampler.fit(df, column, codes, levels)
+                    for column in NUMERIC_COLUMNS}
+        distance = df[DISTANCE].to_numpy(dtype=float)
+        cents = (int(np.rint(distance.min() * CENTS)), int(np.rint(distance.max() * CENTS)))
+        dpe_cap = float(df[DISTANCE_PER_EXPERIENCE].max())
+        table = cls._table(pipeline, fingerprint, levels, numerics, cents, dpe_cap, table_path)
+
+        eta = pipeline.predict(prepare_features(df, pipeline.feature_names_in_))
+        residual = df[DELIVERY].to_numpy(dtype=float) - eta
+        edges = np.quantile(eta, np.arange(1, RESIDUAL_BINS) / RESIDUAL_BINS)
+        bins = np.searchsorted(edges, eta, side="right")
+        order = np.argsort(bins, kind="stable")
+        starts = np.r_[0, np.cumsum(np.bincount(bins, minlength=RESIDUAL_BINS))]
+
+        delivery = df[DELIVERY].to_numpy()
+        return cls(
+            levels, joint_cdf, numerics, dpe_cap, edges, residual[order], starts,
+            (int(delivery.min()), int(delivery.max())), int(df[ORDER_ID].max()) + 1, table,
+        )
+
+    @staticmethod
+    def _table(pipeline, fingerprint, levels, numerics, cents, dpe_cap, path):
+        prep_values = numerics[PREP_TIME].support
+        exp_values = numerics[EXPERIENCE].support
+        key = hashlib.sha256(json.dumps({
+            "fingerprint": fingerprint, "levels": levels, "cents": cents, "dpe_cap": dpe_cap,
+            "prep": prep_values.tolist(), "experience": exp_values.tolist(),
+        }).encode()).hexdigest()
+        if fingerprint is not None and path and os.path.exists(path):
+            table = ETATable.load(path)
+            if table.key == key:
+                return table
+
+        table = ETATable.build(CompiledPipeline.from_pipeline(pipeline), key, levels,
+                               prep_values, exp_values, cents, dpe_cap, fingerprint)
+        if fingerprint is not None and path:
+            try:
+                table.save(path)
+            except OSError:
+                pass
+        return table
+
+    @classmethod
+    def from_files(cls, csv_path=FINAL_CSV, model_path=MODEL_PATH, **kwargs):
+        df = pd.read_csv(csv_path)
+        df.columns = df.columns.str.strip()
+        return cls.fit(df, load_model(model_path), model_fingerprint(model_path), **kwargs)
+
+    # ======================
+    # SAMPLING
+    # ======================
+
+    def sample(self, n, rng):
+        """``n`` orders as raw arrays: category codes, numeric values and the model ETA."""
+        u = rng.random((len(NUMERIC_COLUMNS) + 2, n))
+        combo = np.minimum(np.searchsorted(self.joint_cdf, u[0], side="right"),
+                           len(self.joint_cdf) - 1)
+        codes = dict(zip(self.levels, (c.astype(np.int8) for c in
+                                       np.unravel_index(combo, self._shape))))
+
+        distance = self.numerics[DISTANCE].sample(u[1], codes)
+        cents = np.clip(np.rint(distance * CENTS).astype(np.int64), *self.table.cents)
+        prep_index = self.numerics[PREP_TIME].sample(u[2], codes)
+        exp_index = self.numerics[EXPERIENCE].sample(u[3], codes)
+        eta = self.table.lookup(combo, prep_index, exp_index, cents)
+
+        bins = np.searchsorted(self.residual_edges, eta, side="right")
+        size = np.diff(self.residual_starts)[bins]
+        draw = self.residual_starts[bins] + np.minimum((u[4] * size).astype(np.int64), size - 1)
+        delivery = np.clip(np.rint(eta + self.residuals[draw]), *self.delivery_range)
+
+        distance = cents / CENTS
+        experience = self.table.exp_values[exp_index]
+        return {
+            **codes,
+            DISTANCE: distance,
+            PREP_TIME: self.table.prep_values[prep_index].astype(np.int64),
+            EXPERIENCE: experience,
+            DELIVERY: delivery.astype(np.int64),
+            EXPERIENCE_CATEGORY: self._exp_category[exp_index],
+            DISTANCE_PER_EXPERIENCE: np.minimum(
+                distance_per_experience(distance, experience), self.dpe_cap
+            ),
+            "eta": eta,
+        }
+
+    def to_table(self, columns, first_id):
+        n = len(columns[DISTANCE])
+        arrays = {ORDER_ID: pa.array(np.arange(first_id, first_id + n, dtype=np.int64))}
+        dictionaries = {**self.levels, EXPERIENCE_CATEGORY: CATEGORY_LEVELS[EXPERIENCE_CATEGORY]}
+        for column in OUTPUT_COLUMNS[1:]:
+            if column in dictionaries:
+                arrays[column] = pa.DictionaryArray.from_arrays(
+                    pa.array(columns[column]), pa.array(dictionaries[column])
+                )
+            else:
+                arrays[column] = pa.array(columns[column])
+        return pa.table(arrays)
+
+    def to_frame(self, columns):
+        return self.to_table(columns, self.next_id).to_pandas()
+
+    def partition(self, index, rows, seed, partition_rows):
+        """Partition ``index``; the same arguments always give the same rows."""
+        rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(index,)))
+        columns = self.sample(rows, rng)
+        return self.to_table(columns, self.next_id + index * partition_rows)
+
+    def check(self, pipeline, rows=100_000, seed=0):
+        """Largest difference between table ETAs and ``pipeline.predict`` on generated rows."""
+        columns = self.sample(rows, np.random.default_rng(seed))
+        frame = self.to_frame(columns)
+        eta = pipeline.predict(prepare_features(frame, pipeline.feature_names_in_))
+        return float(np.abs(eta - columns["eta"]).max())
+
+
+# ======================================================
+# OUTPUT
+# ======================================================
+
+_generator = None
+
+
+def _init_worker(generator):
+    global _generator
+    _generator = generator
+
+
+def write_partition(index, rows, seed, partition_rows, path, fmt):
+    table = _generator.partition(index, rows, seed, partition_rows)
+    if fmt == "parquet":
+        pq.write_table(table, path)
+    else:
+        with pa.OSFile(path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+    return table.num_rows
+
+
+def generate(generator, output_dir, rows, seed=0, partition_rows=DEFAULT_PARTITION_ROWS,
+             workers=1, fmt="parquet"):
+    """Write ``rows`` synthetic orders to ``output_dir/part-NNNNN.<fmt>``; returns the row count."""
+    global _generator
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown format {fmt!r}; expected one of {FORMATS}")
+    os.makedirs(output_dir, exist_ok=True)
+    for stale in glob.glob(os.path.join(output_dir, "part-*")):
+        os.remove(stale)
+
+    partitions = [
+        (i, min(partition_rows, rows - start), seed, partition_rows,
+         os.path.join(output_dir, f"part-{i:05d}.{fmt}"), fmt)
+        for i, start in enumerate(range(0, rows, partition_rows))
+    ]
+    if workers <= 1:
+        _generator = generator
+        return sum(write_partition(*p) for p in partitions)
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(generator,)
+    ) as pool:
+        return sum(ordered_map(pool, write_partition, partitions, 2 * workers))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic orders for load tests")
+    parser.add_argument("output_dir")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--partition-rows", type=int, default=DEFAULT_PARTITION_ROWS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--format", choices=FORMATS, default="parquet")
+    parser.add_argument("--alpha", type=float, default=DEFAULT_ALPHA,
+                        help="smoothing added to every categorical combination's count")
+    parser.add_argument("--input", default=FINAL_CSV)
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--check", type=int, default=0, metavar="ROWS",
+                        help="compare table ETAs with model.predict on ROWS generated orders")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    generator = OrderGenerator.from_files(args.input, args.model, alpha=args.alpha)
+    print(f"Fitted in {time.perf_counter() - start:.1f}s; ETA table "
+          f"{generator.table.values.shape} ({generator.table.nbytes / 1024 ** 2:.1f} MiB)")
+    for sampler in generator.numerics.values():
+        print(f"  {sampler.column}: conditional on {sampler.parent or 'nothing (marginal)'}")
+    if args.check:
+        error = generator.check(load_model(args.model), args.check, args.seed)
+        print(f"Max |table ETA - model.predict| over {args.check:,} orders: {error:.6f} min")
+
+    start = time.perf_counter()
+    rows = generate(generator, args.output_dir, args.rows, args.seed, args.partition_rows,
+                    args.workers, args.format)
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {rows:,} orders to {args.output_dir} in {elapsed:.2f}s "
+          f"({rows / elapsed / 1e6:.2f}M rows/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,420 @@
+"""In-process latency telemetry for the dashboard's hot paths.
+
+Pages wrap every script run in ``with run(page):`` and hot-path blocks in
+``span(name, kind)``: data loads, filters, groupbys, figure builds, model
+loads and predictions. The run ends in a ``finally``, so a script that
+raises, calls ``st.stop`` or is interrupted by a rerun never leaves a
+stale run behind for the thread's next one. ``SectionTimer``
+(``core.timing``) does both for the pages it times, so every section is
+a span too. Spans nest inside the thread's current run; Streamlit runs a
+session's script in its own thread, so concurrent sessions never mix
+their runs.
+
+Everything lands in one process-wide ``Telemetry`` registry. It holds a
+cumulative histogram per (page, kind, name) span and per (page, run
+kind) rerun, hit/miss counters for Streamlit caches wrapped with
+``cached``, and any cache registered with ``register_cache`` (e.g. the
+prediction cache's ``stats``). It also keeps the span breakdown of each
+page's last ``RECENT_RUNS`` runs. ``prometheus()`` renders it all in
+the Prometheus text format.
+
+Set ``DASHBOARD_METRICS_PORT`` to serve that text at ``/metrics`` from a
+background thread of the Streamlit process. The hidden diagnostics view
+(``?view=diagnostics`` on the home page) shows the same registry as
+tables.
+
+A span costs a few microseconds (a lock and a bisect); a page records a
+few dozen per run.
+"""
+
+import bisect
+import functools
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+FULL_RUN = "full"
+FRAGMENT_RUN = "fragment"
+
+# Span kinds
+SECTION = "section"
+LOAD = "load"
+FILTER = "filter"
+GROUPBY = "groupby"
+FIGURE = "figure"
+MODEL_LOAD = "model_load"
+PREDICT = "predict"
+
+# Upper bounds in seconds; the last bucket is +Inf
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+RECENT_RUNS = 20
+METRICS_PORT_ENV = "DASHBOARD_METRICS_PORT"
+METRICS_HOST_ENV = "DASHBOARD_METRICS_HOST"
+NO_PAGE = "-"
+
+
+class Histogram:
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        # Per bucket, not cumulative; the last one is +Inf
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.last = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+        self.last = seconds
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else 0.0
+
+    def quantile(self, q):
+        """Estimated quantile, interpolated within its bucket like ``histogram_quantile``."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if seen + n >= rank and n:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / n, self.max)
+            seen += n
+        return self.max
+
+
+class Run:
+    """One script run of a page, collecting its spans."""
+
+    def __init__(self, page, kind):
+        self.page = page
+        self.kind = kind
+        self.started = time.time()
+        self.start = time.perf_counter()
+        # [kind, name, seconds, depth]; seconds is None until the span ends
+        self.spans = []
+        self.depth = 0
+
+
+class Telemetry:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (page, kind, name) -> Histogram
+        self.spans = {}
+        # (page, run kind) -> Histogram
+        self.reruns = {}
+        # cache name -> [hits, misses]
+        self.caches = {}
+        # cache name -> callable returning a dict with "hits" and "misses"
+        self.external_caches = {}
+        # page -> deque of finished runs
+        self.recent = {}
+
+    def _histogram(self, table, key):
+        histogram = table.get(key)
+        if histogram is None:
+            histogram = table[key] = Histogram()
+        return histogram
+
+    def observe_span(self, page, kind, name, seconds):
+        with self._lock:
+            self._histogram(self.spans, (page, kind, name)).observe(seconds)
+
+    def observe_run(self, run, seconds):
+        record = {"kind": run.kind, "started": run.started, "seconds": seconds, "spans": run.spans}
+        with self._lock:
+            self._histogram(self.reruns, (run.page, run.kind)).observe(seconds)
+            self.recent.setdefault(run.page, deque(maxlen=RECENT_RUNS)).append(record)
+
+    def count_cache(self, name, hit):
+        with self._lock:
+            counts = self.caches.setdefault(name, [0, 0])
+            counts[0 if hit else 1] += 1
+
+    def register_cache(self, name, stats):
+        """Report an external cache; ``stats()`` returns at least ``hits`` and ``misses``."""
+        with self._lock:
+            self.external_caches[name] = stats
+
+    def reset(self):
+        with self._lock:
+            self.spans.clear()
+            self.reruns.clear()
+            self.recent.clear()
+            for counts in self.caches.values():
+                counts[:] = [0, 0]
+
+    # ======================
+    # VIEWS
+    # ======================
+
+    def cache_counts(self):
+        with self._lock:
+            counts = {name: tuple(c) for name, c in self.caches.items()}
+            external = dict(self.external_caches)
+        for name, stats in external.items():
+            s = stats()
+            counts[name] = (s["hits"], s["misses"])
+        return counts
+
+    def _frame(self, table, labels):
+        with self._lock:
+            rows = [
+                (*key, h.count, h.mean * 1000, h.quantile(0.5) * 1000, h.quantile(0.95) * 1000,
+                 h.max * 1000, h.last * 1000)
+                for key, h in table.items()
+            ]
+        return pd.DataFrame(rows, columns=labels + [
+            "Count", "Mean (ms)", "p50 (ms)", "p95 (ms)", "Max (ms)", "Last (ms)",
+        ])
+
+    def span_frame(self):
+        return self._frame(self.spans, ["Page", "Kind", "Span"])
+
+    def rerun_frame(self):
+        return self._frame(self.reruns, ["Page", "Run"])
+
+    def cache_frame(self):
+        rows = []
+        for name, (hits, misses) in sorted(self.cache_counts().items()):
+            lookups = hits + misses
+            rows.append((name, hits, misses, hits / lookups if lookups else 0.0))
+        return pd.DataFrame(rows, columns=["Cache", "Hits", "Misses", "Hit Rate"])
+
+    def last_run(self, page):
+        """Span breakdown of ``page``'s latest finished run, or ``None``."""
+        with self._lock:
+            runs = self.recent.get(page)
+            run = runs[-1] if runs else None
+        if run is None:
+            return None
+        frame = pd.DataFrame(
+            [(kind, "  " * depth + name, seconds * 1000)
+             for kind, name, seconds, depth in run["spans"] if seconds is not None],
+            columns=["Kind", "Span", "ms"],
+        )
+        return run, frame
+
+    def pages(self):
+        with self._lock:
+            return sorted(self.recent)
+
+    # ======================
+    # PROMETHEUS
+    # ======================
+
+    def prometheus(self):
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            spans = {key: _copy(h) for key, h in self.spans.items()}
+            reruns = {key: _copy(h) for key, h in self.reruns.items()}
+        _histogram_lines(lines, "dashboard_span_seconds",
+                         "Duration of instrumented hot-path blocks.",
+                         ("page", "kind", "name"), spans)
+        _histogram_lines(lines, "dashboard_rerun_seconds",
+                         "Duration of page script runs (full or fragment).",
+                         ("page", "run"), reruns)
+
+        lines.append("# HELP dashboard_cache_requests_total Cache lookups by result.")
+        lines.append("# TYPE dashboard_cache_requests_total counter")
+        for name, (hits, misses) in sorted(self.cache_counts().items()):
+            for result, value in (("hit", hits), ("miss", misses)):
+                lines.append(
+                    f"dashboard_cache_requests_total{_labels(('cache', 'result'), (name, result))} {value}"
+                )
+        return "\n".join(lines) + "\n"
+
+
+def _copy(histogram):
+    copy = Histogram(histogram.buckets)
+    copy.counts = list(histogram.counts)
+    copy.count, copy.sum, copy.max, copy.last = (
+        histogram.count, histogram.sum, histogram.max, histogram.last
+    )
+    return copy
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values):
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+def _histogram_lines(lines, metric, help_text, names, histograms):
+    lines.append(f"# HELP {metric} {help_text}")
+    lines.append(f"# TYPE {metric} histogram")
+    for key, h in sorted(histograms.items()):
+        cumulative = 0
+        for bound, n in zip(list(h.buckets) + ["+Inf"], h.counts):
+            cumulative += n
+            le = bound if bound == "+Inf" else repr(float(bound))
+            lines.append(f"{metric}_bucket{_labels(names + ('le',), key + (le,))} {cumulative}")
+        lines.append(f"{metric}_sum{_labels(names, key)} {h.sum!r}")
+        lines.append(f"{metric}_count{_labels(names, key)} {h.count}")
+
+
+TELEMETRY = Telemetry()
+_local = threading.local()
+
+
+# ======================================================
+# RECORDING
+# ======================================================
+
+def start_run(page, kind=FULL_RUN):
+    """Begin a run of ``page``; a fragment starting inside a full run is part of it."""
+    _start_endpoint()
+    run = getattr(_local, "run", None)
+    if kind == FRAGMENT_RUN and run is not None and run.kind == FULL_RUN:
+        return run
+    _local.run = Run(page, kind)
+    return _local.run
+
+
+def end_run(kind=FULL_RUN):
+    """Finish the thread's run; ending a fragment inside a full run is a no-op."""
+    run = getattr(_local, "run", None)
+    if run is None or (kind == FRAGMENT_RUN and run.kind == FULL_RUN):
+        return
+    _local.run = None
+    TELEMETRY.observe_run(run, time.perf_counter() - run.start)
+
+
+@contextmanager
+def run(page, kind=FULL_RUN):
+    """One script run of ``page``, ended however the script exits."""
+    start_run(page, kind)
+    try:
+        yield
+    finally:
+        end_run(kind)
+
+
+@contextmanager
+def span(name, kind=SECTION):
+    run = getattr(_local, "run", None)
+    if run is not None:
+        # Listed in start order, so a block precedes the spans nested in it
+        entry = [kind, name, None, run.depth]
+        run.spans.append(entry)
+        run.depth += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        if run is None:
+            TELEMETRY.observe_span(NO_PAGE, kind, name, seconds)
+        else:
+            run.depth -= 1
+            entry[2] = seconds
+            TELEMETRY.observe_span(run.page, kind, name, seconds)
+
+
+def register_cache(name, stats):
+    TELEMETRY.register_cache(name, stats)
+
+
+def cached(cache, kind=LOAD, name=None):
+    """``cache`` (e.g. ``st.cache_resource``) around the decorated function, with hit counting.
+
+    A call whose body runs is a miss and is timed as a ``kind`` span; any
+    other call was served from the cache.
+    """
+    def decorate(fn):
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def body(*args, **kwargs):
+            _local.misses[-1] = True
+            with span(label, kind):
+                return fn(*args, **kwargs)
+
+        cached_body = cache(body)
+
+        @functools.wraps(fn)
+        def call(*args, **kwargs):
+            if not hasattr(_local, "misses"):
+                _local.misses = []
+            # A stack: cached functions may call other cached functions
+            _local.misses.append(False)
+            try:
+                return cached_body(*args, **kwargs)
+            finally:
+                TELEMETRY.count_cache(label, hit=not _local.misses.pop())
+
+        call.clear = cached_body.clear
+        return call
+    return decorate
+
+
+# ======================================================
+# ENDPOINT
+# ======================================================
+
+class MetricsHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = TELEMETRY.prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_endpoint = None
+_endpoint_checked = False
+_endpoint_lock = threading.Lock()
+
+
+def endpoint_address():
+    """``(host, port)`` of the running ``/metrics`` server, or ``None``."""
+    return None if _endpoint is None else _endpoint.server_address[:2]
+
+
+def start_http_server(port, host="127.0.0.1"):
+    """Serve ``/metrics`` from a daemon thread; one server per process."""
+    global _endpoint
+    with _endpoint_lock:
+        if _endpoint is None:
+            _endpoint = ThreadingHTTPServer((host, port), MetricsHandler)
+            _endpoint.daemon_threads = True
+            threading.Thread(target=_endpoint.serve_forever, daemon=True).start()
+    return _endpoint
+
+
+def _start_endpoint():
+    global _endpoint_checked
+    if _endpoint_checked:
+        return
+    _endpoint_checked = True
+    port = os.environ.get(METRICS_PORT_ENV)
+    if port:
+        try:
+            start_http_server(int(port), os.environ.get(METRICS_HOST_ENV, "127.0.0.1"))
+        except OSError:
+            # Port taken (e.g. another dashboard process): keep rendering without it
+            pass
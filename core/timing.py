@@ -0,0 +1,86 @@
+"""Wall-clock timing of page sections.
+
+A page wraps each section in ``timer.section(name)`` and keeps one
+``SectionTimer`` per session (in ``st.session_state``). Every run is
+wrapped in ``timer.run(kind)``: a full script run, or a fragment rerun
+that re-executes only the sections inside an ``st.fragment``. The run is
+ended in a ``finally``, so a run that raises or is stopped cannot make the
+next fragment rerun look nested in it. The timer remembers the latest
+duration of every section and which ones the latest run rendered, so the
+page can show what a fragment rerun cost next to a full run.
+
+Given a ``page`` name, the timer also reports its runs and sections to the
+process-wide registry in ``core.telemetry``, alongside the hot-path spans
+recorded inside each section.
+"""
+
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+from core import telemetry
+from core.telemetry import FRAGMENT_RUN, FULL_RUN  # re-exported for the pages
+
+
+class SectionTimer:
+
+    def __init__(self, page=None):
+        self.page = page
+        # name -> seconds, latest measurement
+        self.last = {}
+        self.run_kind = None
+        self.rendered = []
+        self._in_full_run = False
+
+    def start_run(self, kind):
+        """Begin a run; a fragment starting inside a full run is part of it."""
+        if self.page is not None:
+            telemetry.start_run(self.page, kind)
+        if kind == FRAGMENT_RUN and self._in_full_run:
+            return
+        self.run_kind = kind
+        self.rendered = []
+        self._in_full_run = kind == FULL_RUN
+
+    def end_run(self, kind=FULL_RUN):
+        """End a run; ending a fragment inside a full run is a no-op."""
+        if self.page is not None:
+            telemetry.end_run(kind)
+        if kind == FRAGMENT_RUN and self._in_full_run:
+            return
+        self._in_full_run = False
+
+    @contextmanager
+    def run(self, kind=FULL_RUN):
+        self.start_run(kind)
+        try:
+            yield self
+        finally:
+            self.end_run(kind)
+
+    @contextmanager
+    def section(self, name):
+        start = time.perf_counter()
+        try:
+            with telemetry.span(name):
+                yield
+        finally:
+            self.last[name] = time.perf_counter() - start
+            if name not in self.rendered:
+                self.rendered.append(name)
+
+    @property
+    def run_ms(self):
+        return sum(self.last[name] for name in self.rendered) * 1000
+
+    @property
+    def full_ms(self):
+        return sum(self.last.values()) * 1000
+
+    def frame(self):
+        return pd.DataFrame({
+            "Section": list(self.last),
+            "Last Render (ms)": [round(s * 1000, 2) for s in self.last.values()],
+            "In Last Rerun": [name in self.rendered for name in self.last],
+        }).set_index("Section")
@@ -0,0 +1,221 @@
+"""Reproducible model comparison by k-fold cross-validation.
+
+Rebuilds the production preprocessing (the same ColumnTransformer the
+deployed pipeline was fitted with) in front of each candidate model family
+and cross-validates all of them on the final order table. Every
+(model, fold) pair is an independent task in a process pool; each worker
+is pinned to ``--threads`` BLAS/OpenMP threads and passes the same count
+to the models' own ``n_jobs``, so ``workers x threads`` never oversubscribes
+the machine. Folds and model seeds are fixed, so the numbers do not depend
+on the worker count.
+
+Per fold it records MAE, RMSE, fit time and predict throughput to
+``RESULTS_PATH``, which the Model Intelligence page reads. Fit times and
+throughput depend on the machine, so the file is generated, not tracked.
+The page never runs the comparison itself (that would fork the Streamlit
+server and repeat in every session that got there first); run the command
+below once per machine, and again after retraining.
+
+Usage:
+    python -m core.training --folds 5 --workers 4 --threads 1
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.model_selection import KFold
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, OrdinalEncoder, StandardScaler
+from threadpoolctl import threadpool_limits
+from xgboost import XGBRegressor
+
+from core.data import (
+    DATA_DIR, DELIVERY, DISTANCE, DISTANCE_PER_EXPERIENCE, EXPERIENCE,
+    EXPERIENCE_CATEGORY, PREP_TIME, TIME_OF_DAY, TRAFFIC, VEHICLE, WEATHER,
+    load_orders,
+)
+from core.model import prepare_features
+from core.pipeline import ordered_map
+
+RESULTS_PATH = os.path.join(DATA_DIR, "model_comparison.csv")
+
+DEFAULT_FOLDS = 5
+SEED = 42
+
+# Input order of the deployed pipeline (its feature_names_in_)
+FEATURES = [
+    DISTANCE, WEATHER, TRAFFIC, TIME_OF_DAY, VEHICLE, PREP_TIME, EXPERIENCE,
+    EXPERIENCE_CATEGORY, DISTANCE_PER_EXPERIENCE,
+]
+
+# Encoder vocabularies exactly as fitted in the deployed pipeline
+ORDINAL_LEVELS = {
+    TRAFFIC: ["Low", "Medium", "High"],
+    EXPERIENCE_CATEGORY: ["Newbie", "Intermediate", "Expert"],
+}
+ONEHOT_LEVELS = {
+    WEATHER: ["Clear", "Rainy", "Snowy", "Windy", "Foggy"],
+    TIME_OF_DAY: ["Evening", "Afternoon", "Morning", "Night"],
+    VEHICLE: ["Scooter", "Bike", "Car", "Motorcycle"],
+}
+SCALED = [DISTANCE, PREP_TIME, EXPERIENCE, DISTANCE_PER_EXPERIENCE]
+
+# Hyperparameters of the deployed XGBoost model
+XGB_PARAMS = dict(
+    n_estimators=200, max_depth=3, learning_rate=0.05, subsample=0.8,
+    colsample_bytree=0.6, gamma=0.1, random_state=SEED,
+)
+
+MODELS = ["Linear Regression", "Random Forest", "Gradient Boosting", "XGBoost"]
+
+_data = None
+_thread_limits = None
+
+
+# ======================================================
+# PIPELINES
+# ======================================================
+
+def build_preprocessor():
+    return ColumnTransformer([
+        ("ordinal", OrdinalEncoder(
+            categories=list(ORDINAL_LEVELS.values()),
+            handle_unknown="use_encoded_value", unknown_value=-1,
+        ), list(ORDINAL_LEVELS)),
+        ("onehot", OneHotEncoder(
+            categories=list(ONEHOT_LEVELS.values()),
+            drop="first", handle_unknown="ignore",
+        ), list(ONEHOT_LEVELS)),
+        ("scale", StandardScaler(), SCALED),
+    ])
+
+
+def build_model(name, n_jobs=1):
+    if name == "Linear Regression":
+        return LinearRegression()
+    if name == "Random Forest":
+        return RandomForestRegressor(random_state=SEED, n_jobs=n_jobs)
+    if name == "Gradient Boosting":
+        return GradientBoostingRegressor(random_state=SEED)
+    if name == "XGBoost":
+        return XGBRegressor(**XGB_PARAMS, n_jobs=n_jobs)
+    raise ValueError(f"unknown model {name!r}")
+
+
+def build_pipeline(name="XGBoost", n_jobs=1):
+    return Pipeline([
+        ("preprocessor", build_preprocessor()),
+        ("model", build_model(name, n_jobs)),
+    ])
+
+
+def training_data(df=None):
+    """Model inputs and delivery-time target from the order table."""
+    df = load_orders() if df is None else df
+    return prepare_features(df, FEATURES), df[DELIVERY].to_numpy(dtype=float)
+
+
+# ======================================================
+# WORKER
+# ======================================================
+
+def _init_worker(features, target, threads):
+    global _data, _thread_limits
+    _thread_limits = threadpool_limits(limits=threads)
+    _data = (features, target, threads)
+
+
+def evaluate_fold(name, fold, train, test):
+    features, target, threads = _data
+    pipeline = build_pipeline(name, n_jobs=threads)
+
+    start = time.perf_counter()
+    pipeline.fit(features.iloc[train], target[train])
+    fit_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    predicted = pipeline.predict(features.iloc[test])
+    predict_s = time.perf_counter() - start
+
+    error = predicted - target[test]
+    return {
+        "model": name,
+        "fold": fold,
+        "mae": float(np.abs(error).mean()),
+        "rmse": float(np.sqrt((error ** 2).mean())),
+        "fit_s": fit_s,
+        "predict_rows_per_s": len(test) / predict_s,
+        "n_train": len(train),
+        "n_test": len(test),
+    }
+
+
+# ======================================================
+# DRIVER
+# ======================================================
+
+def run(folds=DEFAULT_FOLDS, workers=None, threads=1, models=MODELS, df=None):
+    """Cross-validate every model family; one row per (model, fold)."""
+    features, target = training_data(df)
+    splits = list(KFold(folds, shuffle=True, random_state=SEED).split(features))
+    tasks = [(name, i, train, test) for name in models for i, (train, test) in enumerate(splits)]
+
+    workers = workers or max(1, min(len(tasks), (os.cpu_count() or 1) // threads))
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(features, target, threads),
+    ) as pool:
+        rows = list(ordered_map(pool, evaluate_fold, tasks, 2 * workers))
+    return pd.DataFrame(rows)
+
+
+def summarize(results):
+    """Mean and spread per model, best MAE first."""
+    summary = results.groupby("model", sort=False).agg(
+        mae=("mae", "mean"),
+        mae_std=("mae", "std"),
+        rmse=("rmse", "mean"),
+        fit_s=("fit_s", "mean"),
+        predict_rows_per_s=("predict_rows_per_s", "median"),
+    )
+    return summary.sort_values("mae")
+
+
+def save_results(results, path=RESULTS_PATH):
+    tmp = path + ".tmp"
+    results.to_csv(tmp, index=False)
+    os.replace(tmp, path)
+
+
+def load_results(path=RESULTS_PATH):
+    """Saved comparison; generate it with ``python -m core.training``."""
+    return pd.read_csv(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cross-validated model comparison")
+    parser.add_argument("--folds", type=int, default=DEFAULT_FOLDS)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--threads", type=int, default=1,
+                        help="BLAS/OpenMP threads per worker")
+    parser.add_argument("--output", default=RESULTS_PATH)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = run(args.folds, args.workers, args.threads)
+    save_results(results, args.output)
+
+    print(summarize(results).round(3).to_string())
+    print(f"{len(results)} fits in {time.perf_counter() - start:.1f}s -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
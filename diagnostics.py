@@ -0,0 +1,149 @@
+import streamlit as st
+
+from core.shared import ledgers
+from core.telemetry import METRICS_PORT_ENV, TELEMETRY, endpoint_address
+
+
+def _size(nbytes):
+    for unit in ("B", "KiB", "MiB"):
+        if nbytes < 1024:
+            return f"{nbytes:.0f} {unit}" if unit == "B" else f"{nbytes:.1f} {unit}"
+        nbytes /= 1024
+    return f"{nbytes:.1f} GiB"
+
+
+def render():
+    """Hidden diagnostics view: open the home page with ``?view=diagnostics``."""
+
+    # ======================
+    # HEADER
+    # ======================
+    st.title("🩺 Dashboard Diagnostics")
+    st.caption(
+        "Latency of every instrumented block in this server process since it started, "
+        "across all sessions. Not listed in the sidebar."
+    )
+
+    reruns = TELEMETRY.rerun_frame()
+    spans = TELEMETRY.span_frame()
+    caches = TELEMETRY.cache_frame()
+
+    lookups = caches["Hits"].sum() + caches["Misses"].sum()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Page Runs Recorded", f"{int(reruns['Count'].sum()):,}")
+    col2.metric("Instrumented Blocks", f"{len(spans):,}")
+    col3.metric("Cache Hit Rate", f"{caches['Hits'].sum() / lookups:.1%}" if lookups else "–")
+    address = endpoint_address()
+    col4.metric(
+        "Metrics Endpoint",
+        f"{address[0]}:{address[1]}/metrics" if address else "off",
+        help=f"Set {METRICS_PORT_ENV} before starting Streamlit to serve Prometheus metrics",
+    )
+
+    if st.button("Reset Measurements"):
+        TELEMETRY.reset()
+        st.rerun()
+
+    st.divider()
+
+    # ======================
+    # RERUN LATENCY
+    # ======================
+    st.header("⏱ Rerun Latency by Page")
+
+    if reruns.empty:
+        st.info("No page has run in this process yet. Open a dashboard page, then come back.")
+    else:
+        reruns = reruns.sort_values("p95 (ms)", ascending=False)
+        st.dataframe(reruns.round(2), use_container_width=True, hide_index=True)
+
+        # Opens on the page with the slowest reruns
+        pages = TELEMETRY.pages()
+        page = st.selectbox("Latest Run Breakdown", pages,
+                            index=pages.index(reruns["Page"].iloc[0]))
+        run, breakdown = TELEMETRY.last_run(page)
+        st.caption(
+            f"{run['kind']} run · {run['seconds'] * 1000:.1f} ms total · "
+            f"indented blocks ran inside the block above them"
+        )
+        st.dataframe(breakdown.round(2), use_container_width=True, hide_index=True)
+
+    st.divider()
+
+    # ======================
+    # SLOWEST SECTIONS
+    # ======================
+    st.header("🐢 Slowest Sections")
+
+    if not spans.empty:
+        kinds = st.multiselect("Block Kinds", sorted(spans["Kind"].unique()))
+        if kinds:
+            spans = spans[spans["Kind"].isin(kinds)]
+        limit = st.slider("Rows", 5, 50, 15)
+        st.dataframe(
+            spans.sort_values("p95 (ms)", ascending=False).head(limit).round(2),
+            use_container_width=True, hide_index=True,
+        )
+        st.caption("Percentiles are estimated from histogram buckets, as Prometheus does.")
+
+    st.divider()
+
+    # ======================
+    # CACHES
+    # ======================
+    st.header("🗃 Cache Hit Rates")
+
+    if caches.empty:
+        st.info("No cache lookups recorded yet.")
+    else:
+        st.dataframe(
+            caches.style.format({"Hit Rate": "{:.1%}"}),
+            use_container_width=True, hide_index=True,
+        )
+
+    st.divider()
+
+    # ======================
+    # SHARED ORDER MEMORY
+    # ======================
+    st.header("🧠 Shared Order Memory")
+
+    tables = ledgers()
+    if not tables:
+        st.info("No shared order table is loaded yet. Open Courier Performance Analysis, "
+                "then come back.")
+    else:
+        sessions = st.number_input("Project RSS for Concurrent Sessions", 1, 10_000, 500)
+        for ledger in tables:
+            report = ledger.report()
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("Shared Rows", f"{report['rows']:,}")
+            col2.metric(
+                "Mapped / Private",
+                f"{_size(report['shared_mapped_bytes'])} / "
+                f"{_size(report['shared_private_bytes'])}",
+                help="Mapped bytes are backed by the Arrow file in the OS page cache",
+            )
+            col3.metric(
+                "Live Sessions",
+                f"{report['sessions']:,}",
+                f"{_size(report['session_bytes'])} held",
+                delta_color="off",
+            )
+            col4.metric(
+                "Process RSS",
+                _size(report["process_rss_bytes"]),
+                f"{_size(ledger.estimate(sessions))} at {sessions:,} sessions",
+                delta_color="off",
+            )
+        st.caption("Sessions hold row indexes and the frames they materialize; "
+                   "the projection uses the largest live session.")
+
+    # ======================
+    # PROMETHEUS
+    # ======================
+    with st.expander("Prometheus Exposition"):
+        text = TELEMETRY.prometheus()
+        st.download_button("Download metrics.txt", text, file_name="metrics.txt",
+                           mime="text/plain")
+        st.code(text, language="text")
@@ -2,278 +2,328 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 
-st.set_page_config(layout="wide")
-
-# ======================================================
-# PAGE TITLE — EXECUTIVE HIERARCHY
-# ======================================================
-
-st.title("📊 Executive Operational Intelligence Dashboard")
-
-st.markdown("""
-This Executive Dashboard functions as the strategic command center
-for monitoring delivery performance across the food logistics ecosystem.
-
-Rather than presenting isolated metrics,
-this interface synthesizes operational data into
-decision-grade intelligence.
-
-Executives require clarity on systemic efficiency,
-risk concentration,
-and environmental sensitivity —
-not fragmented analytics.
-""")
-
-st.divider()
-
-# ======================================================
-# LOAD DATA
-# ======================================================
-
-@st.cache_data
-def load_data():
-    df = pd.read_csv("data/Food_Delivery_Times_final.csv")
-    return df
-
-df = load_data()
-
-# ======================================================
-# DATA STRUCTURE ALIGNMENT
-# ======================================================
-
-delivery_col = "delivery_time_min"
-distance_col = "distance_km"
-traffic_col = "traffic_level"
-weather_col = "weather"
-time_col = "time_of_day"
-
-# ======================================================
-# STRATEGIC SCOPE CONTROL
-# ======================================================
-
-st.header("🎛 Strategic Scope Control")
-
-st.markdown("""
-This control panel allows executive-level scope adjustment
-to evaluate structural performance sensitivity
-under different operational conditions.
-
-The objective is not granular filtering —
-but strategic scenario framing.
-""")
-
-col1, col2, col3 = st.columns(3)
-
-selected_time = col1.selectbox(
-    "Time Segment",
-    ["All"] + sorted(df[time_col].unique().tolist())
-)
-
-selected_traffic = col2.selectbox(
-    "Traffic Level",
-    ["All"] + sorted(df[traffic_col].unique().tolist())
-)
+from core.data import load_orders
+from core import telemetry
+from core.orderlog import OrderLog
+from core.telemetry import FILTER, GROUPBY
+from core.timing import FRAGMENT_RUN, FULL_RUN, SectionTimer
 
-selected_weather = col3.selectbox(
-    "Weather Condition",
-    ["All"] + sorted(df[weather_col].unique().tolist())
-)
-
-# Apply Filters
-filtered_df = df.copy()
-
-if selected_time != "All":
-    filtered_df = filtered_df[filtered_df[time_col] == selected_time]
-
-if selected_traffic != "All":
-    filtered_df = filtered_df[filtered_df[traffic_col] == selected_traffic]
-
-if selected_weather != "All":
-    filtered_df = filtered_df[filtered_df[weather_col] == selected_weather]
-
-st.divider()
-
-# ======================================================
-# KPI CALCULATIONS
-# ======================================================
-
-avg_delivery = round(filtered_df[delivery_col].mean(), 2)
-
-late_threshold = 40
-late_rate = round((filtered_df[delivery_col] > late_threshold).mean() * 100, 2)
+st.set_page_config(layout="wide")
 
-avg_distance = round(filtered_df[distance_col].mean(), 2)
+# Latest render time of every section, kept per session so a fragment
+# rerun can be compared with a full run
+timer = st.session_state.setdefault("executive_dashboard_timer", SectionTimer("executive"))
+with timer.run(FULL_RUN):
+    # ======================================================
+    # PAGE TITLE — EXECUTIVE HIERARCHY
+    # ======================================================
+
+    with timer.section("Title & context"):
+        st.title("📊 Executive Operational Intelligence Dashboard")
+
+        st.markdown("""
+    This Executive Dashboard functions as the strategic command center
+    for monitoring delivery performance across the food logistics ecosystem.
+
+    Rather than presenting isolated metrics,
+    this interface synthesizes operational data into
+    decision-grade intelligence.
+
+    Executives require clarity on systemic efficiency,
+    risk concentration,
+    and environmental sensitivity —
+    not fragmented analytics.
+    """)
 
-if len(filtered_df) > 0:
-    peak_period = (
-        filtered_df.groupby(time_col)[delivery_col]
-        .mean()
-        .sort_values(ascending=False)
-        .index[0]
-    )
-else:
-    peak_period = "N/A"
+        st.divider()
+
+    # ======================================================
+    # LOAD DATA
+    # ======================================================
+
+    @telemetry.cached(st.cache_resource)
+    def load_order_log(late_threshold):
+        return OrderLog.open(
+            late_threshold=late_threshold,
+            seed=lambda: load_orders([
+                "delivery_time_min",
+                "distance_km",
+                "traffic_level",
+                "weather",
+                "time_of_day",
+                "vehicle_type",
+            ]),
+        )
+
+    late_threshold = 40
+
+    order_log = load_order_log(late_threshold)
+
+    # ======================================================
+    # SCOPE-DEPENDENT SECTIONS
+    # ======================================================
+
+    # Every section below depends on the scope selectboxes, so they form one
+    # fragment with explicit inputs: changing a selectbox reruns only this
+    # function, not the page header, data loading or the closing synthesis.
+    @st.fragment
+    def scope_sections(order_log, late_threshold, timer):
+        with timer.run(FRAGMENT_RUN):
+            # Aggregates are maintained incrementally as orders are appended to the
+            # log; a rerun only folds in segments written since the previous one.
+            with timer.section("Order log refresh"):
+                order_log.refresh()
+                cube = order_log.cube
+
+            # ======================================================
+            # DATA STRUCTURE ALIGNMENT
+            # ======================================================
+
+            delivery_col = "delivery_time_min"
+            distance_col = "distance_km"
+            traffic_col = "traffic_level"
+            weather_col = "weather"
+            time_col = "time_of_day"
+
+            # ======================================================
+            # STRATEGIC SCOPE CONTROL
+            # ======================================================
+
+            with timer.section("Scope control"):
+                st.header("🎛 Strategic Scope Control")
+
+                st.markdown("""
+        This control panel allows executive-level scope adjustment
+        to evaluate structural performance sensitivity
+        under different operational conditions.
+
+        The objective is not granular filtering —
+        but strategic scenario framing.
+        """)
+
+                col1, col2, col3 = st.columns(3)
+
+                selected_time = col1.selectbox(
+                    "Time Segment",
+                    ["All"] + cube.values(time_col)
+                )
+
+                selected_traffic = col2.selectbox(
+                    "Traffic Level",
+                    ["All"] + cube.values(traffic_col)
+                )
+
+                selected_weather = col3.selectbox(
+                    "Weather Condition",
+                    ["All"] + cube.values(weather_col)
+                )
+
+                # Apply Filters (rolled up from pre-aggregated cube cells)
+                with telemetry.span("scope filter", FILTER):
+                    scope = cube.scope(**{
+                        time_col: selected_time,
+                        traffic_col: selected_traffic,
+                        weather_col: selected_weather,
+                    })
+
+                st.divider()
+
+            # ======================================================
+            # KPI CALCULATIONS
+            # ======================================================
+
+            with timer.section("Core KPIs"):
+                avg_delivery = round(scope.mean, 2)
+
+                late_rate = round(scope.late_rate * 100, 2)
+
+                avg_distance = round(scope.mean_distance, 2)
+
+                if scope.count > 0:
+                    with telemetry.span("mean by time of day", GROUPBY):
+                        peak_period = (
+                            scope.mean_by(time_col)
+                            .sort_values(ascending=False)
+                            .index[0]
+                        )
+                else:
+                    peak_period = "N/A"
+
+                # ======================================================
+                # CORE PERFORMANCE INDICATORS
+                # ======================================================
+
+                st.header("📌 Core Performance Indicators")
+
+                col1, col2, col3, col4 = st.columns(4)
+
+                col1.metric("Average Delivery Time (minutes)", avg_delivery)
+                col2.metric("Late Delivery Rate (%)", late_rate)
+                col3.metric("Peak Risk Time Segment", peak_period)
+                col4.metric("Average Delivery Distance (km)", avg_distance)
+
+                st.markdown(f"""
+        Interpretation:
+
+        • Average delivery time under selected scope: **{avg_delivery} minutes**  
+        • Deliveries exceeding {late_threshold} minutes: **{late_rate}%**  
+        • Highest delay concentration occurs during: **{peak_period}**  
+        • Average delivery radius: **{avg_distance} km**
+
+        These metrics dynamically adapt
+        to the selected strategic scope,
+        allowing executive-level sensitivity evaluation.
+        """)
 
-# ======================================================
-# CORE PERFORMANCE INDICATORS
-# ======================================================
+                st.divider()
 
-st.header("📌 Core Performance Indicators")
+            # ======================================================
+            # TIME SEGMENT ANALYSIS
+            # ======================================================
 
-col1, col2, col3, col4 = st.columns(4)
+            with timer.section("Time-of-day distribution"):
+                st.header("📈 Time-of-Day Performance Distribution")
 
-col1.metric("Average Delivery Time (minutes)", avg_delivery)
-col2.metric("Late Delivery Rate (%)", late_rate)
-col3.metric("Peak Risk Time Segment", peak_period)
-col4.metric("Average Delivery Distance (km)", avg_distance)
+                if scope.count > 0:
+                    with telemetry.span("mean by time of day trend", GROUPBY):
+                        time_trend = (
+                            scope.mean_by(time_col)
+                            .sort_values()
+                        )
+                    st.bar_chart(time_trend)
+                else:
+                    st.warning("No data available for selected filter combination.")
 
-st.markdown(f"""
-Interpretation:
+                st.markdown("""
+        Temporal clustering reveals structural demand pressure patterns.
 
-• Average delivery time under selected scope: **{avg_delivery} minutes**  
-• Deliveries exceeding {late_threshold} minutes: **{late_rate}%**  
-• Highest delay concentration occurs during: **{peak_period}**  
-• Average delivery radius: **{avg_distance} km**
+        Evening and peak windows typically exhibit
+        increased systemic stress.
+
+        Strategic capacity alignment
+        should prioritize high-volatility periods.
+        """)
+
+                st.divider()
+
+            # ======================================================
+            # TRAFFIC IMPACT ANALYSIS
+            # ======================================================
 
-These metrics dynamically adapt
-to the selected strategic scope,
-allowing executive-level sensitivity evaluation.
-""")
+            with timer.section("Traffic impact"):
+                st.header("🚦 Traffic Impact Intelligence")
 
-st.divider()
+                if scope.count > 0:
+                    with telemetry.span("mean by traffic", GROUPBY):
+                        traffic_analysis = (
+                            scope.mean_by(traffic_col)
+                            .sort_values()
+                        )
+                    st.bar_chart(traffic_analysis)
 
-# ======================================================
-# TIME SEGMENT ANALYSIS
-# ======================================================
+                st.markdown("""
+        Traffic congestion introduces nonlinear delay expansion.
 
-st.header("📈 Time-of-Day Performance Distribution")
+        High congestion levels often trigger
+        disproportionate performance degradation.
 
-if len(filtered_df) > 0:
-    time_trend = (
-        filtered_df.groupby(time_col)[delivery_col]
-        .mean()
-        .sort_values()
-    )
-    st.bar_chart(time_trend)
-else:
-    st.warning("No data available for selected filter combination.")
+        Embedding predictive traffic modeling
+        into ETA systems enhances resilience.
+        """)
 
-st.markdown("""
-Temporal clustering reveals structural demand pressure patterns.
+                st.divider()
 
-Evening and peak windows typically exhibit
-increased systemic stress.
+            # ======================================================
+            # WEATHER SENSITIVITY ANALYSIS
+            # ======================================================
 
-Strategic capacity alignment
-should prioritize high-volatility periods.
-""")
+            with timer.section("Weather sensitivity"):
+                st.header("🌧 Weather Sensitivity Overview")
 
-st.divider()
+                if scope.count > 0:
+                    with telemetry.span("mean by weather", GROUPBY):
+                        weather_analysis = (
+                            scope.mean_by(weather_col)
+                            .sort_values()
+                        )
+                    st.bar_chart(weather_analysis)
 
-# ======================================================
-# TRAFFIC IMPACT ANALYSIS
-# ======================================================
+                st.markdown("""
+        Environmental volatility amplifies uncertainty.
 
-st.header("🚦 Traffic Impact Intelligence")
+        Adverse weather increases delay dispersion,
+        affecting reliability and courier safety.
 
-if len(filtered_df) > 0:
-    traffic_analysis = (
-        filtered_df.groupby(traffic_col)[delivery_col]
-        .mean()
-        .sort_values()
-    )
-    st.bar_chart(traffic_analysis)
+        Proactive environmental modeling
+        reduces structural inefficiency.
+        """)
 
-st.markdown("""
-Traffic congestion introduces nonlinear delay expansion.
+                st.divider()
 
-High congestion levels often trigger
-disproportionate performance degradation.
+            # ======================================================
+            # COMPOUNDED RISK EXPOSURE
+            # ======================================================
 
-Embedding predictive traffic modeling
-into ETA systems enhances resilience.
-""")
+            with timer.section("Compounded risk"):
+                st.header("⚠️ Compounded Environmental Risk Exposure")
 
-st.divider()
+                if scope.count > 0:
+                    with telemetry.span("compounded risk filter", FILTER):
+                        high_risk = scope.where(**{
+                            traffic_col: "High",
+                            weather_col: [w for w in cube.values(weather_col) if w != "Clear"],
+                        })
 
-# ======================================================
-# WEATHER SENSITIVITY ANALYSIS
-# ======================================================
+                    risk_rate = round(high_risk.count / scope.count * 100, 2)
 
-st.header("🌧 Weather Sensitivity Overview")
+                    st.markdown(f"""
+            Under the selected scope,
+            **{risk_rate}%** of deliveries occur under compounded stress conditions
+            (High Traffic + Non-Clear Weather).
 
-if len(filtered_df) > 0:
-    weather_analysis = (
-        filtered_df.groupby(weather_col)[delivery_col]
-        .mean()
-        .sort_values()
-    )
-    st.bar_chart(weather_analysis)
+            These scenarios disproportionately contribute to:
+            • Delay escalation  
+            • Compensation exposure  
+            • Operational fatigue  
 
-st.markdown("""
-Environmental volatility amplifies uncertainty.
+            Predictive mitigation strategies
+            should prioritize this segment.
+            """)
+                else:
+                    st.warning("No data available for compounded risk calculation.")
 
-Adverse weather increases delay dispersion,
-affecting reliability and courier safety.
+                st.divider()
 
-Proactive environmental modeling
-reduces structural inefficiency.
-""")
+            with st.expander("⏱ Section Render Times"):
+                st.caption(
+                    f"Last rerun ({timer.run_kind}): {len(timer.rendered)} of {len(timer.last)} "
+                    f"sections in {timer.run_ms:.1f} ms · full page ≈ {timer.full_ms:.1f} ms"
+                )
+                st.dataframe(timer.frame(), use_container_width=True)
 
-st.divider()
+    scope_sections(order_log, late_threshold, timer)
 
-# ======================================================
-# COMPOUNDED RISK EXPOSURE
-# ======================================================
+    # ======================================================
+    # EXECUTIVE SYNTHESIS
+    # ======================================================
 
-st.header("⚠️ Compounded Environmental Risk Exposure")
+    with timer.section("Executive synthesis"):
+        st.header("💡 Executive Synthesis")
 
-if len(filtered_df) > 0:
-    high_risk = filtered_df[
-        (filtered_df[traffic_col] == "High") &
-        (filtered_df[weather_col] != "Clear")
-    ]
+        st.markdown("""
+    This dashboard establishes a dynamic executive decision layer.
 
-    risk_rate = round(len(high_risk) / len(filtered_df) * 100, 2)
+    By adjusting strategic scope,
+    leadership can evaluate:
 
-    st.markdown(f"""
-    Under the selected scope,
-    **{risk_rate}%** of deliveries occur under compounded stress conditions
-    (High Traffic + Non-Clear Weather).
+    • Environmental sensitivity  
+    • Temporal volatility  
+    • Structural congestion impact  
+    • System-wide delay elasticity  
 
-    These scenarios disproportionately contribute to:
-    • Delay escalation  
-    • Compensation exposure  
-    • Operational fatigue  
+    The objective is not only operational visibility —
+    but forward-looking strategic optimization.
 
-    Predictive mitigation strategies
-    should prioritize this segment.
+    This module forms the foundational layer
+    of the broader Food Delivery Intelligence System.
     """)
-else:
-    st.warning("No data available for compounded risk calculation.")
-
-st.divider()
-
-# ======================================================
-# EXECUTIVE SYNTHESIS
-# ======================================================
-
-st.header("💡 Executive Synthesis")
-
-st.markdown("""
-This dashboard establishes a dynamic executive decision layer.
-
-By adjusting strategic scope,
-leadership can evaluate:
-
-• Environmental sensitivity  
-• Temporal volatility  
-• Structural congestion impact  
-• System-wide delay elasticity  
-
-The objective is not only operational visibility —
-but forward-looking strategic optimization.
-
-This module forms the foundational layer
-of the broader Food Delivery Intelligence System.
-""")
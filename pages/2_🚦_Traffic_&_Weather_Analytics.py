@@ -2,291 +2,337 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 
-st.set_page_config(layout="wide")
-
-# ======================================================
-# PAGE TITLE & STRATEGIC CONTEXT
-# ======================================================
-
-st.title("🚦 Traffic & Weather Analytics")
-
-st.markdown("""
-This module isolates environmental performance drivers
-that structurally influence delivery efficiency.
-
-While operational logistics determine baseline execution,
-external volatility — traffic density and weather instability —
-introduces nonlinear delay amplification.
-
-This layer transforms environmental noise
-into measurable structural intelligence.
-""")
-
-st.divider()
-
-# ======================================================
-# LOAD DATA
-# ======================================================
-
-@st.cache_data
-def load_data():
-    return pd.read_csv("data/Food_Delivery_Times_final.csv")
-
-df = load_data()
-
-delivery_col = "delivery_time_min"
-traffic_col = "traffic_level"
-weather_col = "weather"
-time_col = "time_of_day"
-
-# ======================================================
-# BASELINE CALCULATION (Low Traffic + Clear Weather)
-# ======================================================
-
-baseline_df = df[
-    (df[traffic_col] == "Low") &
-    (df[weather_col] == "Clear")
-]
-
-baseline_mean = baseline_df[delivery_col].mean()
-
-# ======================================================
-# ENVIRONMENTAL SCOPE CONTROL
-# ======================================================
-
-st.header("🎛 Environmental Scope Control")
-
-col1, col2, col3 = st.columns(3)
-
-selected_time = col1.selectbox(
-    "Time Segment",
-    ["All"] + sorted(df[time_col].unique().tolist())
-)
+from core.cube import OrderCube
+from core import telemetry
+from core.data import load_orders
+from core.telemetry import FIGURE, FILTER, GROUPBY
+from core.timing import FRAGMENT_RUN, FULL_RUN, SectionTimer
 
-selected_traffic = col2.selectbox(
-    "Traffic Level",
-    ["All"] + sorted(df[traffic_col].unique().tolist())
-)
-
-selected_weather = col3.selectbox(
-    "Weather Condition",
-    ["All"] + sorted(df[weather_col].unique().tolist())
-)
-
-filtered_df = df.copy()
-
-if selected_time != "All":
-    filtered_df = filtered_df[filtered_df[time_col] == selected_time]
-
-if selected_traffic != "All":
-    filtered_df = filtered_df[filtered_df[traffic_col] == selected_traffic]
-
-if selected_weather != "All":
-    filtered_df = filtered_df[filtered_df[weather_col] == selected_weather]
-
-st.divider()
-
-# ======================================================
-# KPI ROW – ENVIRONMENTAL PERFORMANCE SNAPSHOT
-# ======================================================
-
-st.header("📊 Environmental Performance Snapshot")
-
-if len(filtered_df) > 0:
-
-    avg_delay = round(filtered_df[delivery_col].mean(), 2)
-    volatility = round(filtered_df[delivery_col].std(), 2)
-
-    # STRUCTURAL ESCALATION RISK (vs baseline)
-    if pd.notna(baseline_mean) and baseline_mean != 0:
-        structural_risk = round(
-            ((avg_delay - baseline_mean) / baseline_mean) * 100,
-            2
-        )
-    else:
-        structural_risk = 0
-
-    # PERFORMANCE RISK (Top 25% Slowest Deliveries)
-    threshold = filtered_df[delivery_col].quantile(0.75)
-    performance_risk = round(
-        len(filtered_df[filtered_df[delivery_col] >= threshold])
-        / len(filtered_df) * 100,
-        2
-    )
-
-    col1, col2, col3, col4 = st.columns(4)
-
-    col1.metric("Average Delivery Time (min)", avg_delay)
-    col2.metric("Volatility (Std Dev)", volatility)
-    col3.metric("Structural Escalation (%)", f"{structural_risk}%")
-    col4.metric("Performance Risk (%)", f"{performance_risk}%")
-
-else:
-    st.warning("No data available for selected scope.")
-
-st.divider()
+st.set_page_config(layout="wide")
 
-# ======================================================
-# TRAFFIC INTELLIGENCE
-# ======================================================
+# Latest render time of every section, kept per session so a fragment
+# rerun can be compared with a full run
+timer = st.session_state.setdefault("traffic_weather_timer", SectionTimer("traffic_weather"))
+with timer.run(FULL_RUN):
+    # ======================================================
+    # PAGE TITLE & STRATEGIC CONTEXT
+    # ======================================================
+
+    with timer.section("Title & context"):
+        st.title("🚦 Traffic & Weather Analytics")
+
+        st.markdown("""
+    This module isolates environmental performance drivers
+    that structurally influence delivery efficiency.
+
+    While operational logistics determine baseline execution,
+    external volatility — traffic density and weather instability —
+    introduces nonlinear delay amplification.
+
+    This layer transforms environmental noise
+    into measurable structural intelligence.
+    """)
+
+        st.divider()
+
+    # ======================================================
+    # LOAD DATA
+    # ======================================================
+
+    @telemetry.cached(st.cache_resource)
+    def load_cube():
+        return OrderCube.from_frame(load_orders([
+            "delivery_time_min",
+            "distance_km",
+            "traffic_level",
+            "weather",
+            "time_of_day",
+            "vehicle_type",
+        ]))
+
+    cube = load_cube()
+
+    delivery_col = "delivery_time_min"
+    traffic_col = "traffic_level"
+    weather_col = "weather"
+    time_col = "time_of_day"
+
+    # ======================================================
+    # BASELINE CALCULATION (Low Traffic + Clear Weather)
+    # ======================================================
+
+    with telemetry.span("baseline filter", FILTER):
+        baseline_scope = cube.scope(**{
+            traffic_col: "Low",
+            weather_col: "Clear",
+        })
+
+    baseline_mean = baseline_scope.mean
+
+    # ======================================================
+    # SCOPE-DEPENDENT SECTIONS
+    # ======================================================
+
+    # Every section below depends on the scope selectboxes, so they form one
+    # fragment with explicit inputs: changing a selectbox reruns only this
+    # function, not the page header, cube loading or the closing synthesis.
+    @st.fragment
+    def scope_sections(cube, baseline_mean, timer):
+        with timer.run(FRAGMENT_RUN):
+            # ======================================================
+            # ENVIRONMENTAL SCOPE CONTROL
+            # ======================================================
+
+            with timer.section("Scope control"):
+                st.header("🎛 Environmental Scope Control")
+
+                col1, col2, col3 = st.columns(3)
+
+                selected_time = col1.selectbox(
+                    "Time Segment",
+                    ["All"] + cube.values(time_col)
+                )
+
+                selected_traffic = col2.selectbox(
+                    "Traffic Level",
+                    ["All"] + cube.values(traffic_col)
+                )
+
+                selected_weather = col3.selectbox(
+                    "Weather Condition",
+                    ["All"] + cube.values(weather_col)
+                )
+
+                with telemetry.span("scope filter", FILTER):
+                    scope = cube.scope(**{
+                        time_col: selected_time,
+                        traffic_col: selected_traffic,
+                        weather_col: selected_weather,
+                    })
+
+                st.divider()
+
+            # ======================================================
+            # KPI ROW – ENVIRONMENTAL PERFORMANCE SNAPSHOT
+            # ======================================================
+
+            with timer.section("Performance snapshot"):
+                st.header("📊 Environmental Performance Snapshot")
+
+                if scope.count > 0:
+
+                    avg_delay = round(scope.mean, 2)
+                    volatility = round(scope.std, 2)
+
+                    # STRUCTURAL ESCALATION RISK (vs baseline)
+                    if pd.notna(baseline_mean) and baseline_mean != 0:
+                        structural_risk = round(
+                            ((avg_delay - baseline_mean) / baseline_mean) * 100,
+                            2
+                        )
+                    else:
+                        structural_risk = 0
+
+                    # PERFORMANCE RISK (Top 25% Slowest Deliveries)
+                    with telemetry.span("delivery sketch merge", GROUPBY):
+                        delivery_sketch = scope.sketch()
+                    threshold = delivery_sketch.quantile(0.75)
+                    performance_risk = round(
+                        delivery_sketch.count_at_least(threshold)
+                        / scope.count * 100,
+                        2
+                    )
+
+                    col1, col2, col3, col4 = st.columns(4)
+
+                    col1.metric("Average Delivery Time (min)", avg_delay)
+                    col2.metric("Volatility (Std Dev)", volatility)
+                    col3.metric("Structural Escalation (%)", f"{structural_risk}%")
+                    col4.metric("Performance Risk (%)", f"{performance_risk}%")
 
-st.header("🚦 Traffic Density Intelligence")
+                else:
+                    st.warning("No data available for selected scope.")
+
+                st.divider()
+
+            # ======================================================
+            # TRAFFIC INTELLIGENCE
+            # ======================================================
+
+            with timer.section("Traffic intelligence"):
+                st.header("🚦 Traffic Density Intelligence")
+
+                if scope.count > 0:
 
-if len(filtered_df) > 0:
+                    with telemetry.span("traffic aggregates", GROUPBY):
+                        traffic_analysis = (
+                            scope.aggregate(traffic_col, ["mean", "median", "std", "count"])
+                            .sort_values("mean")
+                        )
+
+                    st.dataframe(traffic_analysis, use_container_width=True)
 
-    traffic_analysis = (
-        filtered_df.groupby(traffic_col)[delivery_col]
-        .agg(["mean", "median", "std", "count"])
-        .sort_values("mean")
-    )
+                    with telemetry.span("traffic bar chart", FIGURE):
+                        fig_traffic = px.bar(
+                            traffic_analysis.reset_index(),
+                            x=traffic_col,
+                            y="mean",
+                            text_auto=True
+                        )
 
-    st.dataframe(traffic_analysis, use_container_width=True)
+                    st.plotly_chart(fig_traffic, use_container_width=True)
 
-    fig_traffic = px.bar(
-        traffic_analysis.reset_index(),
-        x=traffic_col,
-        y="mean",
-        text_auto=True
-    )
+                    st.markdown("""
+        Congestion introduces asymmetric performance degradation.
 
-    st.plotly_chart(fig_traffic, use_container_width=True)
+        • Mean delivery time escalates under high density  
+        • Variability widens, signaling unstable execution  
+        • Volume clustering amplifies systemic stress  
 
-    st.markdown("""
-Congestion introduces asymmetric performance degradation.
+        Congestion elasticity must be embedded
+        within predictive ETA systems.
+        """)
 
-• Mean delivery time escalates under high density  
-• Variability widens, signaling unstable execution  
-• Volume clustering amplifies systemic stress  
+                st.divider()
 
-Congestion elasticity must be embedded
-within predictive ETA systems.
-""")
+            # ======================================================
+            # WEATHER INTELLIGENCE
+            # ======================================================
 
-st.divider()
+            with timer.section("Weather intelligence"):
+                st.header("🌧 Weather Sensitivity Intelligence")
 
-# ======================================================
-# WEATHER INTELLIGENCE
-# ======================================================
+                if scope.count > 0:
 
-st.header("🌧 Weather Sensitivity Intelligence")
+                    with telemetry.span("weather aggregates", GROUPBY):
+                        weather_analysis = (
+                            scope.aggregate(weather_col, ["mean", "median", "std", "count"])
+                            .sort_values("mean")
+                        )
 
-if len(filtered_df) > 0:
+                    st.dataframe(weather_analysis, use_container_width=True)
 
-    weather_analysis = (
-        filtered_df.groupby(weather_col)[delivery_col]
-        .agg(["mean", "median", "std", "count"])
-        .sort_values("mean")
-    )
+                    with telemetry.span("weather bar chart", FIGURE):
+                        fig_weather = px.bar(
+                            weather_analysis.reset_index(),
+                            x=weather_col,
+                            y="mean",
+                            text_auto=True
+                        )
 
-    st.dataframe(weather_analysis, use_container_width=True)
+                    st.plotly_chart(fig_weather, use_container_width=True)
 
-    fig_weather = px.bar(
-        weather_analysis.reset_index(),
-        x=weather_col,
-        y="mean",
-        text_auto=True
-    )
+                    st.markdown("""
+        Environmental volatility amplifies operational uncertainty.
 
-    st.plotly_chart(fig_weather, use_container_width=True)
+        Weather does not operate independently —
+        its interaction with congestion compounds delay escalation.
+        """)
 
-    st.markdown("""
-Environmental volatility amplifies operational uncertainty.
+                st.divider()
 
-Weather does not operate independently —
-its interaction with congestion compounds delay escalation.
-""")
+            # ======================================================
+            # TRAFFIC × WEATHER INTERACTION
+            # ======================================================
 
-st.divider()
+            with timer.section("Interaction matrix"):
+                st.header("⚠️ Compounded Environmental Interaction Matrix")
 
-# ======================================================
-# TRAFFIC × WEATHER INTERACTION
-# ======================================================
+                if scope.count > 0:
 
-st.header("⚠️ Compounded Environmental Interaction Matrix")
+                    with telemetry.span("mean by traffic x weather", GROUPBY):
+                        interaction_matrix = (
+                            scope.mean_by([traffic_col, weather_col])
+                            .reset_index()
+                        )
 
-if len(filtered_df) > 0:
+                    with telemetry.span("interaction heatmap", FIGURE):
+                        fig_heatmap = px.density_heatmap(
+                            interaction_matrix,
+                            x=traffic_col,
+                            y=weather_col,
+                            z=delivery_col,
+                            text_auto=True
+                        )
 
-    interaction_matrix = (
-        filtered_df.groupby([traffic_col, weather_col])[delivery_col]
-        .mean()
-        .reset_index()
-    )
+                    st.plotly_chart(fig_heatmap, use_container_width=True)
 
-    fig_heatmap = px.density_heatmap(
-        interaction_matrix,
-        x=traffic_col,
-        y=weather_col,
-        z=delivery_col,
-        text_auto=True
-    )
+                    st.markdown("""
+        Compounded environmental states
+        generate nonlinear delay expansion.
 
-    st.plotly_chart(fig_heatmap, use_container_width=True)
+        These intersections represent disproportionate:
 
-    st.markdown("""
-Compounded environmental states
-generate nonlinear delay expansion.
+        • Compensation exposure  
+        • Customer dissatisfaction  
+        • Operational fragility  
 
-These intersections represent disproportionate:
+        Mitigation must prioritize compounded volatility,
+        not isolated factors.
+        """)
 
-• Compensation exposure  
-• Customer dissatisfaction  
-• Operational fragility  
+                st.divider()
 
-Mitigation must prioritize compounded volatility,
-not isolated factors.
-""")
+            # ======================================================
+            # RISK INTERPRETATION LAYER
+            # ======================================================
 
-st.divider()
+            with timer.section("Risk interpretation"):
+                st.header("📊 Risk Interpretation Layer")
 
-# ======================================================
-# RISK INTERPRETATION LAYER
-# ======================================================
+                if scope.count > 0:
 
-st.header("📊 Risk Interpretation Layer")
+                    st.markdown(f"""
+        Within the selected analytical scope:
 
-if len(filtered_df) > 0:
+        • **Structural Escalation:** {structural_risk}%  
+          (Performance increase relative to stable baseline)
 
-    st.markdown(f"""
-Within the selected analytical scope:
+        • **Performance Risk:** {performance_risk}%  
+          (Top 25% slowest deliveries)
 
-• **Structural Escalation:** {structural_risk}%  
-  (Performance increase relative to stable baseline)
+        Structural escalation measures vulnerability.
+        Performance risk captures realized severity.
 
-• **Performance Risk:** {performance_risk}%  
-  (Top 25% slowest deliveries)
+        The divergence between these indicators
+        reveals system resilience capacity.
+        """)
 
-Structural escalation measures vulnerability.
-Performance risk captures realized severity.
+                st.divider()
 
-The divergence between these indicators
-reveals system resilience capacity.
-""")
+            with st.expander("⏱ Section Render Times"):
+                st.caption(
+                    f"Last rerun ({timer.run_kind}): {len(timer.rendered)} of {len(timer.last)} "
+                    f"sections in {timer.run_ms:.1f} ms · full page ≈ {timer.full_ms:.1f} ms"
+                )
+                st.dataframe(timer.frame(), use_container_width=True)
 
-st.divider()
+    scope_sections(cube, baseline_mean, timer)
 
-# ======================================================
-# EXECUTIVE SYNTHESIS
-# ======================================================
+    # ======================================================
+    # EXECUTIVE SYNTHESIS
+    # ======================================================
 
-st.header("💡 Executive Environmental Synthesis")
+    with timer.section("Executive synthesis"):
+        st.header("💡 Executive Environmental Synthesis")
 
-st.markdown("""
-This module elevates environmental monitoring
-from descriptive observation
-to structured risk modeling.
+        st.markdown("""
+    This module elevates environmental monitoring
+    from descriptive observation
+    to structured risk modeling.
 
-It establishes:
+    It establishes:
 
-• Baseline-relative escalation measurement  
-• Congestion elasticity profiling  
-• Weather sensitivity quantification  
-• Compounded volatility detection  
+    • Baseline-relative escalation measurement  
+    • Congestion elasticity profiling  
+    • Weather sensitivity quantification  
+    • Compounded volatility detection  
 
-By embedding environmental intelligence
-into dispatch allocation systems,
-organizations transition from reactive correction
-to anticipatory optimization.
+    By embedding environmental intelligence
+    into dispatch allocation systems,
+    organizations transition from reactive correction
+    to anticipatory optimization.
 
-This strengthens systemic resilience
-within the Food Delivery Intelligence Platform.
-""")
+    This strengthens systemic resilience
+    within the Food Delivery Intelligence Platform.
+    """)
@@ -1,17 +1,25 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
 import numpy as np
 
+from core import telemetry
+from core.shared import SharedOrders
+from core.grid import PrefixGrid
+from core.sketch import SegmentSketches
+from core.telemetry import FIGURE, FILTER, GROUPBY
+
 st.set_page_config(layout="wide")
 
-# ======================================================
-# PAGE TITLE & STRATEGIC CONTEXT
-# ======================================================
+with telemetry.run("courier"):
+    # ======================================================
+    # PAGE TITLE & STRATEGIC CONTEXT
+    # ======================================================
 
-st.title("🏍 Courier Performance Analysis")
+    st.title("🏍 Courier Performance Analysis")
 
-st.markdown("""
+    st.markdown("""
 This module evaluates operational execution variability
 within the delivery intelligence system.
 
@@ -27,114 +35,206 @@ enables predictive allocation
 and systemic volatility reduction.
 """)
 
-st.divider()
-
-# ======================================================
-# LOAD DATA
-# ======================================================
-
-@st.cache_data
-def load_data():
-    df = pd.read_csv("data/Food_Delivery_Times_final.csv")
-    df.columns = df.columns.str.strip()
-    return df
-
-df = load_data()
-
-delivery_col = "delivery_time_min"
-experience_col = "courier_experience_yrs"
-distance_col = "distance_km"
-prep_col = "preparation_time_min"
-exp_category_col = "courier_experience_category"
-
-# ======================================================
-# PERFORMANCE SCOPE CONTROL
-# ======================================================
-
-st.header("🎛 Courier Performance Scope Control")
-
-col1, col2 = st.columns(2)
-
-min_experience = col1.slider(
-    "Minimum Courier Experience (Years)",
-    0, int(df[experience_col].max()), 0
-)
+    st.divider()
+
+    # ======================================================
+    # LOAD DATA
+    # ======================================================
+
+    # One read-only table per process, shared by every session: columns are
+    # views over the memory-mapped Arrow file, never per-session copies.
+    @telemetry.cached(st.cache_resource)
+    def load_data():
+        return SharedOrders.load([
+            "delivery_time_min",
+            "courier_experience_yrs",
+            "distance_km",
+            "preparation_time_min",
+            "courier_experience_category",
+        ])
+
+    df = load_data()
+
+    if "order_memory" not in st.session_state:
+        st.session_state.order_memory = df.ledger.session()
+
+    delivery_col = "delivery_time_min"
+    experience_col = "courier_experience_yrs"
+    distance_col = "distance_km"
+    prep_col = "preparation_time_min"
+    exp_category_col = "courier_experience_category"
+
+    # One delivery-time sketch per (whole experience year, whole km) segment:
+    # any slider position selects a union of segments, merged on demand.
+    @telemetry.cached(st.cache_resource)
+    def load_delay_sketches():
+        df = load_data()
+        segments = pd.DataFrame({
+            "experience_floor": np.floor(df[experience_col]),
+            "distance_ceil": np.ceil(df[distance_col]),
+            delivery_col: df[delivery_col],
+        })
+        return SegmentSketches.from_frame(
+            segments, delivery_col, ["experience_floor", "distance_ceil"]
+        )
+
+    delay_sketches = load_delay_sketches()
+
+    # Summed-area table over (experience, whole km) so slider moves are lookups
+    DELIVERY_BIN_MIN = 5
+
+    @telemetry.cached(st.cache_resource)
+    def load_courier_grid():
+        df = load_data()
+        delivery = np.asarray(df[delivery_col], dtype=float)
+        distance = np.asarray(df[distance_col], dtype=float)
+        return PrefixGrid.from_arrays(
+            df[experience_col],
+            np.ceil(distance),
+            {
+                "total": delivery,
+                "total_sq": delivery ** 2,
+                "ratio": distance / delivery,
+                "distance": distance,
+                "distance_sq": distance ** 2,
+                "distance_delivery": distance * delivery,
+            },
+            histograms={
+                "delivery": (
+                    delivery,
+                    np.arange(0, delivery.max() + DELIVERY_BIN_MIN, DELIVERY_BIN_MIN),
+                ),
+            },
+        )
+
+    courier_grid = load_courier_grid()
+
+    # Same rectangle queries, one grid per experience category, so the
+    # category profile never goes back to the order rows either
+    @telemetry.cached(st.cache_resource)
+    def load_category_grids():
+        df = load_data()
+        category = df[exp_category_col]
+        experience = np.asarray(df[experience_col], dtype=float)
+        distance = np.ceil(np.asarray(df[distance_col], dtype=float))
+        delivery = np.asarray(df[delivery_col], dtype=float)
+        grids = {}
+        for code, level in enumerate(category.categories):
+            rows = category.codes == code
+            if rows.any():
+                grids[level] = PrefixGrid.from_arrays(
+                    experience[rows], distance[rows], {"total": delivery[rows]}
+                )
+        return grids
+
+    category_grids = load_category_grids()
+
+    @telemetry.cached(st.cache_data)
+    def slider_bounds():
+        df = load_data()
+        return int(df[experience_col].max()), int(df[distance_col].max())
+
+    experience_max, distance_max = slider_bounds()
+
+    # ======================================================
+    # PERFORMANCE SCOPE CONTROL
+    # ======================================================
+
+    st.header("🎛 Courier Performance Scope Control")
+
+    col1, col2 = st.columns(2)
+
+    min_experience = col1.slider(
+        "Minimum Courier Experience (Years)",
+        0, experience_max, 0
+    )
 
-max_distance = col2.slider(
-    "Maximum Delivery Distance (km)",
-    0, int(df[distance_col].max()), int(df[distance_col].max())
-)
+    max_distance = col2.slider(
+        "Maximum Delivery Distance (km)",
+        0, distance_max, distance_max
+    )
 
-filtered_df = df[
-    (df[experience_col] >= min_experience) &
-    (df[distance_col] <= max_distance)
-]
+    with telemetry.span("scope filter", FILTER):
+        scope_totals = courier_grid.totals(min_experience, max_distance)
+        scope_count = int(scope_totals["count"])
 
-st.divider()
+    st.divider()
 
-# ======================================================
-# KPI ROW – EXECUTION SNAPSHOT
-# ======================================================
+    # ======================================================
+    # KPI ROW – EXECUTION SNAPSHOT
+    # ======================================================
 
-st.header("📊 Execution Performance Snapshot")
+    st.header("📊 Execution Performance Snapshot")
 
-if len(filtered_df) > 0:
+    if scope_count > 0:
 
-    avg_delivery = round(filtered_df[delivery_col].mean(), 2)
-    volatility = round(filtered_df[delivery_col].std(), 2)
+        avg_delivery = round(scope_totals["total"] / scope_count, 2)
+        volatility = round(np.sqrt(
+            (scope_totals["total_sq"] - scope_totals["total"] ** 2 / scope_count)
+            / (scope_count - 1)
+        ), 2) if scope_count > 1 else np.nan
 
-    threshold = filtered_df[delivery_col].quantile(0.75)
-    high_delay_risk = round(
-        len(filtered_df[filtered_df[delivery_col] >= threshold])
-        / len(filtered_df) * 100,
-        2
-    )
+        with telemetry.span("delay sketch merge", GROUPBY):
+            delay_sketch = delay_sketches.select(
+                lambda exp, dist: exp >= min_experience and dist <= max_distance
+            )
+        threshold = delay_sketch.quantile(0.75)
+        high_delay_risk = round(
+            delay_sketch.count_at_least(threshold)
+            / delay_sketch.n * 100,
+            2
+        )
 
-    productivity_ratio = round(
-        (filtered_df[distance_col] / filtered_df[delivery_col]).mean(),
-        3
-    )
+        productivity_ratio = round(scope_totals["ratio"] / scope_count, 3)
 
-    col1, col2, col3, col4 = st.columns(4)
+        col1, col2, col3, col4 = st.columns(4)
 
-    col1.metric("Average Delivery Time (min)", avg_delivery)
-    col2.metric("Execution Volatility (Std Dev)", volatility)
-    col3.metric("High Delay Exposure (%)", high_delay_risk)
-    col4.metric("Distance Productivity Ratio", productivity_ratio)
+        col1.metric("Average Delivery Time (min)", avg_delivery)
+        col2.metric("Execution Volatility (Std Dev)", volatility)
+        col3.metric("High Delay Exposure (%)", high_delay_risk)
+        col4.metric("Distance Productivity Ratio", productivity_ratio)
 
-else:
-    st.warning("No data available for selected scope.")
+    else:
+        st.warning("No data available for selected scope.")
 
-st.divider()
+    st.divider()
 
-# ======================================================
-# EXPERIENCE ELASTICITY MODELING
-# ======================================================
+    # ======================================================
+    # EXPERIENCE ELASTICITY MODELING
+    # ======================================================
 
-st.header("🎓 Experience Elasticity Modeling")
+    st.header("🎓 Experience Elasticity Modeling")
 
-if len(filtered_df) > 0:
+    if scope_count > 0:
 
-    experience_analysis = (
-        filtered_df.groupby(experience_col)[delivery_col]
-        .agg(["mean", "std", "count"])
-        .reset_index()
-        .sort_values(by=experience_col)
-    )
+        with telemetry.span("stats by experience", GROUPBY):
+            experience_rows = courier_grid.by_row(
+                min_experience, max_distance, name=experience_col
+            )
+            row_count = experience_rows["count"]
+            experience_analysis = pd.DataFrame({
+                "mean": experience_rows["total"] / row_count,
+                "std": np.sqrt(
+                    (experience_rows["total_sq"] - experience_rows["total"] ** 2 / row_count)
+                    / (row_count - 1)
+                ).where(row_count > 1),
+                "count": row_count.astype(int),
+            }).reset_index()
 
-    st.dataframe(experience_analysis, use_container_width=True)
+        st.dataframe(experience_analysis, use_container_width=True)
 
-    fig_exp = px.line(
-        experience_analysis,
-        x=experience_col,
-        y="mean",
-        markers=True,
-        title="Delivery Time vs Experience Level"
-    )
+        with telemetry.span("experience line chart", FIGURE):
+            fig_exp = px.line(
+                experience_analysis,
+                x=experience_col,
+                y="mean",
+                markers=True,
+                title="Delivery Time vs Experience Level"
+            )
 
-    st.plotly_chart(fig_exp, use_container_width=True)
+        st.plotly_chart(fig_exp, use_container_width=True)
 
-    st.markdown("""
+        st.markdown("""
 Experience demonstrates measurable execution elasticity.
 
 • Senior couriers stabilize delivery duration  
@@ -144,27 +244,73 @@ Experience demonstrates measurable execution elasticity.
 Experience-aware allocation reduces systemic delay probability.
 """)
 
-st.divider()
-
-# ======================================================
-# DISTANCE ELASTICITY ANALYSIS
-# ======================================================
-
-st.header("📍 Distance Elasticity vs Execution")
-
-if len(filtered_df) > 0:
-
-    fig_scatter = px.scatter(
-        filtered_df,
-        x=distance_col,
-        y=delivery_col,
-        trendline="ols",
-        title="Distance Elasticity Coefficient"
-    )
-
-    st.plotly_chart(fig_scatter, use_container_width=True)
-
-    st.markdown("""
+    st.divider()
+
+    # ======================================================
+    # DISTANCE ELASTICITY ANALYSIS
+    # ======================================================
+
+    st.header("📍 Distance Elasticity vs Execution")
+
+    # Slices larger than this are drawn as a server-side density grid
+    SCATTER_POINT_LIMIT = 5000
+
+    if scope_count > 0:
+
+        # Closed-form OLS from the grid's sufficient statistics
+        sum_x, sum_y = scope_totals["distance"], scope_totals["total"]
+        sum_xx, sum_xy = scope_totals["distance_sq"], scope_totals["distance_delivery"]
+        denominator = scope_count * sum_xx - sum_x ** 2
+        slope = (scope_count * sum_xy - sum_x * sum_y) / denominator if denominator else 0.0
+        intercept = (sum_y - slope * sum_x) / scope_count
+
+        with telemetry.span("distance x delivery histogram", GROUPBY):
+            distance_keys, delivery_edges, density = courier_grid.histogram(
+                "delivery", min_experience, max_distance
+            )
+        occupied = distance_keys[density.sum(axis=1) > 0]
+        x_line = np.array([occupied[0] - 1, occupied[-1]], dtype=float)
+
+        with telemetry.span("distance scatter", FIGURE):
+            if scope_count <= SCATTER_POINT_LIMIT:
+                # Small slices only: a row index into the shared table, so the
+                # O(rows) mask is never built while the slice is drawn as a grid
+                with telemetry.span("scatter rows", FILTER):
+                    scatter_view = df.select(
+                        (df[experience_col] >= min_experience) &
+                        (df[distance_col] <= max_distance),
+                        st.session_state.order_memory,
+                    )
+                fig_scatter = px.scatter(
+                    scatter_view.frame([distance_col, delivery_col]),
+                    x=distance_col,
+                    y=delivery_col,
+                    title="Distance Elasticity Coefficient"
+                )
+            else:
+                fig_scatter = go.Figure(go.Heatmap(
+                    x=distance_keys - 0.5,
+                    y=(delivery_edges[:-1] + delivery_edges[1:]) / 2,
+                    z=density.T,
+                    colorscale="Blues",
+                    colorbar={"title": "Orders"}
+                ))
+                fig_scatter.update_layout(
+                    title="Distance Elasticity Coefficient",
+                    xaxis_title=distance_col,
+                    yaxis_title=delivery_col
+                )
+
+            fig_scatter.add_trace(go.Scatter(
+                x=x_line,
+                y=intercept + slope * x_line,
+                mode="lines",
+                name=f"OLS trend ({slope:.2f} min/km)"
+            ))
+
+        st.plotly_chart(fig_scatter, use_container_width=True)
+
+        st.markdown("""
 Delivery time scales with distance,
 but slope elasticity varies across experience segments.
 
@@ -178,35 +324,47 @@ Elasticity modeling enables:
 • Long-distance risk mitigation  
 """)
 
-st.divider()
-
-# ======================================================
-# EXPERIENCE CATEGORY PROFILING
-# ======================================================
-
-st.header("🧩 Experience Category Profiling")
-
-if len(filtered_df) > 0:
-
-    category_analysis = (
-        filtered_df.groupby(exp_category_col)[delivery_col]
-        .mean()
-        .reset_index()
-        .sort_values(by=delivery_col)
-    )
-
-    st.dataframe(category_analysis, use_container_width=True)
-
-    fig_cat = px.bar(
-        category_analysis,
-        x=exp_category_col,
-        y=delivery_col,
-        title="Average Delivery Time by Experience Category"
-    )
-
-    st.plotly_chart(fig_cat, use_container_width=True)
-
-    st.markdown("""
+    st.divider()
+
+    # ======================================================
+    # EXPERIENCE CATEGORY PROFILING
+    # ======================================================
+
+    st.header("🧩 Experience Category Profiling")
+
+    if scope_count > 0:
+
+        with telemetry.span("mean by experience category", GROUPBY):
+            category_totals = {
+                level: grid.totals(min_experience, max_distance)
+                for level, grid in category_grids.items()
+            }
+            category_analysis = (
+                pd.DataFrame({
+                    exp_category_col: list(category_totals),
+                    delivery_col: [t["total"] / t["count"] if t["count"] else np.nan
+                                   for t in category_totals.values()],
+                    "count": [t["count"] for t in category_totals.values()],
+                })
+                .query("count > 0")
+                .drop(columns="count")
+                .reset_index(drop=True)
+                .sort_values(by=delivery_col)
+            )
+
+        st.dataframe(category_analysis, use_container_width=True)
+
+        with telemetry.span("experience category bar chart", FIGURE):
+            fig_cat = px.bar(
+                category_analysis,
+                x=exp_category_col,
+                y=delivery_col,
+                title="Average Delivery Time by Experience Category"
+            )
+
+        st.plotly_chart(fig_cat, use_container_width=True)
+
+        st.markdown("""
 Categorical experience segmentation
 reveals structural execution hierarchy.
 
@@ -216,15 +374,15 @@ Operational deployment should prioritize:
 • Junior couriers under low-risk conditions  
 """)
 
-st.divider()
+    st.divider()
 
-# ======================================================
-# EXECUTIVE SYNTHESIS
-# ======================================================
+    # ======================================================
+    # EXECUTIVE SYNTHESIS
+    # ======================================================
 
-st.header("💡 Executive Courier Intelligence Synthesis")
+    st.header("💡 Executive Courier Intelligence Synthesis")
 
-st.markdown("""
+    st.markdown("""
 Courier performance variability
 is quantifiable and strategically optimizable.
 
@@ -1,16 +1,45 @@
+import os
+
 import streamlit as st
 import pandas as pd
 import numpy as np
 
+from core import telemetry
+from core.drift import DRIFT_REPORT_PATH, PSI_MODERATE, PSI_SIGNIFICANT, read_report
+from core.importance import load_importance, shares
+from core.model import MODEL_PATH, model_fingerprint
+from core.telemetry import MODEL_LOAD
+from core.training import RESULTS_PATH, load_results, summarize
+
 st.set_page_config(layout="wide")
 
-# ======================================================
-# PAGE TITLE
-# ======================================================
+with telemetry.run("model_intelligence"):
+    # ======================================================
+    # CROSS-VALIDATION RESULTS
+    # ======================================================
+
+    @telemetry.cached(st.cache_data)
+    def load_model_comparison(mtime):
+        # mtime is the cache key: rerunning core.training refreshes the page
+        return summarize(load_results())
+
+    @telemetry.cached(st.cache_data)
+    def load_feature_importance(fingerprint):
+        # Keyed like the on-disk cache: computed once per model file
+        return load_importance(fingerprint=fingerprint)
+
+    @telemetry.cached(st.cache_data)
+    def load_drift_report(mtime):
+        # mtime is the cache key: each published report refreshes the page
+        return read_report()
 
-st.title("🤖 Predictive Model Intelligence Framework")
+    # ======================================================
+    # PAGE TITLE
+    # ======================================================
 
-st.markdown("""
+    st.title("🤖 Predictive Model Intelligence Framework")
+
+    st.markdown("""
 This module presents the predictive modeling architecture
 behind the Delivery Time Forecasting Engine.
 
@@ -21,15 +50,15 @@ The model transforms raw delivery signals
 into predictive ETA intelligence.
 """)
 
-st.divider()
+    st.divider()
 
-# ======================================================
-# MODELING OBJECTIVE
-# ======================================================
+    # ======================================================
+    # MODELING OBJECTIVE
+    # ======================================================
 
-st.header("🎯 Modeling Objective")
+    st.header("🎯 Modeling Objective")
 
-st.markdown("""
+    st.markdown("""
 The primary modeling objective is to predict delivery time
 with high accuracy and operational stability.
 
@@ -43,15 +72,15 @@ Key considerations:
 Prediction reliability is prioritized over marginal metric gain.
 """)
 
-st.divider()
+    st.divider()
 
-# ======================================================
-# FEATURE ENGINEERING STRATEGY
-# ======================================================
+    # ======================================================
+    # FEATURE ENGINEERING STRATEGY
+    # ======================================================
 
-st.header("🧠 Feature Engineering Strategy")
+    st.header("🧠 Feature Engineering Strategy")
 
-st.markdown("""
+    st.markdown("""
 Feature engineering is the foundation of predictive stability.
 
 Core features include:
@@ -73,15 +102,15 @@ Proper feature construction improves model interpretability
 and reduces overfitting risk.
 """)
 
-st.divider()
+    st.divider()
 
-# ======================================================
-# MODEL SELECTION PROCESS
-# ======================================================
+    # ======================================================
+    # MODEL SELECTION PROCESS
+    # ======================================================
 
-st.header("📊 Model Selection & Evaluation")
+    st.header("📊 Model Selection & Evaluation")
 
-st.markdown("""
+    st.markdown("""
 Multiple regression algorithms were evaluated:
 
 • Linear Regression  
@@ -97,17 +126,34 @@ Evaluation Criteria:
 • Performance under high-variance conditions  
 """)
 
-models = ["Linear Regression", "Random Forest", "Gradient Boosting", "XGBoost"]
-mae_scores = [6.5, 4.8, 4.5, 4.2]
-
-df_models = pd.DataFrame({
-    "Model": models,
-    "MAE Score": mae_scores
-})
-
-st.bar_chart(df_models.set_index("Model"))
-
-st.markdown("""
+    if not os.path.exists(RESULTS_PATH):
+        st.info("No model comparison yet. Generate it with `python -m core.training` "
+                "(cross-validates every candidate model), then reload this page.")
+    else:
+        summary = load_model_comparison(os.path.getmtime(RESULTS_PATH))
+
+        df_models = pd.DataFrame({
+            "Model": summary.index,
+            "MAE Score": summary["mae"].round(2)
+        })
+
+        st.bar_chart(df_models.set_index("Model"))
+
+        st.dataframe(
+            summary.rename(columns={
+                "mae": "MAE (min)",
+                "mae_std": "MAE Std (folds)",
+                "rmse": "RMSE (min)",
+                "fit_s": "Fit Time (s)",
+                "predict_rows_per_s": "Predict Throughput (rows/s)",
+            }).round(3),
+            use_container_width=True
+        )
+
+        best = summary.index[0]
+
+        if best == "XGBoost":
+            st.markdown("""
 XGBoost demonstrated:
 
 • Lowest MAE  
@@ -117,55 +163,70 @@ XGBoost demonstrated:
 
 Therefore, XGBoost was selected
 as the production-ready model.
+""")
+        else:
+            st.markdown(f"""
+Cross-validated MAE is lowest for **{best}**
+({summary.loc[best, "mae"]:.2f} min vs {summary.loc["XGBoost", "mae"]:.2f} min for XGBoost).
+
+XGBoost remains the production model for its nonlinear capture
+of traffic × weather interactions; the comparison is regenerated
+with every training run so this trade-off stays visible.
 """)
 
-st.divider()
+    st.divider()
 
-# ======================================================
-# FEATURE IMPORTANCE ANALYSIS
-# ======================================================
+    # ======================================================
+    # FEATURE IMPORTANCE ANALYSIS
+    # ======================================================
 
-st.header("📈 Feature Importance Interpretation")
+    st.header("📈 Feature Importance Interpretation")
 
-features = [
-    "Distance",
-    "Traffic Level",
-    "Weather Severity",
-    "Courier Experience",
-    "Peak Hour",
-    "Distance × Traffic"
-]
+    with telemetry.span("model fingerprint", MODEL_LOAD):
+        fingerprint = model_fingerprint(MODEL_PATH)
 
-importance = [0.32, 0.24, 0.16, 0.12, 0.08, 0.08]
+    importance = load_feature_importance(fingerprint)
+    importance_share = shares(importance)
 
-df_importance = pd.DataFrame({
-    "Feature": features,
-    "Importance Score": importance
-})
+    df_importance = pd.DataFrame({
+        "Feature": importance.index,
+        "Importance Score": importance_share["shap"].round(3)
+    })
 
-st.bar_chart(df_importance.set_index("Feature"))
+    st.bar_chart(df_importance.set_index("Feature"))
 
-st.markdown("""
+    st.dataframe(
+        pd.DataFrame({
+            "Mean |SHAP| (min)": importance["shap"],
+            "SHAP Share": importance_share["shap"],
+            "Gain Share": importance_share["gain"],
+            "Cover Share": importance_share["cover"],
+        }).round(3),
+        use_container_width=True
+    )
+
+    top = importance.index[:3]
+
+    st.markdown(f"""
 Interpretation:
 
-• Distance remains primary predictor  
-• Traffic level contributes significant variance  
-• Weather amplifies volatility  
-• Interaction features improve precision  
+• **{top[0]}** is the primary predictor, moving the ETA by {importance.loc[top[0], "shap"]:.1f} min on average  
+• **{top[1]}** and **{top[2]}** follow at {importance.loc[top[1], "shap"]:.1f} and {importance.loc[top[2], "shap"]:.1f} min  
+• Scores are mean absolute TreeSHAP contributions over all orders; gain and cover come from the booster's splits  
 
 Feature importance supports operational intuition,
 increasing stakeholder trust in the model.
 """)
 
-st.divider()
+    st.divider()
 
-# ======================================================
-# MODEL RISK & LIMITATION
-# ======================================================
+    # ======================================================
+    # MODEL RISK & LIMITATION
+    # ======================================================
 
-st.header("⚠️ Model Risk & Limitations")
+    st.header("⚠️ Model Risk & Limitations")
 
-st.markdown("""
+    st.markdown("""
 No predictive model is without limitation.
 
 Identified constraints:
@@ -185,15 +246,50 @@ Production models must evolve
 with operational dynamics.
 """)
 
-st.divider()
+    st.subheader("📡 Live Input Drift")
+
+    if os.path.exists(DRIFT_REPORT_PATH):
+
+        drift = load_drift_report(os.path.getmtime(DRIFT_REPORT_PATH))
+
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Live Orders Monitored", f"{drift['live_orders']:,}")
+        c2.metric("Max PSI", f"{drift['max_psi']:.3f}")
+        c3.metric("Drifted Inputs", len(drift["drifted"]))
 
-# ======================================================
-# PRODUCTION READINESS
-# ======================================================
+        st.dataframe(
+            pd.DataFrame([
+                {
+                    "Input": col,
+                    "PSI": entry["psi"],
+                    "Test": "KS" if entry["test"] == "ks" else "Chi-square",
+                    "Statistic": entry["statistic"],
+                    "p-value": entry["p_value"],
+                    "Status": entry["status"].title(),
+                }
+                for col, entry in drift["inputs"].items()
+            ]).round(4),
+            use_container_width=True
+        )
 
-st.header("🚀 Production Deployment Readiness")
+        st.caption(
+            f"Against {drift['reference_orders']:,} training orders. "
+            f"PSI ≥ {PSI_MODERATE} is moderate drift, ≥ {PSI_SIGNIFICANT} significant."
+        )
 
-st.markdown("""
+    else:
+        st.info("No drift report yet. The ETA service (`python -m core.serving`) publishes one "
+                "as it scores orders, or run `python -m core.drift report <orders file>`.")
+
+    st.divider()
+
+    # ======================================================
+    # PRODUCTION READINESS
+    # ======================================================
+
+    st.header("🚀 Production Deployment Readiness")
+
+    st.markdown("""
 The model is suitable for deployment in:
 
 • Real-time ETA prediction  
@@ -219,4 +315,4 @@ into forward-looking intelligence.
 
 Organizations leveraging predictive systems
 achieve structural competitive advantage.
-""")
\ No newline at end of file
+""")
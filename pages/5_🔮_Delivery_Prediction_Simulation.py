@@ -1,117 +1,144 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import joblib
 import plotly.graph_objects as go
 
+from core import telemetry
+from core.intervals import load_intervals
+from core.predcache import CachedPredictor
+from core.scenarios import partial_dependence, sweep
+from core.scoring import ETA_COL, RISK_COL
+from core.telemetry import FIGURE, GROUPBY, MODEL_LOAD, PREDICT
+
 # =====================================================
 # PAGE CONFIG
 # =====================================================
 st.set_page_config(page_title="Prediction & Simulation", layout="wide")
 
-st.markdown("<h1 style='text-align:center;'>🚀 Delivery Time Prediction & Simulation</h1>", unsafe_allow_html=True)
-st.markdown("---")
-
-# =====================================================
-# CACHE MODEL LOADER  (PRODUCTION GRADE)
-# =====================================================
-@st.cache_resource
-def load_model():
-    model = joblib.load("data/best_xgb_model.joblib")
-    return model
-
-model = load_model()
-
-# =====================================================
-# FORMATTERS
-# =====================================================
-def fmt2(x):
-    return f"{x:,.2f}"
-
-def fmt1(x):
-    return f"{x:,.1f}"
-
-# =====================================================
-# CONFIDENCE INTERVAL
-# =====================================================
-def confidence_interval(pred):
-    noise = np.random.uniform(2, 5)
-    return pred - noise, pred + noise
-
-# =====================================================
-# RISK CLASSIFIER
-# =====================================================
-def classify_risk(value):
-    if value > 45:
-        return "High Risk", "🔴", "#ff4d4d"
-    elif value > 30:
-        return "Moderate Risk", "🟠", "#ffa500"
-    else:
-        return "Low Risk", "🟢", "#2ecc71"
-
-# =====================================================
-# INPUT FORM
-# =====================================================
-st.subheader("🔮 Enter Delivery Parameters")
-
-col1, col2, col3 = st.columns(3)
-
-with col1:
-    traffic_level = st.selectbox("Traffic Level", ["Low", "Medium", "High"])
-    courier_exp_cat = st.selectbox("Courier Experience Category", ["Beginner", "Intermediate", "Expert"])
-    weather = st.selectbox("Weather", ["Sunny", "Rainy", "Cloudy"])
-
-with col2:
-    time_of_day = st.selectbox("Time of Day", ["Morning", "Afternoon", "Evening", "Night"])
-    vehicle_type = st.selectbox("Vehicle Type", ["Motorcycle", "Car", "Bicycle"])
-    distance_km = st.number_input("Distance (km)", 0.1, 50.0, 7.5)
+with telemetry.run("prediction"):
+    st.markdown("<h1 style='text-align:center;'>🚀 Delivery Time Prediction & Simulation</h1>", unsafe_allow_html=True)
+    st.markdown("---")
 
-with col3:
-    prep_time = st.number_input("Preparation Time (min)", 1, 120, 15)
-    courier_exp_years = st.number_input("Courier Experience (years)", 0, 20, 5)
-
-distance_per_exp = distance_km / (courier_exp_years + 1)
+    # =====================================================
+    # CACHE MODEL LOADER  (PRODUCTION GRADE)
+    # =====================================================
+    @telemetry.cached(st.cache_resource, kind=MODEL_LOAD)
+    def load_predictor():
+        # Compiled model + prediction cache shared by every session; reloads
+        # itself (and drops cached ETAs) when the model file is replaced.
+        predictor = CachedPredictor()
+        telemetry.register_cache("prediction_cache", predictor.cache.stats)
+        return predictor
+
+    @telemetry.cached(st.cache_resource)
+    def load_conformal(fingerprint):
+        # Keyed by the model hash so a newly published model is recalibrated
+        return load_intervals()
+
+    predictor = load_predictor()
+    with telemetry.span("model refresh", MODEL_LOAD):
+        model = predictor.model
+    intervals = load_conformal(predictor.fingerprint)
 
-# =====================================================
-# PREDICTION BUTTON
-# =====================================================
-st.markdown("---")
+    # =====================================================
+    # FORMATTERS
+    # =====================================================
+    def fmt2(x):
+        return f"{x:,.2f}"
 
-if st.button("Run Predictive Simulation 🚀", use_container_width=True):
+    def fmt1(x):
+        return f"{x:,.1f}"
 
     # =====================================================
-    # INPUT DATAFRAME
+    # CONFIDENCE INTERVAL
     # =====================================================
-    input_df = pd.DataFrame([{
-        "traffic_level": traffic_level,
-        "courier_experience_category": courier_exp_cat,
-        "weather": weather,
-        "time_of_day": time_of_day,
-        "vehicle_type": vehicle_type,
-        "distance_km": distance_km,
-        "preparation_time_min": prep_time,
-        "courier_experience_yrs": courier_exp_years,
-        "distance_per_experience": distance_per_exp
-    }])
-
-    # Ensure correct feature order
-    input_df = input_df[model.feature_names_in_]
+    def confidence_interval(pred):
+        # Conformal interval calibrated on held-out residuals (core.intervals)
+        low, high = intervals.interval([pred])
+        return low[0], high[0]
 
     # =====================================================
-    # MODEL PREDICTION
+    # RISK CLASSIFIER
     # =====================================================
-    eta = model.predict(input_df)[0]
+    def classify_risk(value):
+        if value > 45:
+            return "High Risk", "🔴", "#ff4d4d"
+        elif value > 30:
+            return "Moderate Risk", "🟠", "#ffa500"
+        else:
+            return "Low Risk", "🟢", "#2ecc71"
+
+    # Engineered inputs as this page defines them: the headline prediction
+    # and both sweeps use this, so a sweep's base point matches the headline
+    def derive_inputs(columns):
+        return {
+            "distance_per_experience":
+                columns["distance_km"] / (columns["courier_experience_yrs"] + 1)
+        }
 
     # =====================================================
-    # CONFIDENCE + RISK
+    # INPUT FORM
     # =====================================================
-    low, high = confidence_interval(eta)
-    risk, emoji, color = classify_risk(eta)
+    st.subheader("🔮 Enter Delivery Parameters")
+
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        traffic_level = st.selectbox("Traffic Level", ["Low", "Medium", "High"])
+        courier_exp_cat = st.selectbox("Courier Experience Category", ["Beginner", "Intermediate", "Expert"])
+        weather = st.selectbox("Weather", ["Sunny", "Rainy", "Cloudy"])
+
+    with col2:
+        time_of_day = st.selectbox("Time of Day", ["Morning", "Afternoon", "Evening", "Night"])
+        vehicle_type = st.selectbox("Vehicle Type", ["Motorcycle", "Car", "Bicycle"])
+        distance_km = st.number_input("Distance (km)", 0.1, 50.0, 7.5)
+
+    with col3:
+        prep_time = st.number_input("Preparation Time (min)", 1, 120, 15)
+        courier_exp_years = st.number_input("Courier Experience (years)", 0, 20, 5)
+
+    distance_per_exp = derive_inputs({
+        "distance_km": distance_km, "courier_experience_yrs": courier_exp_years
+    })["distance_per_experience"]
 
     # =====================================================
-    # RESULT CARD
+    # PREDICTION BUTTON
     # =====================================================
-    st.markdown(f"""
+    st.markdown("---")
+
+    if st.button("Run Predictive Simulation 🚀", use_container_width=True):
+
+        # =====================================================
+        # INPUT ORDER
+        # =====================================================
+        order = {
+            "traffic_level": traffic_level,
+            "courier_experience_category": courier_exp_cat,
+            "weather": weather,
+            "time_of_day": time_of_day,
+            "vehicle_type": vehicle_type,
+            "distance_km": distance_km,
+            "preparation_time_min": prep_time,
+            "courier_experience_yrs": courier_exp_years,
+            "distance_per_experience": distance_per_exp
+        }
+
+        # =====================================================
+        # MODEL PREDICTION
+        # =====================================================
+        with telemetry.span("predict one order", PREDICT):
+            eta = predictor.predict_one(order)
+
+        # =====================================================
+        # CONFIDENCE + RISK
+        # =====================================================
+        low, high = confidence_interval(eta)
+        risk, emoji, color = classify_risk(eta)
+
+        # =====================================================
+        # RESULT CARD
+        # =====================================================
+        st.markdown(f"""
     <div style="
         padding: 25px;
         border-radius: 20px;
@@ -127,79 +154,81 @@ if st.button("Run Predictive Simulation 🚀", use_container_width=True):
     </div>
     """, unsafe_allow_html=True)
 
-    st.divider()
-
-    # =====================================================
-    # METRICS
-    # =====================================================
-    c1, c2 = st.columns(2)
-    c1.metric("Confidence Range", f"{fmt1(low)} – {fmt1(high)} min")
-    c2.metric("Prediction Stability", f"± {fmt1((high - low)/2)} min")
-
-    st.divider()
-
-    # =====================================================
-    # GAUGE CHART
-    # =====================================================
-    fig = go.Figure(go.Indicator(
-        mode="gauge+number",
-        value=eta,
-        title={'text': "Delivery Speed Indicator"},
-        gauge={
-            'axis': {'range': [0, 60]},
-            'steps': [
-                {'range': [0, 20], 'color': "lightgreen"},
-                {'range': [20, 40], 'color': "yellow"},
-                {'range': [40, 60], 'color': "tomato"}
-            ],
-            'threshold': {
-                'line': {'color': "black", 'width': 4},
-                'value': eta
-            }
-        }
-    ))
-
-    fig.update_layout(height=320)
-    st.plotly_chart(fig, use_container_width=True)
-
-    st.divider()
-
-    # =====================================================
-    # SCENARIO ANALYSIS
-    # =====================================================
-    st.subheader("📊 Distance Sensitivity Simulation")
-
-    shifts = [-2, 0, 2]
-    scenario_vals = []
-
-    for s in shifts:
-        sim_df = input_df.copy()
-        sim_df["distance_km"] = max(0.1, distance_km + s)
-        scenario_vals.append(model.predict(sim_df)[0])
-
-    chart_df = pd.DataFrame({
-        "Distance Change (km)": shifts,
-        "Estimated Time": scenario_vals
-    })
-
-    st.line_chart(chart_df.set_index("Distance Change (km)"))
-
-    # =====================================================
-    # DYNAMIC INTERPRETATION
-    # =====================================================
-    impact = max(scenario_vals) - min(scenario_vals)
-
-    if impact > 15:
-        sensitivity_text = "highly sensitive"
-        risk_text = "significant operational volatility"
-    elif impact > 7:
-        sensitivity_text = "moderately sensitive"
-        risk_text = "noticeable operational impact"
-    else:
-        sensitivity_text = "relatively stable"
-        risk_text = "minimal operational risk"
-
-    st.markdown(f"""
+        st.divider()
+
+        # =====================================================
+        # METRICS
+        # =====================================================
+        c1, c2 = st.columns(2)
+        c1.metric(
+            "Confidence Range", f"{fmt1(low)} – {fmt1(high)} min",
+            help=f"{intervals.coverage:.0%} conformal prediction interval"
+        )
+        c2.metric("Prediction Stability", f"± {fmt1((high - low)/2)} min")
+
+        st.divider()
+
+        # =====================================================
+        # GAUGE CHART
+        # =====================================================
+        with telemetry.span("speed gauge", FIGURE):
+            fig = go.Figure(go.Indicator(
+                mode="gauge+number",
+                value=eta,
+                title={'text': "Delivery Speed Indicator"},
+                gauge={
+                    'axis': {'range': [0, 60]},
+                    'steps': [
+                        {'range': [0, 20], 'color': "lightgreen"},
+                        {'range': [20, 40], 'color': "yellow"},
+                        {'range': [40, 60], 'color': "tomato"}
+                    ],
+                    'threshold': {
+                        'line': {'color': "black", 'width': 4},
+                        'value': eta
+                    }
+                }
+            ))
+
+            fig.update_layout(height=320)
+        st.plotly_chart(fig, use_container_width=True)
+
+        st.divider()
+
+        # =====================================================
+        # SCENARIO ANALYSIS
+        # =====================================================
+        st.subheader("📊 Distance Sensitivity Simulation")
+
+        shifts = [-2, 0, 2]
+        with telemetry.span("distance sensitivity sweep", PREDICT):
+            scenario_vals = sweep(model, order, {
+                "distance_km": np.maximum(0.1, distance_km + np.array(shifts))
+            }, derive=derive_inputs)[ETA_COL].tolist()
+
+        chart_df = pd.DataFrame({
+            "Distance Change (km)": shifts,
+            "Estimated Time": scenario_vals
+        })
+
+        st.line_chart(chart_df.set_index("Distance Change (km)"))
+
+        # =====================================================
+        # DYNAMIC INTERPRETATION
+        # =====================================================
+        impact = max(scenario_vals) - min(scenario_vals)
+
+        if impact > 15:
+            sensitivity_text = "highly sensitive"
+            risk_text = "significant operational volatility"
+        elif impact > 7:
+            sensitivity_text = "moderately sensitive"
+            risk_text = "noticeable operational impact"
+        else:
+            sensitivity_text = "relatively stable"
+            risk_text = "minimal operational risk"
+
+        st.markdown(f"""
 **Dynamic Interpretation:**  
 The delivery time prediction appears **{sensitivity_text}** to distance changes,  
 indicating **{risk_text}** under current traffic and courier conditions.
@@ -208,13 +237,13 @@ This suggests that route optimization and dispatch planning
 could play a critical role in maintaining service consistency.
 """)
 
-    st.divider()
+        st.divider()
 
-    # =====================================================
-    # DYNAMIC STRATEGIC INSIGHT
-    # =====================================================
-    if eta > 45:
-        strategy_text = """
+        # =====================================================
+        # DYNAMIC STRATEGIC INSIGHT
+        # =====================================================
+        if eta > 45:
+            strategy_text = """
 ### Strategic Insight
 
 The predicted delivery time indicates **potential operational inefficiencies**.
@@ -226,8 +255,8 @@ The predicted delivery time indicates **potential operational inefficiencies**.
 Failure to address this may reduce customer satisfaction
 and increase delivery variability risk.
 """
-    elif eta > 30:
-        strategy_text = """
+        elif eta > 30:
+            strategy_text = """
 ### Strategic Insight
 
 The delivery performance is within a **moderate operational range**.
@@ -238,8 +267,8 @@ The delivery performance is within a **moderate operational range**.
 
 This ensures service stability while maintaining efficiency.
 """
-    else:
-        strategy_text = """
+        else:
+            strategy_text = """
 ### Strategic Insight
 
 The predicted delivery time reflects **strong operational efficiency**.
@@ -251,4 +280,101 @@ The predicted delivery time reflects **strong operational efficiency**.
 This creates opportunities for service differentiation and growth.
 """
 
-    st.markdown(strategy_text)
+        st.markdown(strategy_text)
+
+
+    # =====================================================
+    # WHAT-IF EXPLORER
+    # =====================================================
+    st.markdown("---")
+    st.subheader("🧪 What-If Explorer")
+    st.caption(
+        "Every combination of the ranges below is scored in one batched model call. "
+        "Distance per experience is derived for each scenario as for the prediction above; "
+        "the courier category stays the one selected."
+    )
+
+    with st.expander("Configure Scenario Grid", expanded=True):
+
+        r1, r2, r3 = st.columns(3)
+        distance_range = r1.slider(
+            "Distance Range (km)", 0.1, 50.0,
+            (max(0.1, distance_km - 5), min(50.0, distance_km + 5))
+        )
+        prep_range = r2.slider(
+            "Preparation Time Range (min)", 1, 120,
+            (max(1, prep_time - 10), min(120, prep_time + 10))
+        )
+        exp_range = r3.slider(
+            "Experience Range (years)", 0, 20,
+            (max(0, courier_exp_years - 3), min(20, courier_exp_years + 3))
+        )
+        points = st.slider("Points per Numeric Range", 2, 25, 10)
+
+        c1, c2, c3, c4 = st.columns(4)
+        traffic_levels = c1.multiselect("Traffic", ["Low", "Medium", "High"], [traffic_level])
+        weathers = c2.multiselect("Weather", ["Sunny", "Rainy", "Cloudy"], [weather])
+        times = c3.multiselect("Time of Day", ["Morning", "Afternoon", "Evening", "Night"], [time_of_day])
+        vehicles = c4.multiselect("Vehicle", ["Motorcycle", "Car", "Bicycle"], [vehicle_type])
+
+    base_order = {
+        "traffic_level": traffic_level,
+        "courier_experience_category": courier_exp_cat,
+        "weather": weather,
+        "time_of_day": time_of_day,
+        "vehicle_type": vehicle_type,
+        "distance_km": distance_km,
+        "preparation_time_min": prep_time,
+        "courier_experience_yrs": courier_exp_years,
+        "distance_per_experience": distance_per_exp
+    }
+
+    axes = {
+        "distance_km": np.unique(np.linspace(*distance_range, points).round(2)),
+        "preparation_time_min": np.unique(np.linspace(*prep_range, points).round()),
+        "courier_experience_yrs": np.unique(np.linspace(*exp_range, points).round()),
+        "traffic_level": traffic_levels or [traffic_level],
+        "weather": weathers or [weather],
+        "time_of_day": times or [time_of_day],
+        "vehicle_type": vehicles or [vehicle_type],
+    }
+
+    try:
+        with telemetry.span("what-if sweep", PREDICT):
+            results = sweep(model, base_order, axes, derive=derive_inputs)
+    except ValueError as exc:
+        st.warning(f"Scenario grid too large: {exc}. Narrow the ranges or selections.")
+        st.stop()
+
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("Scenarios Scored", f"{len(results):,}")
+    m2.metric("Fastest ETA", f"{fmt1(results[ETA_COL].min())} min")
+    m3.metric("Slowest ETA", f"{fmt1(results[ETA_COL].max())} min")
+    m4.metric("High Risk Share", f"{fmt1((results[RISK_COL] == 'High Risk').mean() * 100)}%")
+
+    swept = [name for name, values in axes.items() if len(values) > 1]
+
+    if swept:
+        st.markdown("**Partial Dependence** (mean ETA across all other swept inputs)")
+        pd_cols = st.columns(min(len(swept), 3))
+        for i, name in enumerate(swept):
+            with telemetry.span(f"partial dependence: {name}", GROUPBY):
+                curve = partial_dependence(results, name).rename("Estimated Time")
+            with pd_cols[i % len(pd_cols)]:
+                st.caption(name)
+                if np.issubdtype(results[name].dtype, np.number):
+                    st.line_chart(curve.sort_index())
+                else:
+                    st.bar_chart(curve)
+
+    st.markdown("**Slowest Scenarios**")
+    with telemetry.span("slowest scenarios", GROUPBY):
+        slowest = results.nlargest(10, ETA_COL)
+    st.dataframe(slowest, use_container_width=True, hide_index=True)
+
+    st.download_button(
+        "Download All Scenarios (CSV)",
+        results.to_csv(index=False).encode(),
+        file_name="eta_scenarios.csv",
+        mime="text/csv",
+    )
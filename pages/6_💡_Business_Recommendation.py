@@ -3,32 +3,36 @@ import numpy as np
 import pandas as pd
 import plotly.express as px
 
+from core import telemetry
+from core.telemetry import FIGURE
+
 # =====================================================
 # PAGE CONFIG
 # =====================================================
 st.set_page_config(page_title="💡 Business Recommendation", layout="wide")
 
-st.title("💡 Strategic Business Recommendation Engine")
-st.caption("Transforming Predictive Intelligence into Executive Decision Support")
-st.divider()
+with telemetry.run("recommendations"):
+    st.title("💡 Strategic Business Recommendation Engine")
+    st.caption("Transforming Predictive Intelligence into Executive Decision Support")
+    st.divider()
 
-# =====================================================
-# DYNAMIC KPI GENERATOR
-# =====================================================
-avg_eta = round(np.random.uniform(28, 38), 1)
-sla_rate = round(np.random.uniform(65, 90), 1)
-satisfaction = round(np.random.uniform(80, 96), 1)
+    # =====================================================
+    # DYNAMIC KPI GENERATOR
+    # =====================================================
+    avg_eta = round(np.random.uniform(28, 38), 1)
+    sla_rate = round(np.random.uniform(65, 90), 1)
+    satisfaction = round(np.random.uniform(80, 96), 1)
 
-# PERFORMANCE INDEX
-performance_index = (sla_rate * 0.5) + (satisfaction * 0.3) + ((40 - avg_eta) * 2)
+    # PERFORMANCE INDEX
+    performance_index = (sla_rate * 0.5) + (satisfaction * 0.3) + ((40 - avg_eta) * 2)
 
-# =====================================================
-# KPI CARDS
-# =====================================================
-st.subheader("📊 Operational KPI Snapshot")
+    # =====================================================
+    # KPI CARDS
+    # =====================================================
+    st.subheader("📊 Operational KPI Snapshot")
 
-def kpi_card(title, value, gradient):
-    st.markdown(f"""
+    def kpi_card(title, value, gradient):
+        st.markdown(f"""
     <div style="
         padding:22px;
         border-radius:18px;
@@ -41,126 +45,128 @@ def kpi_card(title, value, gradient):
     </div>
     """, unsafe_allow_html=True)
 
-c1, c2, c3 = st.columns(3)
-
-with c1:
-    kpi_card("⏱ Avg Delivery Time", f"{avg_eta} min",
-             "linear-gradient(135deg,#C9FFBF,#FFAFBD)")
-with c2:
-    kpi_card("🎯 SLA Achievement", f"{sla_rate}%",
-             "linear-gradient(135deg,#A1C4FD,#C2E9FB)")
-with c3:
-    kpi_card("💙 Customer Satisfaction", f"{satisfaction}%",
-             "linear-gradient(135deg,#F6D365,#FDA085)")
-
-st.divider()
-
-# =====================================================
-# PERFORMANCE GAUGE
-# =====================================================
-st.subheader("📈 Logistics Performance Index")
-
-gauge_df = pd.DataFrame({
-    "Metric": ["Performance Score"],
-    "Value": [performance_index]
-})
-
-fig = px.bar(gauge_df, x="Metric", y="Value",
-             title="Composite Performance Indicator")
-st.plotly_chart(fig, use_container_width=True)
-
-st.divider()
-
-# =====================================================
-# INSIGHT DIAGNOSTIC ZONE
-# =====================================================
-st.subheader("🔍 Insight Diagnostic Zone")
-
-if avg_eta > 34:
-    st.warning("Delivery time trend indicates **potential capacity strain** during peak demand periods.")
-else:
-    st.success("Delivery time remains within **efficient operational threshold**.")
-
-if sla_rate < 72:
-    st.error("SLA performance indicates **increasing service inconsistency risk**.")
-else:
-    st.info("SLA fulfillment shows **strong reliability pattern**.")
-
-if satisfaction < 85:
-    st.warning("Customer sentiment trend shows **possible churn risk escalation**.")
-else:
-    st.success("Customer satisfaction reflects **positive loyalty trajectory**.")
-
-st.divider()
-
-# =====================================================
-# MINI ANALYTICS – RISK DISTRIBUTION
-# =====================================================
-st.subheader("📉 Operational Risk Projection")
-
-risk_data = pd.DataFrame({
-    "Scenario": ["Optimistic", "Moderate", "Critical"],
-    "Risk Level": [
-        round(np.random.uniform(10, 20), 1),
-        round(np.random.uniform(25, 40), 1),
-        round(np.random.uniform(45, 65), 1)
-    ]
-})
-
-risk_fig = px.pie(risk_data, values="Risk Level", names="Scenario",
-                  title="Projected Risk Distribution")
-st.plotly_chart(risk_fig, use_container_width=True)
-
-st.divider()
-
-# =====================================================
-# STRATEGIC ACTION FRAMEWORK
-# =====================================================
-st.subheader("📌 Strategic Action Framework")
-
-left, right = st.columns(2)
-
-with left:
-    st.markdown("### 🚴 Courier Optimization Strategy")
-    st.markdown("""
+    c1, c2, c3 = st.columns(3)
+
+    with c1:
+        kpi_card("⏱ Avg Delivery Time", f"{avg_eta} min",
+                 "linear-gradient(135deg,#C9FFBF,#FFAFBD)")
+    with c2:
+        kpi_card("🎯 SLA Achievement", f"{sla_rate}%",
+                 "linear-gradient(135deg,#A1C4FD,#C2E9FB)")
+    with c3:
+        kpi_card("💙 Customer Satisfaction", f"{satisfaction}%",
+                 "linear-gradient(135deg,#F6D365,#FDA085)")
+
+    st.divider()
+
+    # =====================================================
+    # PERFORMANCE GAUGE
+    # =====================================================
+    st.subheader("📈 Logistics Performance Index")
+
+    gauge_df = pd.DataFrame({
+        "Metric": ["Performance Score"],
+        "Value": [performance_index]
+    })
+
+    with telemetry.span("performance index bar chart", FIGURE):
+        fig = px.bar(gauge_df, x="Metric", y="Value",
+                     title="Composite Performance Indicator")
+    st.plotly_chart(fig, use_container_width=True)
+
+    st.divider()
+
+    # =====================================================
+    # INSIGHT DIAGNOSTIC ZONE
+    # =====================================================
+    st.subheader("🔍 Insight Diagnostic Zone")
+
+    if avg_eta > 34:
+        st.warning("Delivery time trend indicates **potential capacity strain** during peak demand periods.")
+    else:
+        st.success("Delivery time remains within **efficient operational threshold**.")
+
+    if sla_rate < 72:
+        st.error("SLA performance indicates **increasing service inconsistency risk**.")
+    else:
+        st.info("SLA fulfillment shows **strong reliability pattern**.")
+
+    if satisfaction < 85:
+        st.warning("Customer sentiment trend shows **possible churn risk escalation**.")
+    else:
+        st.success("Customer satisfaction reflects **positive loyalty trajectory**.")
+
+    st.divider()
+
+    # =====================================================
+    # MINI ANALYTICS – RISK DISTRIBUTION
+    # =====================================================
+    st.subheader("📉 Operational Risk Projection")
+
+    risk_data = pd.DataFrame({
+        "Scenario": ["Optimistic", "Moderate", "Critical"],
+        "Risk Level": [
+            round(np.random.uniform(10, 20), 1),
+            round(np.random.uniform(25, 40), 1),
+            round(np.random.uniform(45, 65), 1)
+        ]
+    })
+
+    with telemetry.span("risk projection pie chart", FIGURE):
+        risk_fig = px.pie(risk_data, values="Risk Level", names="Scenario",
+                          title="Projected Risk Distribution")
+    st.plotly_chart(risk_fig, use_container_width=True)
+
+    st.divider()
+
+    # =====================================================
+    # STRATEGIC ACTION FRAMEWORK
+    # =====================================================
+    st.subheader("📌 Strategic Action Framework")
+
+    left, right = st.columns(2)
+
+    with left:
+        st.markdown("### 🚴 Courier Optimization Strategy")
+        st.markdown("""
     - Dynamic courier allocation using predictive ETA engine  
     - Incentive programs for high-performing drivers  
     - Real-time workload balancing  
     - Skill-based dispatch prioritization  
     """)
 
-    st.markdown("### 🍽 Restaurant Synchronization Strategy")
-    st.markdown("""
+        st.markdown("### 🍽 Restaurant Synchronization Strategy")
+        st.markdown("""
     - Preparation time alerts and predictive scheduling  
     - Kitchen readiness notification integration  
     - SLA-linked restaurant performance scoring  
     """)
 
-with right:
-    st.markdown("### 💙 Customer Experience Enhancement")
-    st.markdown("""
+    with right:
+        st.markdown("### 💙 Customer Experience Enhancement")
+        st.markdown("""
     - Transparent real-time ETA tracking  
     - Delivery category labeling (Fast / Normal / Slow)  
     - Automated delay compensation policy  
     """)
 
-    st.markdown("### 🌦 External Risk Mitigation")
-    st.markdown("""
+        st.markdown("### 🌦 External Risk Mitigation")
+        st.markdown("""
     - Weather-adaptive routing algorithms  
     - Traffic-aware dispatch buffers  
     - Surge incentive balancing system  
     """)
 
-st.divider()
+    st.divider()
 
-# =====================================================
-# EXECUTIVE IMPACT PROJECTION
-# =====================================================
-st.subheader("🚀 Executive Impact Projection")
+    # =====================================================
+    # EXECUTIVE IMPACT PROJECTION
+    # =====================================================
+    st.subheader("🚀 Executive Impact Projection")
 
-impact_score = round(np.random.uniform(15, 35), 1)
+    impact_score = round(np.random.uniform(15, 35), 1)
 
-st.markdown(f"""
+    st.markdown(f"""
 **Projected Operational Improvement:** **{impact_score}%**
 
 By implementing the proposed strategic initiatives, the organization
@@ -173,14 +179,14 @@ may potentially achieve:
 • Enhanced cross-department coordination efficiency  
 """)
 
-st.divider()
+    st.divider()
 
-# =====================================================
-# STRATEGIC ROADMAP
-# =====================================================
-st.subheader("🗺 Strategic Implementation Roadmap")
+    # =====================================================
+    # STRATEGIC ROADMAP
+    # =====================================================
+    st.subheader("🗺 Strategic Implementation Roadmap")
 
-st.markdown("""
+    st.markdown("""
 **Phase 1 – Short Term (0-3 Months)**  
 - Optimize courier allocation logic  
 - Integrate predictive ETA alerts  
@@ -197,9 +203,9 @@ st.markdown("""
 - Full logistics intelligence automation  
 """)
 
-st.divider()
+    st.divider()
 
-st.success("""
+    st.success("""
 🏆 **Strategic Conclusion**
 
 The integration of predictive analytics with operational intelligence
@@ -1,6 +1,8 @@
 import streamlit as st
 import os
 
+from core import telemetry
+
 # ======================
 # PAGE CONFIG
 # ======================
@@ -10,23 +12,24 @@ st.set_page_config(
     layout="wide"
 )
 
-# ======================
-# HERO SECTION
-# ======================
-st.title("👤 About Me")
-st.divider()
+with telemetry.run("about"):
+    # ======================
+    # HERO SECTION
+    # ======================
+    st.title("👤 About Me")
+    st.divider()
 
-col1, col2 = st.columns([1, 3])
+    col1, col2 = st.columns([1, 3])
 
-with col1:
-    image_path = os.path.join("images", "FOTO_INTAN.png")
-    st.image(
-        image_path,
-        width=280
-    )
+    with col1:
+        image_path = os.path.join("images", "FOTO_INTAN.png")
+        st.image(
+            image_path,
+            width=280
+        )
 
-with col2:
-    st.markdown("""
+    with col2:
+        st.markdown("""
     ## Intan Sari Muharni  
     **Data Analyst | Aspiring Data Scientist**
 
@@ -41,64 +44,64 @@ with col2:
     operational efficiency, and customer-focused innovation.
     """)
 
-st.divider()
+    st.divider()
 
-# ======================
-# WHAT I DO
-# ======================
-st.subheader("🎯 What I Do")
+    # ======================
+    # WHAT I DO
+    # ======================
+    st.subheader("🎯 What I Do")
 
-col1, col2 = st.columns(2)
+    col1, col2 = st.columns(2)
 
-with col1:
-    st.markdown("""
+    with col1:
+        st.markdown("""
     ✔ Build interactive **business dashboards**  
     ✔ Perform **EDA & segmentation analysis**  
     ✔ Conduct statistical analysis & hypothesis testing  
     ✔ Design data storytelling for stakeholders  
     """)
 
-with col2:
-    st.markdown("""
+    with col2:
+        st.markdown("""
     ✔ Develop **machine learning models**  
     ✔ Translate data into strategic insights  
     ✔ Deploy analytics solutions using Streamlit  
     ✔ Support decision-making through predictive analytics  
     """)
 
-st.divider()
+    st.divider()
 
-# ======================
-# CORE STRENGTHS
-# ======================
-st.subheader("🌟 Core Strengths")
+    # ======================
+    # CORE STRENGTHS
+    # ======================
+    st.subheader("🌟 Core Strengths")
 
-c1, c2 = st.columns(2)
+    c1, c2 = st.columns(2)
 
-with c1:
-    st.markdown("""
+    with c1:
+        st.markdown("""
     - Analytical Problem Solving  
     - Business-Oriented Thinking  
     - Structured Decision Support  
     - Continuous Learning Mindset  
     """)
 
-with c2:
-    st.markdown("""
+    with c2:
+        st.markdown("""
     - Data Storytelling & Visualization  
     - Cross-Functional Collaboration  
     - Process Optimization Perspective  
     - Adaptability in Dynamic Environments  
     """)
 
-st.divider()
+    st.divider()
 
-# ======================
-# EXPERIENCE
-# ======================
-st.subheader("💼 Experience Highlights")
+    # ======================
+    # EXPERIENCE
+    # ======================
+    st.subheader("💼 Experience Highlights")
 
-st.markdown("""
+    st.markdown("""
 ### R&D Packaging Development Staff  
 **PT Pharos Indonesia**
 
@@ -112,17 +115,17 @@ These initiatives strengthened my ability to convert raw operational data
 into **measurable business impact and strategic insights**.
 """)
 
-st.divider()
+    st.divider()
 
-# ======================
-# TECHNICAL SKILLS
-# ======================
-st.subheader("🛠️ Technical Skills")
+    # ======================
+    # TECHNICAL SKILLS
+    # ======================
+    st.subheader("🛠️ Technical Skills")
 
-col1, col2, col3 = st.columns(3)
+    col1, col2, col3 = st.columns(3)
 
-with col1:
-    st.markdown("""
+    with col1:
+        st.markdown("""
     **Programming & Data Processing**
     - Python  
     - SQL  
@@ -131,8 +134,8 @@ with col1:
     - Data Cleaning & Transformation  
     """)
 
-with col2:
-    st.markdown("""
+    with col2:
+        st.markdown("""
     **Visualization & BI Tools**
     - Streamlit  
     - Plotly  
@@ -141,8 +144,8 @@ with col2:
     - Dashboard Design  
     """)
 
-with col3:
-    st.markdown("""
+    with col3:
+        st.markdown("""
     **Machine Learning & Analytics**
     - Scikit-learn  
     - Regression & Classification Models  
@@ -151,46 +154,46 @@ with col3:
     - Predictive Modeling  
     """)
 
-st.divider()
-
-# ======================
-# CONTACT
-# ======================
-st.subheader("📫 Let's Connect")
-
-c1, c2, c3, c4 = st.columns(4)
-
-with c1:
-    st.image(
-        "https://cdn-icons-png.flaticon.com/512/732/732200.png",
-        width=35
-    )
-    st.markdown("[Email](mailto:intansariarni@gmail.com)")
-
-with c2:
-    st.image(
-        "https://cdn-icons-png.flaticon.com/512/174/174857.png",
-        width=35
-    )
-    st.markdown("[LinkedIn](https://www.linkedin.com/in/intan-sari-muharni)")
-
-with c3:
-    st.image(
-        "https://cdn-icons-png.flaticon.com/512/733/733585.png",
-        width=35
-    )
-    st.markdown("[WhatsApp](https://wa.me/6285717595056)")
-
-with c4:
-    st.image(
-        "https://cdn-icons-png.flaticon.com/512/733/733553.png",
-        width=35
-    )
-    st.markdown("[GitHub](https://github.com/intansari-m)")
-
-st.divider()
-
-st.success("""
+    st.divider()
+
+    # ======================
+    # CONTACT
+    # ======================
+    st.subheader("📫 Let's Connect")
+
+    c1, c2, c3, c4 = st.columns(4)
+
+    with c1:
+        st.image(
+            "https://cdn-icons-png.flaticon.com/512/732/732200.png",
+            width=35
+        )
+        st.markdown("[Email](mailto:intansariarni@gmail.com)")
+
+    with c2:
+        st.image(
+            "https://cdn-icons-png.flaticon.com/512/174/174857.png",
+            width=35
+        )
+        st.markdown("[LinkedIn](https://www.linkedin.com/in/intan-sari-muharni)")
+
+    with c3:
+        st.image(
+            "https://cdn-icons-png.flaticon.com/512/733/733585.png",
+            width=35
+        )
+        st.markdown("[WhatsApp](https://wa.me/6285717595056)")
+
+    with c4:
+        st.image(
+            "https://cdn-icons-png.flaticon.com/512/733/733553.png",
+            width=35
+        )
+        st.markdown("[GitHub](https://github.com/intansari-m)")
+
+    st.divider()
+
+    st.success("""
 🚀 Actively seeking Data Analyst / Data Scientist opportunities  
 where I can contribute **data-driven business impact**,  
 continuous improvement, and analytical innovation.
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.cube import DIMENSIONS, OrderCube
+from core.data import DELIVERY, DISTANCE, TIME_OF_DAY, TRAFFIC, VEHICLE, WEATHER
+
+LEVELS = {
+    TIME_OF_DAY: ["Morning", "Afternoon", "Evening", "Night"],
+    TRAFFIC: ["Low", "Medium", "High"],
+    WEATHER: ["Clear", "Rainy", "Snowy"],
+    VEHICLE: ["Bike", "Scooter", "Car"],
+}
+
+
+@pytest.fixture
+def orders():
+    rng = np.random.default_rng(0)
+    n = 20_000
+    df = pd.DataFrame({dim: rng.choice(LEVELS[dim], n) for dim in DIMENSIONS})
+    # Large offset, small spread: a sum of squares loses every digit here
+    df[DELIVERY] = 1e9 + rng.normal(0.0, 3.0, n)
+    df[DISTANCE] = rng.uniform(1.0, 20.0, n)
+    return df
+
+
+def merged_cube(df, batches):
+    cube = None
+    for rows in np.array_split(np.arange(len(df)), batches):
+        part = OrderCube.from_frame(df.iloc[rows])
+        cube = part if cube is None else cube.merge(part)
+    return cube
+
+
+@pytest.mark.parametrize("batches", [1, 50])
+def test_std_is_stable_under_a_large_offset(orders, batches):
+    scope = merged_cube(orders, batches).scope()
+
+    assert scope.count == len(orders)
+    assert scope.std == pytest.approx(orders[DELIVERY].std(), rel=1e-6)
+
+
+def test_grouped_moments_match_pandas(orders):
+    cube = merged_cube(orders, 50)
+    by = [TRAFFIC, WEATHER]
+
+    result = cube.scope(**{VEHICLE: ["Bike", "Car"]}).aggregate(by, ("mean", "std", "count"))
+    expected = (orders[orders[VEHICLE].isin(["Bike", "Car"])]
+                .groupby(by)[DELIVERY].agg(["mean", "std", "count"]))
+
+    pd.testing.assert_frame_equal(
+        result.sort_index(), expected.sort_index(), check_dtype=False, rtol=1e-6
+    )
@@ -0,0 +1,117 @@
+from pathlib import Path
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from core import telemetry
+from core.telemetry import FRAGMENT_RUN, FULL_RUN, TELEMETRY
+from core.timing import SectionTimer
+
+ROOT = Path(__file__).resolve().parent.parent
+SCRIPTS = ["app.py"] + sorted(p.relative_to(ROOT).as_posix() for p in ROOT.glob("pages/*.py"))
+# Generous: a cold run builds the Arrow file, cubes and model artifacts
+TIMEOUT_S = 600
+
+
+def run_count(page, kind=FULL_RUN):
+    histogram = TELEMETRY.reruns.get((page, kind))
+    return histogram.count if histogram else 0
+
+
+@pytest.fixture(autouse=True)
+def root_dir(monkeypatch):
+    # Pages read data/ and images/ relative to the repository root
+    monkeypatch.chdir(ROOT)
+
+
+@pytest.mark.parametrize("script", SCRIPTS)
+def test_page_runs_and_records_its_run(script):
+    before = TELEMETRY.rerun_frame()["Count"].sum()
+    at = AppTest.from_file(str(ROOT / script), default_timeout=TIMEOUT_S).run()
+
+    assert not at.exception, at.exception
+    assert TELEMETRY.rerun_frame()["Count"].sum() == before + 1
+
+
+def test_widget_rerun_is_recorded_once():
+    at = AppTest.from_file(str(ROOT / SCRIPTS[1]), default_timeout=TIMEOUT_S).run()
+    runs = run_count("executive")
+
+    # The time-of-day filter lives inside the page's fragment, which runs
+    # nested in the full rerun AppTest performs
+    at.selectbox[0].set_value("Evening").run()
+
+    assert not at.exception, at.exception
+    assert run_count("executive") == runs + 1
+    assert run_count("executive", FRAGMENT_RUN) == 0
+
+
+def test_missing_model_comparison_is_not_generated_by_the_page(tmp_path, monkeypatch):
+    from core import training
+
+    results = tmp_path / "model_comparison.csv"
+    monkeypatch.setattr(training, "RESULTS_PATH", str(results))
+    script = next(s for s in SCRIPTS if s.startswith("pages/4_"))
+    at = AppTest.from_file(str(ROOT / script), default_timeout=TIMEOUT_S).run()
+
+    assert not at.exception, at.exception
+    assert any("python -m core.training" in info.value for info in at.info)
+    assert not results.exists()
+
+
+STOPPED_SCRIPT = """
+import streamlit as st
+
+from core import telemetry
+
+with telemetry.run("smoke_stop"):
+    st.write("before stop")
+    st.stop()
+    st.write("after stop")
+"""
+
+FAILING_SCRIPT = """
+from core import telemetry
+
+with telemetry.run("smoke_error"):
+    raise RuntimeError("boom")
+"""
+
+
+def run_script(tmp_path, name, source):
+    path = tmp_path / name
+    path.write_text(source)
+    return AppTest.from_file(str(path), default_timeout=TIMEOUT_S).run()
+
+
+def test_stopped_run_is_ended(tmp_path):
+    at = run_script(tmp_path, "stopped.py", STOPPED_SCRIPT)
+
+    assert [m.value for m in at.markdown] == ["before stop"]
+    assert run_count("smoke_stop") == 1
+
+
+def test_failed_run_is_ended(tmp_path):
+    at = run_script(tmp_path, "failing.py", FAILING_SCRIPT)
+
+    assert at.exception
+    assert run_count("smoke_error") == 1
+
+
+def test_failed_full_run_does_not_swallow_the_next_fragment_run():
+    timer = SectionTimer("smoke_fragment")
+    with pytest.raises(RuntimeError):
+        with timer.run(FULL_RUN):
+            with timer.section("header"):
+                pass
+            raise RuntimeError("boom")
+
+    with timer.run(FRAGMENT_RUN):
+        with timer.section("scope"):
+            pass
+
+    assert telemetry._local.run is None
+    assert timer.run_kind == FRAGMENT_RUN
+    assert timer.rendered == ["scope"]
+    assert run_count("smoke_fragment", FULL_RUN) == 1
+    assert run_count("smoke_fragment", FRAGMENT_RUN) == 1
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from core.artifact import MODEL_PATH, load_compiled, model_fingerprint
+from core.features import distance_per_experience, experience_category
+from core.scenarios import sweep
+from core.schema import DISTANCE, DISTANCE_PER_EXPERIENCE, EXPERIENCE, EXPERIENCE_CATEGORY
+from core.scoring import ETA_COL
+
+BASE = {
+    "traffic_level": "Medium",
+    "weather": "Rainy",
+    "time_of_day": "Evening",
+    "vehicle_type": "Scooter",
+    DISTANCE: 7.5,
+    "preparation_time_min": 15,
+    EXPERIENCE: 5,
+}
+
+
+@pytest.fixture(scope="module")
+def model():
+    return load_compiled(MODEL_PATH, model_fingerprint(MODEL_PATH))
+
+
+def page_derive(columns):
+    # The Prediction page's own definition, which differs from training's
+    return {DISTANCE_PER_EXPERIENCE: columns[DISTANCE] / (columns[EXPERIENCE] + 1)}
+
+
+def base_point(results):
+    return results.loc[np.isclose(results[DISTANCE], BASE[DISTANCE]), ETA_COL].item()
+
+
+def test_sweep_with_derive_matches_predict_one_at_the_base(model):
+    base = {**BASE, EXPERIENCE_CATEGORY: "Beginner", **page_derive(BASE)}
+    results = sweep(model, base, {DISTANCE: BASE[DISTANCE] + np.array([-2.0, 0.0, 2.0])},
+                    derive=page_derive)
+
+    assert base_point(results) == pytest.approx(model.predict_one(base), abs=1e-4)
+
+
+def test_sweep_with_training_definitions_matches_predict_one_at_the_base(model):
+    base = {
+        **BASE,
+        EXPERIENCE_CATEGORY: str(experience_category(BASE[EXPERIENCE])),
+        DISTANCE_PER_EXPERIENCE: float(distance_per_experience(BASE[DISTANCE], BASE[EXPERIENCE])),
+    }
+    results = sweep(model, base, {DISTANCE: BASE[DISTANCE] + np.array([-2.0, 0.0, 2.0])})
+
+    assert base_point(results) == pytest.approx(model.predict_one(base), abs=1e-4)
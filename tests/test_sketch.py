@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from core.sketch import KLLSketch, rank_error
+
+QUANTILES = np.linspace(0.01, 0.99, 99)
+
+
+def max_rank_error(sketch, values):
+    values = np.sort(values)
+    estimates = np.array(sketch.quantiles(QUANTILES))
+    ranks = np.searchsorted(values, estimates, side="left") / len(values)
+    return np.abs(ranks - QUANTILES).max()
+
+
+@pytest.fixture(params=range(4))
+def values(request):
+    rng = np.random.default_rng(request.param)
+    return rng.lognormal(3.0, 0.5, 1_000_000)
+
+
+def test_streamed_updates_stay_within_rank_error(values):
+    sketch = KLLSketch()
+    for chunk in np.split(values, 1000):
+        sketch.update(chunk)
+
+    assert sketch.n == len(values)
+    assert not sketch.is_exact
+    assert max_rank_error(sketch, values) <= rank_error(sketch.k)
+
+
+def test_merged_sketches_stay_within_rank_error(values):
+    parts = [
+        KLLSketch(seed=i).update(chunk)
+        for i, chunk in enumerate(np.split(values, 100))
+    ]
+    sketch = KLLSketch.merged(parts)
+
+    assert sketch.n == len(values)
+    assert max_rank_error(sketch, values) <= rank_error(sketch.k)
+
+
+def test_small_inputs_are_exact():
+    values = np.random.default_rng(0).normal(size=150)
+    sketch = KLLSketch().update(values)
+
+    assert sketch.is_exact
+    assert sketch.quantile(0.75) == pytest.approx(np.quantile(values, 0.75))
+
+
+def test_same_seed_gives_the_same_sketch(values):
+    a = KLLSketch(seed=7).update(values[:200_000])
+    b = KLLSketch(seed=7).update(values[:200_000])
+
+    assert a.to_bytes() == b.to_bytes()
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from core.artifact import MODEL_PATH, load_compiled, model_fingerprint
+from core.schema import DISTANCE, EXPERIENCE
+from core.surface import ETASurface
+
+ORDER = {
+    "traffic_level": "High",
+    "weather": "Rainy",
+    "time_of_day": "Evening",
+    "vehicle_type": "Scooter",
+    DISTANCE: 7.5,
+    "preparation_time_min": 15,
+    EXPERIENCE: 3,
+}
+
+
+@pytest.fixture(scope="module")
+def surface():
+    fingerprint = model_fingerprint(MODEL_PATH)
+    model = load_compiled(MODEL_PATH, fingerprint)
+    # Coarse distance axis: the test only needs the routing, not the accuracy
+    return ETASurface.build(model, fingerprint, distance_step=5.0)
+
+
+@pytest.mark.parametrize("years", [0.05, 0.5, 0.95])
+def test_fractional_experience_below_a_year_is_scored_by_the_model(surface, years):
+    order = {**ORDER, EXPERIENCE: years}
+
+    assert surface.predict_one(order) == pytest.approx(surface.model.predict_one(order))
+    assert surface.predict_orders([order])[0] == pytest.approx(surface.model.predict_one(order))
+
+
+def test_grid_points_match_the_model(surface):
+    order = {**ORDER, DISTANCE: 5.0}
+
+    assert surface.predict_one(order) == pytest.approx(surface.model.predict_one(order), abs=1e-4)
+
+
+def test_vectorized_lookup_matches_single_orders(surface):
+    orders = [{**ORDER, DISTANCE: d, EXPERIENCE: y}
+              for d, y in [(2.5, 0), (7.5, 0.5), (12.0, 4), (35.0, 6)]]
+
+    assert np.allclose(surface.predict_orders(orders),
+                       [surface.predict_one(order) for order in orders], atol=1e-4)